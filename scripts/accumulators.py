@@ -0,0 +1,175 @@
+import numpy as np
+from batch_engine import advancement_counts
+
+# Online accumulators for streaming runs. Each one is fed SimResults chunks through
+# update(results) and can be combined with another accumulator of the same kind through
+# merge(other), so that workers can summarise their share of the simulations independently.
+
+def player_totals(results):
+    return results.totals
+
+def pool_bins(counts):
+    '''
+    Sums adjacent pairs of histogram bins into the lower half of a same-sized array.
+    '''
+    n_cols, n_bins = counts.shape
+    pooled = np.zeros_like(counts)
+    pooled[:, :n_bins // 2] = counts.reshape(n_cols, n_bins // 2, 2).sum(axis=2)
+    return pooled
+
+class ChampionCounter:
+    '''
+    Counts how often each bracket slot wins the championship.
+    '''
+    def __init__(self):
+        self.teams = None
+        self.counts = None
+        self.n = 0
+
+    def update(self, results):
+        if self.counts is None:
+            self.teams = results.teams
+            self.counts = np.zeros(len(results.teams), dtype=np.int64)
+        self.counts += np.bincount(results.champions(), minlength=len(self.counts))
+        self.n += len(results)
+
+    def merge(self, other):
+        if other.counts is None:
+            return self
+        if self.counts is None:
+            self.teams, self.counts = other.teams, np.zeros_like(other.counts)
+        self.counts += other.counts
+        self.n += other.n
+        return self
+
+    def champion_probs(self):
+        '''
+        Champion probabilities keyed the same way as simulate_n_tournaments (str of the Team).
+        '''
+        return {str(self.teams[slot]): float(self.counts[slot] / self.n) for slot in np.flatnonzero(self.counts)}
+
+class AdvancementCounter:
+    '''
+    Counts how often each bracket slot wins a game in each round.
+    '''
+    def __init__(self):
+        self.counts = None
+        self.n = 0
+
+    def update(self, results):
+        counts = advancement_counts(results.winners, results.schedule)
+        self.counts = counts if self.counts is None else self.counts + counts
+        self.n += len(results)
+
+    def merge(self, other):
+        if other.counts is not None:
+            self.counts = other.counts.copy() if self.counts is None else self.counts + other.counts
+            self.n += other.n
+        return self
+
+    def probs(self):
+        return self.counts / self.n
+
+class Welford:
+    '''
+    Running mean and variance of each column of values(results), by default the player totals.
+
+    Chunks are folded in with Chan et al.'s pairwise update, which is what lets two partial
+    accumulators be merged exactly.
+    '''
+    def __init__(self, values=player_totals):
+        self.values = values
+        self.n = 0
+        self.mean = None
+        self.m2 = None
+
+    def update(self, results):
+        values = np.asarray(self.values(results), dtype=np.float64)
+        mean = values.mean(axis=0)
+        self.combine(len(values), mean, ((values - mean) ** 2).sum(axis=0))
+
+    def merge(self, other):
+        if other.n > 0:
+            self.combine(other.n, other.mean, other.m2)
+        return self
+
+    def combine(self, n, mean, m2):
+        if n == 0:
+            return
+        if self.n == 0:
+            self.n, self.mean, self.m2 = n, mean.copy(), m2.copy()
+            return
+        total = self.n + n
+        delta = mean - self.mean
+        self.mean = self.mean + delta * n / total
+        self.m2 = self.m2 + m2 + delta ** 2 * self.n * n / total
+        self.n = total
+
+    def variance(self):
+        return self.m2 / (self.n - 1)
+
+    def std(self):
+        return np.sqrt(self.variance())
+
+class QuantileSketch:
+    '''
+    Mergeable fixed-size histogram sketch for quantiles of nonnegative columns, by default the
+    player totals.
+
+    Every column shares n_bins equal-width bins starting at zero. When a value falls past the
+    last bin, adjacent bins are pooled and the width doubles, so memory never grows with the number
+    of simulations. Quantiles are accurate to about one bin width.
+    '''
+    def __init__(self, values=player_totals, n_bins=512, bin_width=0.5):
+        self.values = values
+        self.n_bins = n_bins
+        self.bin_width = bin_width
+        self.counts = None
+        self.n = 0
+
+    def coarsen(self):
+        self.counts = pool_bins(self.counts)
+        self.bin_width *= 2
+
+    def update(self, results):
+        values = np.maximum(np.asarray(self.values(results), dtype=np.float64), 0)
+        n, n_cols = values.shape
+        if self.counts is None:
+            self.counts = np.zeros((n_cols, self.n_bins), dtype=np.int64)
+        while values.size and values.max() >= self.bin_width * self.n_bins:
+            self.coarsen()
+
+        bins = (values / self.bin_width).astype(np.int64)
+        flat = (np.arange(n_cols) * self.n_bins + bins).ravel()
+        self.counts += np.bincount(flat, minlength=n_cols * self.n_bins).reshape(n_cols, self.n_bins)
+        self.n += n
+
+    def merge(self, other):
+        if other.counts is None:
+            return self
+        other_counts = other.counts
+        if self.counts is None:
+            self.counts = np.zeros_like(other_counts)
+            self.bin_width = other.bin_width
+        while self.bin_width < other.bin_width:
+            self.coarsen()
+        width = other.bin_width
+        while width < self.bin_width:
+            other_counts = pool_bins(other_counts)
+            width *= 2
+        self.counts += other_counts
+        self.n += other.n
+        return self
+
+    def quantile(self, q):
+        '''
+        Estimated q-quantile of every column, interpolating linearly within a bin.
+        '''
+        cumulative = np.cumsum(self.counts, axis=1)
+        target = q * self.n
+        bins = np.minimum((cumulative < target).sum(axis=1), self.n_bins - 1)
+        rows = np.arange(len(bins))
+        below = np.where(bins > 0, cumulative[rows, np.maximum(bins - 1, 0)], 0)
+        in_bin = self.counts[rows, bins]
+        fraction = np.divide(target - below, in_bin, out=np.zeros(len(bins)), where=in_bin > 0)
+        return (bins + np.clip(fraction, 0, 1)) * self.bin_width
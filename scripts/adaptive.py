@@ -0,0 +1,231 @@
+import time
+import numpy as np
+import pandas as pd
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
+from scipy.stats import norm, t
+from batch_engine import compile_bracket_ratings, player_inputs, player_quantiles, tempo_inputs, rating_updates, simulate_batch_part
+from sim_results import SimResults
+from accumulators import ChampionCounter, Welford
+from contest import field_standing
+from instrument import count
+
+# Adaptive stopping: instead of a fixed N, simulations run in batches until every tracked
+# estimate (champion probabilities, players' mean totals, a strategy's win rate, ...) has a
+# confidence interval narrower than its tolerance, or a time budget runs out. Each estimate is
+# a Target, the mean of per-simulation values, and the run reports the precision it reached.
+#
+# With independent draws the intervals come from the per-simulation variance. With a sampling
+# design (antithetic, stratified or Sobol, see variance_reduction) the simulations of a batch
+# aren't independent, so the intervals come from the spread of the batch means instead: every
+# batch is an independent randomization of the design.
+
+CONFIDENCE = 0.95
+# Default tolerances (confidence interval half-widths) of the built-in targets
+CHAMPION_TOLERANCE = 0.005
+PLAYER_MEAN_TOLERANCE = 1.0
+WIN_RATE_TOLERANCE = 0.01
+# A power of two, so Sobol batches are balanced
+BATCH_SIZE = 2 ** 12
+# Batches before the intervals are trusted to stop on
+MIN_BATCHES = 8
+
+# Outcome of simulate_to_precision, see precision_table
+Precision = namedtuple('Precision', ['n', 'elapsed', 'reason', 'targets', 'results'])
+
+class Target:
+    '''
+    Quantities estimated as the means of per-simulation values, with confidence intervals
+    tracked as the batches come in.
+    '''
+    def __init__(self, name, values, tolerance, labels=None, proportion=False):
+        '''
+        Args:
+            name (str): Name of the target in reports.
+            values (callable): SimResults -> (n,) or (n, k) values of each simulation.
+            tolerance (float): Largest acceptable confidence interval half-width.
+            labels (callable): SimResults -> k labels of the value columns.
+            proportion (bool): The values are between 0 and 1 (probabilities), so rare events
+                get Agresti-Coull intervals rather than the zero width of a column that hasn't
+                happened yet.
+        '''
+        self.name = name
+        self.values = values
+        self.tolerance = tolerance
+        self.labels = labels
+        self.proportion = proportion
+        self.columns = None
+        self.sims = Welford(values=None)
+        self.batches = Welford(values=None)
+        self.confidence = CONFIDENCE
+        self.batch_means = False
+
+    def update(self, results):
+        values = np.asarray(self.values(results), dtype=np.float64).reshape(len(results), -1)
+        if self.columns is None and self.labels is not None:
+            self.columns = list(self.labels(results))
+        mean = values.mean(axis=0)
+        self.sims.combine(len(values), mean, ((values - mean) ** 2).sum(axis=0))
+        self.batches.combine(1, mean, np.zeros_like(mean))
+
+    @property
+    def estimate(self):
+        return self.sims.mean
+
+    def half_width(self):
+        '''
+        Confidence interval half-width of every column, from the batch means when batch_means
+        is set (Student t) and from the simulations otherwise (normal).
+        '''
+        tracker = self.batches if self.batch_means else self.sims
+        if tracker.n < 2:
+            return np.full(len(self.estimate), np.inf)
+        quantile = 0.5 + self.confidence / 2
+        z = norm.ppf(quantile)
+        n = self.sims.n
+        if self.proportion and not self.batch_means:
+            # Agresti-Coull: the interval of the estimate after adding z^2 / 2 successes and failures
+            adjusted = (self.estimate * n + z ** 2 / 2) / (n + z ** 2)
+            return z * np.sqrt(adjusted * (1 - adjusted) / (n + z ** 2))
+        scale = t.ppf(quantile, tracker.n - 1) if self.batch_means else z
+        half_width = scale * tracker.std() / np.sqrt(tracker.n)
+        if self.proportion:
+            # never narrower than the interval of an event that hasn't happened in n simulations
+            half_width = np.maximum(half_width, z ** 2 / (n + z ** 2))
+        return half_width
+
+    def converged(self):
+        return self.sims.n > 0 and bool(np.all(self.half_width() <= self.tolerance))
+
+    def summary(self):
+        '''
+        Estimate and confidence interval half-width of every column.
+        '''
+        columns = self.columns if self.columns is not None else range(len(self.estimate))
+        return pd.DataFrame({'value': columns, 'estimate': self.estimate, 'half_width': self.half_width()})
+
+def champion_target(tolerance=CHAMPION_TOLERANCE):
+    '''
+    Every team's probability of winning the championship.
+    '''
+    return Target('champion', lambda results: results.champions()[:, None] == np.arange(len(results.teams)),
+                  tolerance, labels=lambda results: [str(team) for team in results.teams], proportion=True)
+
+def player_mean_target(tolerance=PLAYER_MEAN_TOLERANCE):
+    '''
+    Every player's mean simulated total (fantasy points, multiplier included).
+    '''
+    return Target('player mean', lambda results: results.totals, tolerance,
+                  labels=lambda results: [f'{player} ({team})' for team, player in results.players])
+
+def strategy_win_target(strategy, field, tolerance=WIN_RATE_TOLERANCE, name='win rate'):
+    '''
+    Probability that a strategy finishes first against a field of opposing lineups (ties for
+    first split the win, as in contest.simulate_contest). A field of one lineup makes it the
+    probability of outscoring that lineup.
+
+    Args:
+        strategy (list): (team, player) tuples of our lineup.
+        field (list): Opposing lineups, each a list of (team, player) tuples (contest.generate_field
+            columns map to them through SimResults.players).
+    '''
+    def values(results):
+        ours = results.strategy_scores(strategy)
+        entries = np.column_stack([results.strategy_scores(lineup) for lineup in field])
+        return field_standing(ours, entries)[1]
+
+    return Target(name, values, tolerance, labels=lambda results: [name], proportion=True)
+
+def simulate_to_precision(matchups_dict, players_dict, ratings_df, method, targets=None, time_budget=None, max_sims=10 ** 7,
+                          batch_size=BATCH_SIZE, min_batches=MIN_BATCHES, confidence=CONFIDENCE, keep=False, player_bk_used=True,
+                          seed=None, workers=1, rating_update=0, sampling=None):
+    '''
+    Simulates tournaments in batches until every target's confidence intervals are within its
+    tolerance (after at least min_batches batches), the next round of batches would overrun
+    time_budget seconds, or max_sims is reached.
+
+    With workers > 1 every round runs one batch per worker in a process pool. Every batch draws
+    from its own generator spawned from the seed, so a seed and worker count reproduce the run.
+    See simulate_n_tournaments for rating_update and sampling.
+
+    Args:
+        targets (list): Targets to reach, by default the champion probabilities
+            (champion_target). They are updated in place.
+        keep (bool): Keep every simulation and return them as a SimResults.
+
+    Returns:
+        champion_probs (dict): Team string -> probability of winning the championship.
+        precision (Precision): Simulations run, seconds taken, why the run stopped ('tolerance',
+            'time budget' or 'max sims'), the targets and the SimResults (None unless keep), see
+            precision_table.
+    '''
+    if targets is None:
+        targets = [champion_target()]
+    for target in targets:
+        target.confidence = confidence
+        target.batch_means = sampling not in (None, 'random')
+
+    ratings = compile_bracket_ratings(matchups_dict, ratings_df, method)
+    players, slots, ppg, multipliers = player_inputs(ratings.teams, players_dict if player_bk_used else {})
+    quantiles = player_quantiles(ratings.teams, players_dict) if player_bk_used else None
+    tempo = tempo_inputs(ratings, players_dict if player_bk_used else {}) if ratings.method == 'tempo' else None
+    updates = rating_updates(ratings, rating_update)
+    champions = ChampionCounter()
+
+    seed_seq = np.random.SeedSequence(seed)
+    pool = ProcessPoolExecutor(max_workers=workers) if workers > 1 else None
+    start = time.perf_counter()
+    n = rounds = batches = 0
+    kept = []
+    reason = 'max sims'
+    try:
+        while n < max_sims:
+            sizes = [size for size in (min(batch_size, max_sims - n - i * batch_size) for i in range(workers)) if size > 0]
+            args = (repeat(ratings.wp), sizes, seed_seq.spawn(len(sizes)), repeat(slots), repeat(ppg), repeat(multipliers),
+                    repeat(None), repeat(None), repeat(quantiles), repeat(tempo), repeat(updates), repeat(ratings.schedule),
+                    repeat(sampling))
+            parts = pool.map(simulate_batch_part, *args) if pool is not None else map(simulate_batch_part, *args)
+
+            for winners, totals in parts:
+                results = SimResults(ratings.teams, players, winners, totals, ratings.schedule)
+                champions.update(results)
+                for target in targets:
+                    target.update(results)
+                if keep:
+                    kept.append((winners, totals))
+                n += len(results)
+                batches += 1
+                count('sims', len(results))
+            rounds += 1
+
+            elapsed = time.perf_counter() - start
+            if batches >= min_batches and all(target.converged() for target in targets):
+                reason = 'tolerance'
+                break
+            if time_budget is not None and elapsed * (rounds + 1) / rounds > time_budget:
+                reason = 'time budget'
+                break
+    finally:
+        if pool is not None:
+            pool.shutdown()
+
+    results = None
+    if keep:
+        totals = np.concatenate([totals for _, totals in kept]) if len(players) > 0 else None
+        results = SimResults(ratings.teams, players, np.concatenate([winners for winners, _ in kept]), totals, ratings.schedule)
+    return champions.champion_probs(), Precision(n, time.perf_counter() - start, reason, targets, results)
+
+def precision_table(precision):
+    '''
+    One row per target: its tolerance, the widest confidence interval half-width it reached,
+    whether that is within tolerance and about how many simulations would get it there (the
+    half-width shrinks with the square root of the simulations).
+    '''
+    rows = []
+    for target in precision.targets:
+        widest = float(np.max(target.half_width()))
+        needed = int(np.ceil(precision.n * (widest / target.tolerance) ** 2)) if np.isfinite(widest) else None
+        rows.append({'target': target.name, 'tolerance': target.tolerance, 'half_width': widest,
+                     'converged': widest <= target.tolerance, 'sims': precision.n, 'sims_needed': needed})
+    return pd.DataFrame(rows)
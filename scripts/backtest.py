@@ -0,0 +1,302 @@
+import os
+import re
+import json
+import hashlib
+import unicodedata
+import numpy as np
+import pandas as pd
+from itertools import repeat
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+import fetch
+from batch_engine import compile_bracket_ratings, player_inputs, player_quantiles, bracket_teams, bracket_rosters, simulate_batch_part
+from sim_results import SimResults
+from optimize_lineup import optimize_lineup
+from team_registry import team_registry
+from player_store import PlayerStore, read_repr
+from load_team_data import read_unplayed_tournament, pre_tournament_kenpom
+from load_player_data import load_player_data, bracket_team_links
+
+# Backtests selection strategies on past tournaments: each year's bracket is simulated from that
+# year's pre-tournament ratings (snapshots built by build_pre_tournament.py), every strategy picks
+# a lineup from the simulations, and the lineup is scored with the points the players actually
+# scored in that tournament, from the ESPN box scores in notebooks/bk_df.csv. Years without
+# pre-tournament ratings are skipped rather than simulated from ratings that saw the results.
+#
+# Only what the repo doesn't hold is fetched. Brackets saved under BRACKET_DIR and the rosters in
+# ROSTER_PATHS are used as they are; the rest comes through the page cache and the PlayerStore,
+# team pages only (the actual points come from bk_df.csv, so no gamelogs), which is one request
+# per missing team the first time a year is run and none after.
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'data')
+BACKTEST_DIR = os.environ.get('MM_BACKTEST_DIR', os.path.join(DATA_DIR, 'backtest'))
+BRACKET_DIR = os.path.join(DATA_DIR, 'brackets')
+BK_DF_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'notebooks', 'bk_df.csv')
+# Rosters saved in the repo (Python reprs, see player_store.read_repr), by year
+ROSTER_PATHS = {2024: os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'extras', 'player.json')}
+# Tournaments with player results in bk_df.csv (there was no 2020 tournament)
+BACKTEST_YEARS = [year for year in range(2008, 2025) if year != 2020]
+# Name suffixes left out of player lookup keys
+NAME_SUFFIXES = {'jr', 'sr', 'ii', 'iii', 'iv', 'v'}
+
+def pick_mean(sims, ppg, size):
+    return optimize_lineup(sims, 'mean', size)[0]
+
+def pick_upside(sims, ppg, size):
+    return optimize_lineup(sims, 'quantile', size, q=0.9)[0]
+
+def pick_ppg(sims, ppg, size):
+    # baseline without simulation: best points per game times seed multiplier
+    multipliers = np.array([sims.teams[slot].get_multiplier() for slot in sims.player_slots])
+    best = np.argsort(-np.nan_to_num(ppg) * multipliers)[:size]
+    return [sims.players[col] for col in best]
+
+# Strategies take (sims, ppg, size) and return a lineup of (team, player) tuples. They run in
+# worker processes, so custom ones must be module-level functions.
+STRATEGIES = {'mean': pick_mean, 'upside': pick_upside, 'ppg': pick_ppg}
+
+def load_bracket(year):
+    '''
+    A past year's bracket description: BRACKET_DIR/bracket_<year>.json when it is saved there,
+    otherwise read from the Sports-Reference bracket page (through the page cache).
+    '''
+    path = os.path.join(BRACKET_DIR, f'bracket_{year}.json')
+    if os.path.exists(path):
+        with open(path) as f:
+            return json.load(f)
+    return read_unplayed_tournament(year)
+
+def load_rosters(year, matchups_dict, store=None):
+    '''
+    Rosters of a past bracket's teams, with points per game but no gamelogs.
+
+    Teams in the year's roster file (ROSTER_PATHS) are copied into the PlayerStore first, so
+    load_player_data only fetches the teams still missing. In offline mode (fetch.set_offline)
+    those are left out instead, and their players aren't simulated.
+    '''
+    own_store = store is None
+    if own_store:
+        store = PlayerStore(year)
+
+    try:
+        links = bracket_team_links(matchups_dict)
+        if year in ROSTER_PATHS and store.missing_teams(links):
+            teams = bracket_teams(matchups_dict)
+            stored = store.teams()
+            for team, roster in zip(teams, bracket_rosters(teams, read_repr(ROSTER_PATHS[year]))):
+                if roster and team.team_name not in stored:
+                    store.upsert_team(team.team_name, roster, links.get(team.team_name))
+
+        missing = store.missing_teams(links)
+        if missing and fetch.OFFLINE:
+            print(f"Offline: no {year} roster for {', '.join(missing)}, their players are left out.")
+            return store.load()
+        return load_player_data(year, matchups_dict, store=store, gamelogs=False)
+    finally:
+        if own_store:
+            store.close()
+
+def load_year(year, method='kenpom'):
+    '''
+    Loads a past year's bracket (load_bracket), pre-tournament ratings (see
+    load_team_data.pre_tournament_kenpom) and rosters (load_rosters). Raises FileNotFoundError,
+    before fetching anything, when the year has no pre-tournament ratings.
+    '''
+    if method != 'kenpom':
+        raise ValueError("Only KenPom ratings go back far enough to backtest.")
+    ratings_df = pre_tournament_kenpom(year)
+    matchups_dict = load_bracket(year)
+    return matchups_dict, load_rosters(year, matchups_dict), ratings_df
+
+def player_key(name):
+    '''
+    Lookup key for a player name: accents, case, punctuation and suffixes (Jr., III) don't matter.
+    '''
+    name = unicodedata.normalize('NFKD', name).encode('ascii', 'ignore').decode().casefold()
+    words = re.sub(r'[^a-z0-9 ]+', '', name.replace('-', ' ')).split()
+    return ' '.join(word for word in words if word not in NAME_SUFFIXES)
+
+def espn_player_name(label):
+    '''
+    Player name of a bk_df.csv label, which runs ESPN's full and short names together with the
+    jersey number: "Stephen CurryS. Curry#30" -> "Stephen Curry".
+    '''
+    label = re.sub(r'#\d+$', '', label)
+    first = label.split(' ')[0]
+    # where the short name may start: an initial ("S.", "K.J."), initials ("DJ") or the first name
+    starts = [m.start() for m in re.finditer(rf"(?<=[^ ])(?=(?:[A-Z][\w'.]*\.|[A-Z][A-Z]+|{re.escape(first)}) )", label)]
+
+    def fits(start, initial):
+        full, short = player_key(label[:start]).split(), player_key(label[start:]).split()
+        return bool(full and short) and short[-1] in full and (not initial or full[0].startswith(short[0]))
+
+    # prefer a short name that abbreviates the first name (not "J." of "Sir'Jabari")
+    for initial in (True, False):
+        for start in starts:
+            if fits(start, initial):
+                return label[:start]
+    return label
+
+def read_actual_points(path=BK_DF_PATH):
+    '''
+    Every player's actual tournament points (First Four games not included) from bk_df.csv, as
+    a DataFrame of year, team_id, key (player_key) and pts.
+    '''
+    bk_df = pd.read_csv(path)
+    registry = team_registry()
+    team_ids = {team: registry.resolve_prefix(team) for team in bk_df['team'].unique()}
+    actual = pd.DataFrame({'year': bk_df['year'], 'team_id': bk_df['team'].map(team_ids),
+                           'key': bk_df['level_1'].map(espn_player_name).map(player_key), 'pts': bk_df['pts']})
+    return actual.dropna(subset=['team_id']).astype({'team_id': int})
+
+def initial_key(key):
+    # first initial and last name, for players ESPN names differently (Kam / Kameron Jones)
+    words = key.split()
+    return f'{words[0][0]} {words[-1]}' if words else key
+
+def actual_points(year, teams, players, actual=None):
+    '''
+    Fantasy points each simulated player actually scored, from bk_df.csv. Players match on
+    player_key within their team, or on first initial and last name when that is unique on both
+    sides. NaN for players who aren't in bk_df.csv (didn't play, or are named too differently).
+
+    Args:
+        actual (pd.DataFrame): read_actual_points's table, read from BK_DF_PATH if not given.
+    '''
+    if actual is None:
+        actual = read_actual_points()
+    actual = actual[actual['year'] == year]
+    points = dict(zip(zip(actual['team_id'], actual['key']), actual['pts']))
+
+    def unique(keys):
+        counts = Counter((team_id, initial_key(key)) for team_id, key in keys)
+        return {key for key, count in counts.items() if count == 1}
+
+    by_initial = {(team_id, initial_key(key)): pts for (team_id, key), pts in points.items()}
+    team_ids = team_registry().ids([team.team_name for team in teams], 'bracket team')
+    keys = [(int(team_ids[slot]), player_key(player)) for slot, _, player in players]
+    matchable = unique(points) & unique(keys)
+
+    values = []
+    for (team_id, key), (slot, _, _) in zip(keys, players):
+        pts = points.get((team_id, key))
+        if pts is None and (team_id, initial_key(key)) in matchable:
+            pts = by_initial[(team_id, initial_key(key))]
+        values.append(np.nan if pts is None else pts * teams[slot].get_multiplier())
+    return np.array(values, dtype=float)
+
+def oracle_scores(size=15, path=BK_DF_PATH):
+    '''
+    Best possible score of each year (the top `size` players by actual fantasy points).
+    '''
+    bk_df = pd.read_csv(path)
+    return bk_df.groupby('year')['pts_mult'].apply(lambda pts: pts.nlargest(size).sum()).to_dict()
+
+def cache_key(ratings, ppg, multipliers, N, seed, quantiles=None):
+    digest = hashlib.sha256()
+    for array in (ratings.wp, ratings.schedule.left, ratings.schedule.right,
+                  np.nan_to_num(np.asarray(ppg, dtype=float)), np.asarray(multipliers, dtype=float)):
+        digest.update(np.ascontiguousarray(array).tobytes())
+    if quantiles is not None:
+        digest.update(np.ascontiguousarray(quantiles).tobytes())
+    digest.update(f'{N}-{seed}'.encode())
+    return digest.hexdigest()[:16]
+
+def simulate_year(year, ratings, players, slots, ppg, multipliers, N, seed, quantiles=None):
+    '''
+    Simulates a year's bracket, reusing the cached simulations when the inputs haven't changed
+    (unseeded runs are never cached).
+    '''
+    path = os.path.join(BACKTEST_DIR, f'sims_{year}_{cache_key(ratings, ppg, multipliers, N, seed, quantiles)}.npz')
+    if seed is not None and os.path.exists(path):
+        cached = np.load(path)
+        winners, totals = cached['winners'], cached['totals']
+    else:
+        winners, totals = simulate_batch_part(ratings.wp, N, seed, slots, ppg, multipliers, quantiles=quantiles, schedule=ratings.schedule)
+    if seed is not None and not os.path.exists(path):
+        os.makedirs(BACKTEST_DIR, exist_ok=True)
+        tmp_path = f'{path}.{os.getpid()}.tmp.npz'
+        np.savez(tmp_path, winners=winners, totals=totals)
+        os.replace(tmp_path, path)
+    return SimResults(ratings.teams, players, winners, totals, ratings.schedule)
+
+def backtest_year(year, inputs, strategies, N, seed, size):
+    '''
+    Simulates one year and scores every strategy's lineup. Runs in a worker process.
+    '''
+    ratings, players, slots, ppg, multipliers, quantiles, actual = inputs
+    sims = simulate_year(year, ratings, players, slots, ppg, multipliers, N, seed, quantiles)
+
+    records = []
+    for name, strategy in strategies.items():
+        cols = sims.columns(strategy(sims, np.asarray(ppg, dtype=float), size))
+        scores = sims.totals[:, cols].sum(axis=1, dtype=np.float64)
+        score = np.nansum(actual[cols])
+        records.append({
+            'year': year,
+            'strategy': name,
+            'actual': score,
+            'expected': scores.mean(),
+            # where the actual score fell among the lineup's simulated scores
+            'percentile': (scores < score).mean(),
+            'unknown_players': int(np.isnan(actual[cols]).sum()),
+        })
+    return records
+
+def run_backtest(years=BACKTEST_YEARS, strategies=STRATEGIES, N=20000, seed=0, workers=4, size=15, method='kenpom', loader=load_year):
+    '''
+    Backtests lineup selection strategies over past tournaments.
+
+    Data for each year is loaded in this process (see load_year), then the years are simulated
+    and scored in parallel. Simulations are cached per year under
+    BACKTEST_DIR, keyed by the inputs, N and seed, so rerunning with new strategies skips them.
+
+    Args:
+        years (list): Tournaments to backtest.
+        strategies (dict): Name -> strategy(sims, ppg, size) returning a lineup.
+        N (int): Simulations per year.
+        seed (int): Base seed, each year simulates with seed + year.
+        workers (int): Years run at once.
+        size (int): Players per lineup.
+        loader (callable): year, method -> (matchups_dict, players_dict, ratings), load_year by
+            default. It raises FileNotFoundError for a year without pre-tournament ratings,
+            which is then skipped.
+
+    Returns:
+        pd.DataFrame: One row per (year, strategy) with the actual and expected score, the
+            percentile of the actual score among the simulations, and the year's best possible
+            score (from bk_df.csv) and the share of it the lineup achieved. attrs['skipped']
+            maps each skipped year to the reason.
+    '''
+    actual = read_actual_points()
+    inputs = []
+    skipped = {}
+    for year in years:
+        try:
+            matchups_dict, players_dict, ratings_df = loader(year, method)
+        except FileNotFoundError as error:
+            skipped[year] = str(error)
+            continue
+        ratings = compile_bracket_ratings(matchups_dict, ratings_df, method)
+        players, slots, ppg, multipliers = player_inputs(ratings.teams, players_dict)
+        quantiles = player_quantiles(ratings.teams, players_dict)
+        inputs.append((ratings, players, slots, ppg, multipliers, quantiles, actual_points(year, ratings.teams, players, actual)))
+
+    if skipped:
+        print(f"Skipped {len(skipped)} year(s) without pre-tournament ratings (see build_pre_tournament.py): "
+              f"{', '.join(map(str, skipped))}")
+    years = [year for year in years if year not in skipped]
+    if not years:
+        raise ValueError("No year to backtest has pre-tournament ratings, build them with build_pre_tournament.py.")
+    seeds = [None if seed is None else seed + year for year in years]
+    if workers == 1:
+        parts = list(map(backtest_year, years, inputs, repeat(strategies), repeat(N), seeds, repeat(size)))
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            parts = list(pool.map(backtest_year, years, inputs, repeat(strategies), repeat(N), seeds, repeat(size)))
+
+    results = pd.DataFrame([record for part in parts for record in part])
+    results['oracle'] = results['year'].map(oracle_scores(size))
+    results['share_of_oracle'] = results['actual'] / results['oracle']
+    results.attrs['skipped'] = skipped
+    return results
@@ -0,0 +1,580 @@
+import numpy as np
+from collections import defaultdict, namedtuple
+from compiled_ratings import CompiledRatings
+from bracket import compile_bracket, balanced_schedule
+from columnar import PlayerBundle
+from team_registry import team_registry
+from instrument import stage, count
+from player_distributions import TABLE_SIZE, stats_quantiles, has_gamelog, sampling_tables, sample_tables
+from tempo_model import POSSESSIONS_SD, TempoInputs, usage_split, split_team_points
+from variance_reduction import game_uniforms, normal_draws, standard_normal, uniform
+
+# The engines run off the bracket's compiled Schedule (see bracket.py): games in round order,
+# winners stored as an (N, n_games) int8 array of slot indices. For the usual 64 teams the
+# first 32 games pair adjacent slots (south, west, east, midwest) and the final is game 62.
+
+# What simulate_batch_part needs to move ratings with simulated results: every slot's rating,
+# the margin's standard deviation and the update gain, see rating_updates
+RatingUpdates = namedtuple('RatingUpdates', ['ratings', 'sd', 'k'])
+# Simulations drawn from each generator spawned from a batch run's seed. The blocks don't depend
+# on how many workers run them, so neither do the results. A power of 2, which Sobol designs
+# and antithetic pairs both divide.
+BLOCK_SIZE = 2 ** 14
+
+def bracket_teams(matchups_dict):
+    '''
+    The bracket's Team objects in slot order, from region matchups or any bracket description.
+    '''
+    return compile_bracket(matchups_dict).teams
+
+def bracket_rosters(teams, players_dict):
+    '''
+    Each bracket team's roster from the nested player dict, matched by team ID so the dict may
+    spell team names differently from the bracket. Teams without a roster get an empty one.
+    Raises a KeyError listing every roster team name the registry can't resolve.
+    '''
+    registry = team_registry()
+    roster_by_id = dict(zip(registry.ids(players_dict, 'roster team').tolist(), players_dict.values()))
+    return [roster_by_id.get(team_id, {}) for team_id in registry.ids([team.team_name for team in teams], 'bracket team').tolist()]
+
+def bracket_players(teams, players_dict):
+    '''
+    Flattens the nested player dict into a player list ordered by bracket slot.
+
+    Returns:
+        players (list): (slot, team_name, player_name) tuples, one per player, with the team
+            named as in the bracket.
+    '''
+    players = []
+    for slot, (team, roster) in enumerate(zip(teams, bracket_rosters(teams, players_dict))):
+        for player_name, player_stats in roster.items():
+            # skip stray team-level entries such as 'ground_truth_total'
+            if isinstance(player_stats, dict):
+                players.append((slot, team.team_name, player_name))
+    return players
+
+def player_inputs(teams, players_dict):
+    '''
+    Per-player arrays the batch engine needs to simulate player totals. players_dict may also
+    be a PlayerBundle, whose columns are sliced directly.
+
+    Returns:
+        players (list): (slot, team_name, player_name) tuples, see bracket_players.
+        slots (np.ndarray): Bracket slot of each player's team.
+        ppg (list): Points per game of each player.
+        multipliers (list): Seed multiplier of each player's team.
+    '''
+    if isinstance(players_dict, PlayerBundle):
+        return players_dict.inputs(teams)
+
+    players = bracket_players(teams, players_dict)
+    rosters = bracket_rosters(teams, players_dict)
+    slots = np.array([slot for slot, _, _ in players], dtype=int)
+    ppg = [rosters[slot][player]['ppg'] for slot, _, player in players]
+    multipliers = [teams[slot].get_multiplier() for slot in slots]
+    return players, slots, ppg, multipliers
+
+def player_quantiles(teams, players_dict):
+    '''
+    Quantile tables of every player's points per game (see player_distributions), in the order
+    of player_inputs, or None when no player has a gamelog so the normal model applies.
+
+    Returns:
+        np.ndarray: (n_players, N_QUANTILES) float32 tables. Players without a gamelog get the
+            normal model's table.
+    '''
+    if isinstance(players_dict, PlayerBundle):
+        return players_dict.quantiles(teams)
+
+    rosters = bracket_rosters(teams, players_dict)
+    stats = [rosters[slot][player] for slot, _, player in bracket_players(teams, players_dict)]
+    if not any(has_gamelog(player_stats) for player_stats in stats):
+        return None
+    return np.array([stats_quantiles(player_stats) for player_stats in stats], dtype=np.float32)
+
+def player_stat(teams, players_dict, name):
+    '''
+    A per-player stat in the order of player_inputs, NaN where a player doesn't have it.
+    '''
+    if isinstance(players_dict, PlayerBundle):
+        rows, _ = players_dict.bracket_rows(teams)
+        if name not in players_dict.columns:
+            return np.full(len(rows), np.nan)
+        return np.asarray(players_dict[name][rows], dtype=np.float64)
+
+    rosters = bracket_rosters(teams, players_dict)
+    values = [rosters[slot][player].get(name) for slot, _, player in bracket_players(teams, players_dict)]
+    return np.array([np.nan if value is None else value for value in values], dtype=np.float64)
+
+def tempo_inputs(ratings, players_dict):
+    '''
+    What simulate_batch_part needs to run the tempo model from ratings compiled with
+    method='tempo': the pairings' expected possessions and points per possession, and every
+    player's usage split (see tempo_model.usage_split) in the order of player_inputs.
+    '''
+    split_mean, split_sd = usage_split(*(player_stat(ratings.teams, players_dict, name) for name in ('ppg', 'fga', 'fta')))
+    return TempoInputs(ratings.possessions, ratings.ppp, ratings.points_sd, split_mean, split_sd)
+
+def rating_updates(ratings, k):
+    '''
+    RatingUpdates for compiled ratings, or None when k is 0 (static ratings). See
+    CompiledRatings.updating for the update rule.
+    '''
+    if not k:
+        return None
+    return RatingUpdates(ratings.ratings, ratings.sd, k)
+
+def compile_bracket_ratings(matchups_dict, ratings_df, method, sd=11):
+    '''
+    Compiles the bracket (region matchups or any bracket description) and the ratings of its
+    teams in slot order, unless the ratings already are. The schedule is kept on the ratings.
+    '''
+    if isinstance(ratings_df, CompiledRatings):
+        return ratings_df
+    schedule = compile_bracket(matchups_dict)
+    return CompiledRatings(schedule.teams, ratings_df, method, sd=sd, schedule=schedule)
+
+def known_winners(schedule, wins):
+    '''
+    Fixes the games already played from how many games each team has won so far.
+
+    Games are settled in schedule order: an entrant with more wins than the games it has
+    already been credited with won the game.
+
+    Args:
+        schedule (Schedule): The compiled bracket, see bracket.compile_bracket.
+        wins (dict): Team name (as any source spells it) -> tournament games won so far. Teams
+            that haven't won a game can be left out.
+
+    Returns:
+        known (np.ndarray): (n_games,) int8 winning slot of each game in round order, -1 if unplayed.
+    '''
+    registry = team_registry()
+    wins_by_id = {registry.resolve(name): n_wins for name, n_wins in wins.items()}
+    unresolved = registry.unresolved(wins)
+    if unresolved:
+        raise KeyError(f"Unknown team names in results: {', '.join(unresolved)}")
+    team_ids = registry.ids([team.team_name for team in schedule.teams], 'bracket team')
+    team_wins = np.array([wins_by_id.get(team_id, 0) for team_id in team_ids.tolist()])
+
+    known = np.full(schedule.n_games, -1, dtype=np.int8)
+    nodes = np.concatenate([known, np.arange(schedule.n_teams, dtype=np.int8)])
+    credited = np.zeros(schedule.n_teams, dtype=int)
+    for game, (left, right) in enumerate(schedule.pairs):
+        name = schedule.round_names[schedule.round[game]]
+        entrants = [nodes[left], nodes[right]]
+        won = [slot for slot in entrants if slot >= 0 and team_wins[slot] > credited[slot]]
+        if len(won) > 1:
+            raise ValueError(f"Results have two winners of the same {name} game.")
+        if won:
+            if min(entrants) < 0:
+                raise ValueError(f"Results have a {name} winner whose earlier game isn't decided.")
+            known[game] = nodes[game] = won[0]
+            credited[won[0]] += 1
+
+    extra = np.flatnonzero(team_wins > credited)
+    if len(extra):
+        raise ValueError(f"Results have more wins than games won for {', '.join(schedule.teams[slot].team_name for slot in extra)}.")
+    return known
+
+def simulate_batch(win_probs, N, rng=None, known=None, schedule=None, uniforms=None):
+    '''
+    Simulates N tournaments at once, one round at a time.
+
+    Args:
+        win_probs (np.ndarray): (n_teams, n_teams) matrix of pairwise win probabilities in
+            bracket slot order.
+        N (int): Number of tournaments to simulate.
+        rng (np.random.Generator): Random generator to draw game outcomes from.
+        known (np.ndarray): (n_games,) winners of games already played (-1 for unplayed), see
+            known_winners. Played games keep their actual winner in every simulation.
+        schedule (Schedule): The compiled bracket, by default the 64-team layout in which
+            adjacent slots meet (see bracket.balanced_schedule).
+        uniforms (np.ndarray): (draws, n_games, N) uniforms of every game slot (see
+            variance_reduction.game_uniforms) to play the games off instead of drawing from
+            rng. The first team wins a game when its row 0 uniform is below its win probability.
+
+    Returns:
+        winners (np.ndarray): (N, n_games) int8 array of winning slot indices, games in the
+            schedule's round order (for 64 teams the 32 first round games, then 16, 8, 4, 2
+            and the championship).
+    '''
+    if rng is None:
+        rng = np.random.default_rng()
+    if schedule is None:
+        schedule = balanced_schedule(win_probs.shape[0])
+
+    # each round reads its entrants from the node columns and writes its winners into them
+    nodes = schedule.node_array(N)
+    for games in schedule.rounds:
+        team1 = nodes[schedule.left[games]]
+        team2 = nodes[schedule.right[games]]
+        prob_team1_wins = win_probs[team1, team2]
+        u = uniforms[0, games] if uniforms is not None else rng.random(prob_team1_wins.shape)
+        won = np.where(u < prob_team1_wins, team1, team2)
+
+        if known is not None:
+            played = known[games, None]
+            won = np.where(played >= 0, played, won)
+        nodes[games] = won
+
+    return np.ascontiguousarray(nodes[:schedule.n_games].T)
+
+def simulate_batch_updating(updates, N, rng=None, known=None, schedule=None, uniforms=None):
+    '''
+    simulate_batch with ratings that move with the simulated results. Every game's margin is
+    drawn as Normal(rating difference, sd), and both teams' ratings then move by k times its
+    deviation from the expected margin for the rest of that simulation.
+
+    Only a game's winner plays again, so the rating state is each game winner's current rating,
+    float32 rows in the schedule's node layout next to the teams' starting ratings.
+
+    Args:
+        updates (RatingUpdates): Slot ratings, margin sd and gain, see rating_updates.
+        N, rng, known, schedule, uniforms: See simulate_batch. Played games keep their winner
+            and move no ratings. A game's margin noise is -ndtri of its uniform, so the first
+            team wins the first game exactly when simulate_batch would have it win.
+
+    Returns:
+        winners (np.ndarray): (N, n_games) int8 array of winning slot indices, see simulate_batch.
+    '''
+    if rng is None:
+        rng = np.random.default_rng()
+    if schedule is None:
+        schedule = balanced_schedule(len(updates.ratings))
+
+    sd = np.float32(updates.sd)
+    k = np.float32(updates.k)
+    nodes = schedule.node_array(N)
+    current = schedule.node_array(N, dtype=np.float32)
+    current[schedule.n_games:] = np.asarray(updates.ratings, dtype=np.float32)[:, None]
+
+    for games in schedule.rounds:
+        left, right = schedule.left[games], schedule.right[games]
+        team1 = nodes[left]
+        team2 = nodes[right]
+        rating1 = current[left]
+        rating2 = current[right]
+        if uniforms is not None:
+            surprise = -normal_draws(uniforms[0, games])
+        else:
+            surprise = rng.standard_normal(team1.shape, dtype=np.float32)
+        surprise *= sd
+        team1_wins = rating1 - rating2 > -surprise
+
+        if known is not None:
+            played = known[games, None]
+            team1_wins = np.where(played >= 0, played == team1, team1_wins)
+            surprise[played[:, 0] >= 0] = 0
+        surprise *= k
+        nodes[games] = np.where(team1_wins, team1, team2)
+        current[games] = np.where(team1_wins, rating1 + surprise, rating2 - surprise)
+
+    return np.ascontiguousarray(nodes[:schedule.n_games].T)
+
+def simulate_batch_tempo(tempo, N, rng=None, known=None, update_k=0, schedule=None, uniforms=None):
+    '''
+    Simulates N tournaments at once with the tempo model: every game's possessions and both
+    teams' points are drawn and the team with more points wins.
+
+    Args:
+        tempo (TempoInputs): Expected possessions and points per possession, see tempo_inputs.
+        N (int): Number of tournaments to simulate.
+        rng (np.random.Generator): Random generator to draw scores from.
+        known (np.ndarray): (n_games,) winners of games already played (-1 for unplayed), see simulate_batch.
+        update_k (float): Gain of in-simulation rating updates (0 for static ratings): every
+            game moves a per-simulation shift of both teams' expected margin by update_k times
+            the margin's deviation from expectation, see simulate_batch_updating.
+        schedule (Schedule): The compiled bracket, see simulate_batch.
+        uniforms (np.ndarray): (3, n_games, N) uniforms of every game slot, see simulate_batch.
+            Row 0 drives the margin between the teams' points noise (the same way round as
+            the other models), row 1 their sum and row 2 the possessions.
+
+    Returns:
+        winners (np.ndarray): (N, n_games) int8 array of winning slot indices, see simulate_batch.
+        scores (np.ndarray): (N, n_games, 2) float32 points of the game's first and second team.
+    '''
+    if rng is None:
+        rng = np.random.default_rng()
+    n_teams = tempo.possessions.shape[0]
+    if schedule is None:
+        schedule = balanced_schedule(n_teams)
+
+    possessions = np.asarray(tempo.possessions, dtype=np.float32).ravel()
+    ppp = np.asarray(tempo.ppp, dtype=np.float32).ravel()
+    points_sd = np.float32(tempo.points_sd)
+    nodes = schedule.node_array(N)
+    scores = np.empty((schedule.n_games, 2, N), dtype=np.float32)
+    if update_k:
+        # accumulated shift of each game winner's expected margins, see simulate_batch_updating
+        shift = np.zeros((schedule.n_games + n_teams, N), dtype=np.float32)
+
+    for games in schedule.rounds:
+        left, right = schedule.left[games], schedule.right[games]
+        team1 = nodes[left]
+        team2 = nodes[right]
+        # flat indices of (team1, team2) and (team2, team1) in the pairing matrices
+        pairing = team1 * np.intp(n_teams) + team2
+        reverse = team2 * np.intp(n_teams) + team1
+        if uniforms is not None:
+            # independent normals for the margin and the sum of both teams' points noise
+            margin = -normal_draws(uniforms[0, games])
+            total = normal_draws(uniforms[1, games])
+            noise = np.stack([normal_draws(uniforms[2, games]), (total + margin) / np.sqrt(np.float32(2)),
+                              (total - margin) / np.sqrt(np.float32(2))])
+        else:
+            noise = rng.standard_normal((3,) + team1.shape, dtype=np.float32)
+        game_possessions = noise[0]
+        game_possessions *= np.float32(POSSESSIONS_SD)
+        game_possessions += possessions[pairing]
+        points1 = game_possessions * ppp[pairing] + points_sd * noise[1]
+        points2 = game_possessions * ppp[reverse] + points_sd * noise[2]
+        if update_k:
+            # half of the shift in the expected margin goes to each team's points
+            edge = (shift[left] - shift[right]) / 2
+            points1 += edge
+            points2 -= edge
+        points1 = np.maximum(points1, 0)
+        points2 = np.maximum(points2, 0)
+        won = np.where(points1 > points2, team1, team2)
+
+        if known is not None:
+            played = known[games, None]
+            won = np.where(played >= 0, played, won)
+        if update_k:
+            surprise = noise[1] - noise[2]
+            surprise *= points_sd * np.float32(update_k)
+            if known is not None:
+                surprise[played[:, 0] >= 0] = 0
+            shift[games] = np.where(won == team1, shift[left] + surprise, shift[right] - surprise)
+        nodes[games] = won
+        scores[games, 0] = points1
+        scores[games, 1] = points2
+
+    return np.ascontiguousarray(nodes[:schedule.n_games].T), np.ascontiguousarray(scores.transpose(2, 0, 1))
+
+def roster_layout(slots, n_teams):
+    '''
+    Position of each player within its team's (zero padded) roster row.
+
+    Returns:
+        positions (np.ndarray): (n_players,) column of each player in the padded roster.
+        width (int): Size of the largest roster.
+    '''
+    counts = np.bincount(slots, minlength=n_teams)
+    order = np.argsort(slots, kind='stable')
+    starts = np.cumsum(counts) - counts
+    positions = np.empty(len(slots), dtype=int)
+    positions[order] = np.arange(len(slots)) - np.repeat(starts, counts)
+    return positions, int(counts.max(initial=0))
+
+def simulate_player_totals(winners, slots, ppg, multipliers, rng=None, chunk_size=10000, known=None, actual=None, quantiles=None, scores=None, tempo=None, schedule=None, antithetic=False):
+    '''
+    Samples every player's fantasy points total for each simulated bracket.
+
+    Each game's points are drawn like simulate_player_pts (Normal(ppg, ppg / 5) clipped at zero,
+    or from the player's quantile table) and scaled by the seed multiplier as in
+    handle_player_bookkeeping_for_team. Rosters are laid out as padded (n_teams, width) rows so
+    every round only draws for the teams still playing.
+
+    With scores and tempo (the tempo model) no per-player points are drawn around ppg; instead
+    each team's points in each game are split among its players by usage, see
+    tempo_model.split_team_points.
+
+    Args:
+        winners (np.ndarray): (N, n_games) winning slot indices, see simulate_batch.
+        slots (np.ndarray): (n_players,) bracket slot of each player's team.
+        ppg (np.ndarray): (n_players,) points per game, missing values count as zero.
+        multipliers (np.ndarray): (n_players,) seed multiplier of each player's team.
+        rng (np.random.Generator): Random generator to draw points from.
+        chunk_size (int): Simulations processed at a time, bounds the temporary memory.
+        known (np.ndarray): (n_games,) winners of games already played (-1 for unplayed). No
+            points are drawn for played games, nor for play-in games (see bracket.py).
+        actual (np.ndarray): (n_players,) fantasy points already scored in the played games,
+            added to every simulated total.
+        quantiles (np.ndarray): (n_players, N_QUANTILES) per-game quantile tables, see
+            player_quantiles. Replaces the normal model when given.
+        scores (np.ndarray): (N, n_games, 2) points of both teams in every game, see simulate_batch_tempo.
+        tempo (TempoInputs): Players' usage split, used with scores.
+        schedule (Schedule): The compiled bracket, see simulate_batch.
+        antithetic (bool): Mirror the points draws of interleaved pairs of simulations, to go
+            with antithetic game uniforms (see variance_reduction). chunk_size must be even.
+
+    Returns:
+        totals (np.ndarray): (N, n_players) float32 array of simulated totals.
+    '''
+    if rng is None:
+        rng = np.random.default_rng()
+
+    N, n_games = winners.shape
+    if schedule is None:
+        schedule = balanced_schedule(n_games + 1)
+    n_teams = schedule.n_teams
+    slots = np.asarray(slots, dtype=int)
+    positions, width = roster_layout(slots, n_teams)
+
+    roster_ppg = np.zeros((n_teams, width), dtype=np.float32)
+    roster_ppg[slots, positions] = np.nan_to_num(np.asarray(ppg, dtype=np.float32))
+    roster_sd = roster_ppg / 5
+    roster_multipliers = np.zeros((n_teams, width), dtype=np.float32)
+    roster_multipliers[slots, positions] = multipliers
+    if quantiles is not None:
+        # offset of each roster position's sampling table, padding points at an all-zero table
+        tables = np.vstack([sampling_tables(quantiles), np.zeros((1, TABLE_SIZE), dtype=np.float32)])
+        roster_offsets = np.full((n_teams, width), len(slots) * TABLE_SIZE, dtype=np.int32)
+        roster_offsets[slots, positions] = np.arange(len(slots)) * TABLE_SIZE
+    if scores is not None:
+        roster_ppg[slots, positions] = tempo.split_mean
+        roster_sd[slots, positions] = tempo.split_sd
+        # a team's players share its seed multiplier, so it scales the team's points instead
+        team_multipliers = roster_multipliers.max(axis=1)
+
+    rounds = schedule.rounds
+    # scoring[r][j] is True when the team at position j of round r still has that game to play
+    # and it counts (play-in games don't), None when every game of the round does
+    scoring = []
+    for r, games in enumerate(rounds):
+        mask = schedule.counted_entrants[r]
+        if known is not None:
+            mask = mask & np.repeat(known[games] < 0, 2)
+        scoring.append(None if mask.all() else mask)
+    totals = np.empty((N, len(slots)), dtype=np.float32)
+    for start in range(0, N, chunk_size):
+        chunk = winners[start:start + chunk_size]
+        rows = np.arange(chunk.shape[0])[:, None]
+        team_totals = np.zeros((chunk.shape[0], n_teams, width), dtype=np.float32)
+        # the chunk's winners in the schedule's node layout, next to the team slots
+        nodes = np.concatenate([chunk, np.broadcast_to(np.arange(n_teams, dtype=chunk.dtype), (chunk.shape[0], n_teams))], axis=1)
+
+        for r in range(len(rounds)):
+            # both teams of every round r game, game by game
+            playing = nodes[:, schedule.round_entrants[r]]
+            if scores is not None:
+                # the points of round r's teams, in the same order as playing
+                team_points = scores[start:start + chunk_size, rounds[r]].reshape(chunk.shape[0], -1)
+            if scoring[r] is not None:
+                if not scoring[r].any():
+                    continue
+                playing = playing[:, scoring[r]]
+                if scores is not None:
+                    team_points = team_points[:, scoring[r]]
+
+            if scores is not None:
+                # the multiplier is applied to the team's points before they are split
+                pts = split_team_points(team_points * team_multipliers[playing], roster_ppg[playing], roster_sd[playing],
+                                        standard_normal(rng, playing.shape + (width,), antithetic))
+            else:
+                if quantiles is not None:
+                    pts = sample_tables(tables, roster_offsets[playing], uniform(rng, playing.shape + (width,), antithetic))
+                else:
+                    pts = standard_normal(rng, playing.shape + (width,), antithetic)
+                    pts *= roster_sd[playing]
+                    pts += roster_ppg[playing]
+                    np.maximum(pts, 0, out=pts)
+                pts *= roster_multipliers[playing]
+            count('player draws', pts.size)
+            team_totals[rows, playing] += pts
+
+        totals[start:start + chunk_size] = team_totals[:, slots, positions]
+
+    if actual is not None:
+        totals += np.asarray(actual, dtype=np.float32)
+    return totals
+
+def simulate_batch_part(win_probs, N, seed, slots, ppg, multipliers, known=None, actual=None, quantiles=None, tempo=None, updates=None, schedule=None, sampling=None):
+    '''
+    Simulates one share of a batch run with its own random generator, so it can run in a
+    worker process. Returns the winners and player totals (None when there are no players).
+    With tempo (see tempo_inputs) games are decided by simulated scores and player points are
+    split from them. With updates (see rating_updates) ratings move with the simulated results.
+    schedule is the compiled bracket (CompiledRatings.schedule), see simulate_batch. With a
+    sampling scheme (see variance_reduction) the games are played off uniforms of every game
+    slot drawn up front, common to every method for the same seed.
+    '''
+    rng = np.random.default_rng(seed)
+    if schedule is None:
+        schedule = balanced_schedule(win_probs.shape[0])
+    scores = None
+    uniforms = None
+    with stage('batch games'):
+        if sampling is not None:
+            uniforms = game_uniforms(schedule.n_games, N, rng, sampling, draws=3 if tempo is not None else 1)
+        if tempo is not None:
+            winners, scores = simulate_batch_tempo(tempo, N, rng, known, 0 if updates is None else updates.k, schedule, uniforms)
+        elif updates is not None:
+            winners = simulate_batch_updating(updates, N, rng, known, schedule, uniforms)
+        else:
+            winners = simulate_batch(win_probs, N, rng, known, schedule, uniforms)
+    n_games = winners.shape[1] if known is None else int((np.asarray(known) < 0).sum())
+    count('games', N * n_games)
+    count('game draws', N * n_games)
+    totals = None
+    if len(slots) > 0:
+        with stage('batch player totals'):
+            totals = simulate_player_totals(winners, slots, ppg, multipliers, rng, known=known, actual=actual,
+                                            quantiles=quantiles, scores=scores, tempo=tempo, schedule=schedule,
+                                            antithetic=sampling == 'antithetic')
+    return winners, totals
+
+def split_sims(N, workers):
+    '''
+    Number of simulations given to each worker, as even as possible.
+    '''
+    return [N // workers + (i < N % workers) for i in range(workers)]
+
+def split_blocks(N, block_size=BLOCK_SIZE):
+    '''
+    Sizes of the blocks N simulations are run in, block_size each but the last.
+    '''
+    return [min(block_size, N - start) for start in range(0, N, block_size)]
+
+def win_counts(winners, schedule=None):
+    '''
+    Number of games each team won in each simulation, as an (N, n_teams) array. schedule is
+    the compiled bracket, by default the 64-team layout (see simulate_batch).
+    '''
+    if schedule is None:
+        schedule = balanced_schedule(winners.shape[1] + 1)
+    N = winners.shape[0]
+    wins = np.zeros((N, schedule.n_teams), dtype=np.int8)
+    rows = np.arange(N)[:, None]
+    for cols in schedule.rounds:
+        # a team wins at most one game per round, so there are no repeated indices per row
+        wins[rows, winners[:, cols]] += 1
+    return wins
+
+def games_played(winners, schedule=None):
+    '''
+    Number of games each team played in each simulation, as an (N, n_teams) array: one more
+    than it won, except for the champion. Play-in games don't count.
+    '''
+    if schedule is None:
+        schedule = balanced_schedule(winners.shape[1] + 1)
+    played = win_counts(winners, schedule) + 1
+    played[np.arange(winners.shape[0]), winners[:, -1]] -= 1
+    # a play-in team played its play-in game whether it won it (and so counts a win) or not
+    played -= schedule.play_in_games
+    return played.astype(np.int8)
+
+def advancement_counts(winners, schedule=None):
+    '''
+    How many simulations each team won a game in each round, as an (n_teams, n_rounds) array.
+    '''
+    if schedule is None:
+        schedule = balanced_schedule(winners.shape[1] + 1)
+    counts = np.zeros((schedule.n_teams, len(schedule.rounds)), dtype=np.int64)
+    for r, cols in enumerate(schedule.rounds):
+        counts[:, r] = np.bincount(winners[:, cols].ravel(), minlength=schedule.n_teams)
+    return counts
+
+def champion_probs_from_winners(winners, teams):
+    '''
+    Champion probabilities keyed the same way as simulate_n_tournaments (str of the Team).
+    '''
+    champions = defaultdict(int)
+    counts = np.bincount(winners[:, -1], minlength=len(teams))
+    for slot in np.flatnonzero(counts):
+        champions[str(teams[slot])] += int(counts[slot])
+
+    N = winners.shape[0]
+    return {team: count / N for team, count in champions.items()}
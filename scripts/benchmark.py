@@ -0,0 +1,248 @@
+import os
+import re
+import gc
+import json
+import time
+import argparse
+import platform
+import tracemalloc
+from copy import deepcopy
+
+# keep progress bars out of the timings (read by tqdm when it is imported)
+os.environ.setdefault('TQDM_DISABLE', '1')
+
+import numpy as np
+import pandas as pd
+from batch_engine import bracket_teams, bracket_rosters
+from bracket import REGION_ORDER
+from compiled_ratings import CompiledRatings, RATING_UPDATE
+from region import Region
+from tournament import Tournament
+from simulate_game import wp_kenpom, wp_silver, handle_player_bookkeeping_for_team
+from adaptive import simulate_to_precision
+from simulate_tournament import simulate_n_tournaments
+from select_strategy import score_strategy
+from load_team_data import parse_silver_ratings
+from player_store import read_repr
+
+# Benchmarks of the simulator's hot paths on the data bundled with the repo, no network needed.
+# Run from scripts/: python benchmark.py [--quick] [--save-baseline]
+#
+# Throughput depends on the machine, so no baseline is committed: the first run without one
+# saves its results to BASELINE_PATH and later runs on that machine compare against them.
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'data')
+EXTRAS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'extras')
+BASELINE_PATH = os.path.join(DATA_DIR, 'benchmark_baseline.json')
+# First round seed pairings, top to bottom of a region
+SEED_ORDER = [1, 16, 8, 9, 5, 12, 4, 13, 6, 11, 3, 14, 7, 10, 2, 15]
+
+def read_seeded_kenpom(path):
+    '''
+    KenPom export as Team, Seed, NetRtg, ORtg, DRtg and AdjT. Exports taken after Selection
+    Sunday carry the seed in the team name ("Duke 1"); for earlier ones the top 64 teams are
+    seeded by rank.
+    '''
+    kenpom_df = pd.read_csv(path)
+    kenpom_df = kenpom_df[kenpom_df['Team'] != 'Team']
+    parts = kenpom_df['Team'].str.extract(r'^(.*?)(?: (\d{1,2})\*?)?$')
+    seeded = pd.DataFrame({
+        'Team': parts[0].values,
+        'Seed': pd.to_numeric(parts[1]).values,
+        'NetRtg': pd.to_numeric(kenpom_df['NetRtg'], errors='coerce').values,
+        # the value columns, each rank column after them gets a '.1' suffix from read_csv
+        **{column: pd.to_numeric(kenpom_df[column], errors='coerce').values for column in ['ORtg', 'DRtg', 'AdjT']},
+    })
+    if seeded['Seed'].isna().all():
+        top = seeded['NetRtg'].rank(ascending=False, method='first') <= 64
+        seeded.loc[top, 'Seed'] = (seeded.loc[top, 'NetRtg'].rank(ascending=False, method='first') - 1) // 4 + 1
+    return seeded
+
+def local_bracket(ratings_df):
+    '''
+    A 64-team bracket from a seeded ratings table: the best four teams on each seed line (which
+    drops the First Four losers) are dealt to the regions in S-curve order.
+    '''
+    regions = {region: {} for region in REGION_ORDER}
+    for seed in range(1, 17):
+        line = ratings_df[ratings_df['Seed'] == seed].nlargest(4, 'NetRtg')['Team'].tolist()
+        if len(line) != 4:
+            raise ValueError(f"Expected four {seed} seeds, found {len(line)}.")
+        order = REGION_ORDER if seed % 2 else REGION_ORDER[::-1]
+        for region, team in zip(order, line):
+            regions[region][seed] = team
+
+    return {
+        region: [{'team_1': {'name': teams[SEED_ORDER[2 * i]], 'seed': SEED_ORDER[2 * i], 'link': None},
+                  'team_2': {'name': teams[SEED_ORDER[2 * i + 1]], 'seed': SEED_ORDER[2 * i + 1], 'link': None},
+                  'location': 'TBD'} for i in range(8)]
+        for region, teams in regions.items()
+    }
+
+def load_fixtures():
+    '''
+    2024: KenPom bracket with the 2024 rosters from extras/player.json.
+    2025: the top 64 KenPom teams seeded by rank, rated by the Silver Bulletin ratings.
+    '''
+    kenpom_2024 = read_seeded_kenpom(os.path.join(DATA_DIR, 'kenpom_df(2).csv'))
+    matchups_2024 = local_bracket(kenpom_2024)
+    # the file is a Python repr rather than JSON
+    roster_source = read_repr(os.path.join(EXTRAS_DIR, 'player.json'))
+
+    # the object engine looks rosters up by the bracket's team names
+    teams = bracket_teams(matchups_2024)
+    players_2024 = {team.team_name: deepcopy(roster) for team, roster in zip(teams, bracket_rosters(teams, roster_source))}
+
+    kenpom_2025 = read_seeded_kenpom(os.path.join(DATA_DIR, 'kenpom2025.csv'))
+    matchups_2025 = local_bracket(kenpom_2025)
+    silver_df = parse_silver_ratings(os.path.join(DATA_DIR, 'silver.csv'))
+
+    return {
+        'matchups_2024': matchups_2024, 'players_2024': players_2024, 'kenpom_2024': kenpom_2024,
+        'matchups_2025': matchups_2025, 'silver_2025': silver_df,
+    }
+
+def time_call(fn, min_time=0.5, max_repeats=1000):
+    '''
+    Best wall-clock time of one call, repeating the call until min_time has been spent.
+    '''
+    best = float('inf')
+    spent = 0
+    for _ in range(max_repeats):
+        start = time.perf_counter()
+        fn()
+        elapsed = time.perf_counter() - start
+        best = min(best, elapsed)
+        spent += elapsed
+        if spent >= min_time:
+            break
+    return best
+
+def peak_memory(fn):
+    '''
+    Peak traced allocation (bytes) during one call, numpy arrays included.
+    '''
+    gc.collect()
+    tracemalloc.start()
+    try:
+        fn()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+def benchmark_cases(fixtures, quick=False):
+    '''
+    (name, callable, units per call, unit) for every benchmark.
+    '''
+    matchups, players, kenpom = fixtures['matchups_2024'], fixtures['players_2024'], fixtures['kenpom_2024']
+    teams = bracket_teams(matchups)
+    compiled = CompiledRatings(teams, kenpom, 'kenpom')
+    compiled_tempo = CompiledRatings(teams, kenpom, 'tempo')
+    teams_2025 = bracket_teams(fixtures['matchups_2025'])
+    silver = fixtures['silver_2025']
+    bookkeeping = deepcopy(players)
+    with_roster = next(team for team in teams if players[team.team_name])
+
+    np.random.seed(0)
+    object_sims = simulate_n_tournaments(matchups, players, compiled, 'kenpom', N=1000)[1]
+    batch_sims = simulate_n_tournaments(matchups, players, compiled, 'kenpom', N=100000, engine='batch', seed=0)[1]
+    top_means = np.argsort(-batch_sims.totals.mean(axis=0))[:15]
+    strategy = [batch_sims.players[col] for col in top_means]
+
+    def sim_region():
+        Region(matchups['east']).sim_region(compiled, bookkeeping, 'kenpom')
+
+    def sim_tournament():
+        Tournament.from_schedule(compiled.schedule, players).simulate_tournament(compiled, 'kenpom')
+
+    cases = [
+        ('wp_kenpom', lambda: wp_kenpom(teams[0], teams[1], kenpom), 1, 'lookups'),
+        ('wp_silver', lambda: wp_silver(teams_2025[0], teams_2025[1], silver), 1, 'lookups'),
+        ('CompiledRatings.win_prob', lambda: compiled.win_prob(teams[0], teams[1]), 1, 'lookups'),
+        ('handle_player_bookkeeping_for_team', lambda: handle_player_bookkeeping_for_team(bookkeeping, with_roster), 1, 'calls'),
+        ('Region.sim_region', sim_region, 1, 'regions'),
+        ('Tournament.simulate_tournament', sim_tournament, 1, 'sims'),
+        ('simulate_n_tournaments[object, N=1e3]', lambda: simulate_n_tournaments(matchups, players, compiled, 'kenpom', N=1000), 1000, 'sims'),
+        ('score_strategy[objects, N=1e3]', lambda: score_strategy(strategy, object_sims), 1000, 'sims'),
+        ('score_strategy[SimResults, N=1e5]', lambda: score_strategy(strategy, batch_sims), 100000, 'sims'),
+    ]
+
+    sizes = [10 ** 3, 10 ** 4, 10 ** 5] if quick else [10 ** 3, 10 ** 4, 10 ** 5, 10 ** 6]
+    for N in sizes:
+        # a million simulations of every player don't fit in memory, so that size is streamed
+        engine = 'batch' if N < 10 ** 6 else 'stream'
+        run = lambda N=N, engine=engine: simulate_n_tournaments(matchups, players, compiled, 'kenpom', N=N, engine=engine, seed=0)
+        cases.append((f'simulate_n_tournaments[{engine}, N=1e{len(str(N)) - 1}]', run, N, 'sims'))
+    cases.append(('simulate_n_tournaments[batch, tempo, N=1e5]', lambda: simulate_n_tournaments(matchups, players, compiled_tempo, 'tempo', N=10 ** 5, engine='batch', seed=0), 10 ** 5, 'sims'))
+    cases.append(('simulate_n_tournaments[batch, rating updates, N=1e5]', lambda: simulate_n_tournaments(matchups, players, compiled, 'kenpom', N=10 ** 5, engine='batch', seed=0, rating_update=RATING_UPDATE), 10 ** 5, 'sims'))
+    cases.append(('simulate_n_tournaments[batch, sobol, N=1e5]', lambda: simulate_n_tournaments(matchups, players, compiled, 'kenpom', N=10 ** 5, engine='batch', seed=0, sampling='sobol'), 10 ** 5, 'sims'))
+    cases.append(('simulate_to_precision[champion, tol=0.005]', lambda: simulate_to_precision(matchups, {}, compiled, 'kenpom', seed=0), 1, 'runs'))
+    cases.append(('simulate_n_tournaments[exact]', lambda: simulate_n_tournaments(matchups, players, kenpom, 'kenpom', engine='exact'), 1, 'runs'))
+
+    return cases
+
+def run_benchmarks(quick=False, name_filter=None, min_time=0.5):
+    '''
+    Times every benchmark and measures its peak memory.
+
+    Returns:
+        pd.DataFrame: name, seconds per call, throughput (units/sec), unit and peak MB.
+    '''
+    fixtures = load_fixtures()
+    records = []
+    for name, fn, units, unit in benchmark_cases(fixtures, quick):
+        if name_filter and not re.search(name_filter, name):
+            continue
+        seconds = time_call(fn, min_time)
+        # tracing slows pure-Python code a lot, so memory is measured in a separate call
+        peak = peak_memory(fn)
+        records.append({'name': name, 'seconds': seconds, 'throughput': units / seconds, 'unit': f'{unit}/s', 'peak_mb': peak / 2 ** 20})
+        print(f"{name:45s} {units / seconds:14,.1f} {unit}/s {peak / 2 ** 20:10.1f} MB")
+    return pd.DataFrame(records)
+
+def compare_to_baseline(results, baseline, threshold=0.8):
+    '''
+    Adds the baseline throughput and memory and flags benchmarks whose throughput fell below
+    threshold times the baseline's or whose peak memory grew by more than 1 / threshold (and
+    by more than a megabyte, so tiny allocations don't trip it).
+    '''
+    base = pd.DataFrame.from_dict(baseline['results'], orient='index')
+    results = results.join(base[['throughput', 'peak_mb']].add_prefix('baseline_'), on='name')
+    results['speedup'] = results['throughput'] / results['baseline_throughput']
+    results['memory_ratio'] = results['peak_mb'] / results['baseline_peak_mb']
+    memory_grew = (results['memory_ratio'] > 1 / threshold) & (results['peak_mb'] - results['baseline_peak_mb'] > 1)
+    results['regression'] = (results['speedup'] < threshold) | memory_grew
+    return results
+
+def save_baseline(results, path=BASELINE_PATH):
+    baseline = {
+        'machine': {'python': platform.python_version(), 'numpy': np.__version__, 'processor': platform.processor() or platform.machine()},
+        'created_at': time.strftime('%Y-%m-%d %H:%M:%S'),
+        'results': {row['name']: {'throughput': row['throughput'], 'peak_mb': row['peak_mb']} for _, row in results.iterrows()},
+    }
+    with open(path, 'w') as f:
+        json.dump(baseline, f, indent=2)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the simulator's hot paths on local data.")
+    parser.add_argument('--quick', action='store_true', help="skip the million-simulation run")
+    parser.add_argument('--filter', help="only run benchmarks whose name matches this regex")
+    parser.add_argument('--min-time', type=float, default=0.5, help="seconds to spend timing each benchmark")
+    parser.add_argument('--baseline', default=BASELINE_PATH, help="baseline JSON to compare against")
+    parser.add_argument('--save-baseline', action='store_true', help="store these results as the new baseline")
+    parser.add_argument('--threshold', type=float, default=0.8, help="throughput ratio below which a benchmark counts as a regression")
+    args = parser.parse_args()
+
+    results = run_benchmarks(args.quick, args.filter, args.min_time)
+    if args.save_baseline:
+        save_baseline(results, args.baseline)
+        print(f"Saved baseline to {args.baseline}")
+    elif not os.path.exists(args.baseline):
+        save_baseline(results, args.baseline)
+        print(f"No baseline at {args.baseline} yet, saved these results as the baseline: later runs compare against them")
+    else:
+        with open(args.baseline) as f:
+            compared = compare_to_baseline(results, json.load(f), args.threshold)
+        print(compared[['name', 'throughput', 'baseline_throughput', 'speedup', 'memory_ratio', 'regression']].to_string(index=False))
+        if compared['regression'].any():
+            raise SystemExit(f"Performance regression in: {', '.join(compared.loc[compared['regression'], 'name'])}")
@@ -0,0 +1,266 @@
+import numpy as np
+from team import Team
+
+# Bracket descriptions and the compiler that flattens them into a static game schedule.
+#
+# A description is a dict
+#
+#   {'regions': {'south': [matchup, ...], ...},
+#    'final_four': [['south', 'west'], ['east', 'midwest']],
+#    'first_four': [{'region': 'east', 'seed': 16, 'teams': [team, team]}, ...]}
+#
+# Each region lists its first round games top to bottom in read_unplayed_tournament's format
+# ({'team_1': team, 'team_2': team, 'location': ...} with team = {'name', 'seed', 'link'}), and
+# winners of adjacent games meet in the next round. 'final_four' nests the regions in pairs to
+# say whose champions meet (any number of regions, the default pairs them in the order given,
+# or as DEFAULT_FINAL_FOUR for the usual four). Every 'first_four' entry is a play-in game whose
+# winner takes the region's team of that seed named PLAY_IN_NAME (or named as one of the two
+# teams). An entry already played names its 'winner', who then takes the spot without a game.
+# read_unplayed_tournament's plain {region: [matchup, ...]} dict is a description too.
+#
+# compile_bracket turns a description into a Schedule: the teams in bracket slot order and each
+# game's two entrants, a team slot or an earlier game, as flat index arrays in round order.
+#
+# Play-in games are simulated like any other game, but they don't count for the players: no
+# points and no games played come from them (see Schedule.play_in).
+
+ROUND_NAMES = ["R64", "R32", "S16", "E8", "F4", "Championship"]
+DEFAULT_FINAL_FOUR = [['south', 'west'], ['east', 'midwest']]
+# Bracket slot order of the regions under the default Final Four
+REGION_ORDER = ["south", "west", "east", "midwest"]
+# Name the bracket page gives a first round team that is still to come out of a play-in game
+PLAY_IN_NAME = 'Play-In'
+# Winners are stored as int8 slot indices
+MAX_TEAMS = 127
+
+class PlayIn(tuple):
+    '''
+    The two teams of a play-in game, in place of the team it decides in a bracket tree.
+    '''
+
+class Schedule:
+    '''
+    A bracket flattened into its games in round order.
+
+    Every game's entrants are columns of the (..., n_games + n_teams) node layout: column g < n_games
+    holds the winner of game g and column n_games + s holds team slot s, so with the winners of
+    the earlier games filled in, left and right index both teams of every game. Games are
+    numbered by round (the final is always last), so a game's entrants always come earlier. The
+    leaves below each game are the contiguous slot range lo:hi, split at mid between its
+    entrants.
+
+    Attributes:
+        teams (list): Team objects in bracket slot order.
+        left, right (np.ndarray): (n_games,) node column of each game's first and second entrant.
+        round (np.ndarray): (n_games,) round of each game, counted up from the earliest.
+        rounds (list): Slice of the games in each round.
+        round_names (list): Name of each round.
+        lo, mid, hi (np.ndarray): (n_games,) slot range of each game and of its first entrant.
+        opponents (np.ndarray): (n_rounds, n_teams, n_teams) whether two slots would meet in
+            each round.
+        play_in (np.ndarray): (n_games,) whether each game is a play-in game, which players
+            score no points in and which doesn't count as a game played.
+        play_in_games (np.ndarray): (n_teams,) play-in games each slot plays.
+        counted_entrants (list): For each round, whether each of round_entrants is playing a
+            counted (not play-in) game.
+    '''
+    def __init__(self, tree, round_names=None):
+        self.teams = []
+        games = []
+
+        def visit(node, depth):
+            # returns the node's slot range and ('team', slot) or ('game', postorder index)
+            if not isinstance(node, tuple):
+                self.teams.append(node)
+                slot = len(self.teams) - 1
+                return slot, slot + 1, ('team', slot)
+            lo, mid, left = visit(node[0], depth + 1)
+            _, hi, right = visit(node[1], depth + 1)
+            games.append((depth, left, right, lo, mid, hi, isinstance(node, PlayIn)))
+            return lo, hi, ('game', len(games) - 1)
+
+        visit(tree, 0)
+        self.n_teams = len(self.teams)
+        self.n_games = len(games)
+        if self.n_teams > MAX_TEAMS:
+            raise ValueError(f"Brackets are limited to {MAX_TEAMS} teams, found {self.n_teams}.")
+
+        # the deepest games are the first round; postorder keeps each round left to right
+        max_depth = max((game[0] for game in games), default=0)
+        order = sorted(range(self.n_games), key=lambda g: (max_depth - games[g][0], g))
+        position = np.empty(self.n_games, dtype=np.intp)
+        position[order] = np.arange(self.n_games)
+
+        def column(ref):
+            kind, index = ref
+            return position[index] if kind == 'game' else self.n_games + index
+
+        self.left = np.array([column(games[g][1]) for g in order], dtype=np.intp)
+        self.right = np.array([column(games[g][2]) for g in order], dtype=np.intp)
+        self.round = np.array([max_depth - games[g][0] for g in order], dtype=np.intp)
+        self.lo, self.mid, self.hi = (np.array([games[g][k] for g in order], dtype=np.intp) for k in (3, 4, 5))
+        self.play_in = np.array([games[g][6] for g in order], dtype=bool)
+        # the teams of a play-in game are leaves, so both of them play it
+        self.play_in_games = np.zeros(self.n_teams, dtype=np.int8)
+        for lo, hi in zip(self.lo[self.play_in], self.hi[self.play_in]):
+            self.play_in_games[lo:hi] += 1
+
+        n_rounds = int(self.round[-1]) + 1 if self.n_games else 0
+        bounds = np.searchsorted(self.round, np.arange(n_rounds + 1))
+        self.rounds = [slice(int(bounds[r]), int(bounds[r + 1])) for r in range(n_rounds)]
+        self.round_names = list(round_names) if round_names is not None else default_round_names(n_rounds)
+        # opponents[r, a, b] is True when slots a and b would meet in a round r game
+        self.opponents = np.zeros((n_rounds, self.n_teams, self.n_teams), dtype=bool)
+        for lo, mid, hi, r in zip(self.lo, self.mid, self.hi, self.round):
+            self.opponents[r, lo:mid, mid:hi] = True
+            self.opponents[r, mid:hi, lo:mid] = True
+        # both entrants of each round's games, interleaved game by game
+        self.round_entrants = [np.column_stack([self.left[games], self.right[games]]).ravel() for games in self.rounds]
+        self.counted_entrants = [np.repeat(~self.play_in[games], 2) for games in self.rounds]
+        # plain lists for the object engine's game loop
+        self.pairs = list(zip(self.left.tolist(), self.right.tolist()))
+
+    def __len__(self):
+        return self.n_games
+
+    def node_array(self, N, dtype=np.int8):
+        '''
+        (n_games + n_teams, N) array in the node layout with the team slots filled in, for the
+        batch engines to write each round's winners into. Nodes are rows so that gathering a
+        round's entrants copies whole rows.
+        '''
+        nodes = np.empty((self.n_games + self.n_teams, N), dtype=dtype)
+        nodes[self.n_games:] = np.arange(self.n_teams, dtype=dtype)[:, None]
+        return nodes
+
+    def entrants(self, winners):
+        '''
+        Slots of both teams in every game, from the winners of the games.
+
+        Args:
+            winners (np.ndarray): (..., n_games) winning slot of every game (-1 if undecided).
+
+        Returns:
+            team1, team2 (np.ndarray): (..., n_games) slots (-1 when an entrant is undecided).
+        '''
+        winners = np.asarray(winners)
+        slots = np.broadcast_to(np.arange(self.n_teams, dtype=winners.dtype), winners.shape[:-1] + (self.n_teams,))
+        nodes = np.concatenate([winners, slots], axis=-1)
+        return nodes[..., self.left], nodes[..., self.right]
+
+def default_round_names(n_rounds):
+    if n_rounds <= len(ROUND_NAMES):
+        return ROUND_NAMES[:n_rounds]
+    extra = n_rounds - len(ROUND_NAMES)
+    return (['First Four'] if extra == 1 else [f'Play-in {r + 1}' for r in range(extra)]) + ROUND_NAMES
+
+def make_team(team):
+    return Team(team['name'], team['seed'], team.get('link'))
+
+def pair_up(nodes):
+    '''
+    Tree in which adjacent nodes meet, then adjacent winners and so on. With an odd count the
+    last node waits for the next round.
+    '''
+    nodes = list(nodes)
+    if not nodes:
+        raise ValueError("Cannot build a bracket without teams.")
+    while len(nodes) > 1:
+        paired = [(nodes[i], nodes[i + 1]) for i in range(0, len(nodes) - 1, 2)]
+        if len(nodes) % 2:
+            paired.append(nodes[-1])
+        nodes = paired
+    return nodes[0]
+
+def normalize(description):
+    '''
+    (regions, final_four, first_four) of a description, filling in the defaults.
+    '''
+    regions = description['regions'] if 'regions' in description else description
+    final_four = description.get('final_four') if 'regions' in description else None
+    if final_four is None:
+        final_four = DEFAULT_FINAL_FOUR if set(regions) == set(REGION_ORDER) else list(regions)
+    first_four = description.get('first_four', []) if 'regions' in description else []
+    return regions, final_four, first_four
+
+def description_teams(description):
+    '''
+    Every team dict in a description, play-in teams included (placeholders are not skipped).
+    Of a play-in game already played only the winner is left.
+    '''
+    regions, _, first_four = normalize(description)
+    for matchups in regions.values():
+        for matchup in matchups:
+            yield matchup['team_1']
+            yield matchup['team_2']
+    for play_in in first_four:
+        yield from play_in_teams(play_in)
+
+def play_in_teams(play_in):
+    '''
+    The team dicts of a first_four entry still in the bracket: both teams, or the winner once
+    the game has been played.
+    '''
+    if play_in.get('winner') is None:
+        return list(play_in['teams'])
+    winners = [team for team in play_in['teams'] if team['name'] == play_in['winner']]
+    if not winners:
+        raise ValueError(f"The play-in winner {play_in['winner']} isn't one of its teams.")
+    return winners
+
+def region_tree(name, matchups, play_ins):
+    '''
+    A region's game tree, with its play-in games in place of the teams they decide.
+    '''
+    entrants = [[make_team(matchup['team_1']), make_team(matchup['team_2'])] for matchup in matchups]
+    for play_in in play_ins:
+        names = {PLAY_IN_NAME} | {team['name'] for team in play_in['teams']}
+        spots = [(i, j) for i, pair in enumerate(entrants) for j, team in enumerate(pair)
+                 if isinstance(team, Team) and team.seed == int(play_in['seed']) and team.team_name in names]
+        if not spots:
+            raise ValueError(f"No {play_in['seed']} seed for the play-in game in the {name} region.")
+        i, j = spots[0]
+        teams = [make_team(dict(team, seed=team.get('seed', play_in['seed']))) for team in play_in_teams(play_in)]
+        entrants[i][j] = PlayIn(teams) if len(teams) > 1 else teams[0]
+
+    placeholders = [team for pair in entrants for team in pair if isinstance(team, Team) and team.team_name == PLAY_IN_NAME]
+    if placeholders:
+        raise ValueError(f"The {name} region has {len(placeholders)} play-in placeholder(s) without a first_four entry.")
+    return pair_up([tuple(pair) for pair in entrants])
+
+def compile_bracket(description, round_names=None):
+    '''
+    Compiles a bracket description (see the top of this module) into a Schedule.
+    '''
+    if isinstance(description, Schedule):
+        return description
+    regions, final_four, first_four = normalize(description)
+    unknown = {play_in['region'] for play_in in first_four} - set(regions)
+    if unknown:
+        raise ValueError(f"Play-in games in unknown regions: {', '.join(sorted(unknown))}")
+
+    used = []
+
+    def build(node):
+        if isinstance(node, str):
+            if node not in regions:
+                raise ValueError(f"Unknown region in the Final Four pairings: {node}")
+            used.append(node)
+            return region_tree(node, regions[node], [p for p in first_four if p['region'] == node])
+        return pair_up([build(child) for child in node])
+
+    tree = build(final_four)
+    if sorted(used) != sorted(regions):
+        raise ValueError("The Final Four pairings must name every region exactly once.")
+    if round_names is None and 'regions' in description:
+        round_names = description.get('round_names')
+    return Schedule(tree, round_names)
+
+def balanced_schedule(teams):
+    '''
+    Schedule of teams in bracket slot order where adjacent slots meet, then adjacent winners and
+    so on, the layout of a bracket without play-in games. teams may also be a team count.
+    '''
+    if isinstance(teams, (int, np.integer)):
+        teams = list(range(teams))
+    return Schedule(pair_up(teams))
@@ -0,0 +1,147 @@
+import os
+import json
+import argparse
+from datetime import date, timedelta
+import pandas as pd
+from bs4 import BeautifulSoup
+from fetch import fetch, TTL_PAST_SEASON
+from fetch_scheduler import RateLimitedFetcher
+from load_team_data import PRE_TOURNAMENT_DIR
+
+# Builds the pre-tournament KenPom snapshots the backtest simulates from (see
+# load_team_data.pre_tournament_kenpom). kenpom.com only serves a past season's final ratings,
+# which have seen the tournament, so each snapshot is taken from the Wayback Machine's last
+# capture of the kenpom.com front page before that year's tournament started. The capture
+# listings and pages go through the page cache, so a rerun fetches nothing.
+# Run from scripts/: python build_pre_tournament.py [years ...] [--refresh]
+
+WAYBACK_URL = "https://web.archive.org"
+# Pages whose captures show the current season's ratings table
+KENPOM_PAGES = ['kenpom.com/', 'kenpom.com/index.php']
+# Selection Sunday of every tournament. No tournament game is played before the Tuesday after,
+# so captures up to the end of the Monday are pre-tournament.
+SELECTION_SUNDAY = {
+    2008: date(2008, 3, 16), 2009: date(2009, 3, 15), 2010: date(2010, 3, 14), 2011: date(2011, 3, 13),
+    2012: date(2012, 3, 11), 2013: date(2013, 3, 17), 2014: date(2014, 3, 16), 2015: date(2015, 3, 15),
+    2016: date(2016, 3, 13), 2017: date(2017, 3, 12), 2018: date(2018, 3, 11), 2019: date(2019, 3, 17),
+    2021: date(2021, 3, 14), 2022: date(2022, 3, 13), 2023: date(2023, 3, 12), 2024: date(2024, 3, 17),
+    2025: date(2025, 3, 16),
+}
+# Requests per second to the Wayback Machine
+WAYBACK_RATE = 15 / 60
+# Header names of the kept columns in every layout of the table since 2008 (the margin column
+# was Pyth, then AdjEM, then NetRtg, so NetRtg is recomputed as ORtg - DRtg)
+COLUMNS = {'Team': ['Team'], 'ORtg': ['ORtg', 'AdjO'], 'DRtg': ['DRtg', 'AdjD'], 'AdjT': ['AdjT']}
+
+def capture_cutoff(year):
+    '''
+    Last day (YYYYMMDD) whose captures are taken before the year's tournament started.
+    '''
+    return (SELECTION_SUNDAY[year] + timedelta(days=1)).strftime('%Y%m%d')
+
+def list_captures(year, getter=None):
+    '''
+    (timestamp, url) of every capture of the KenPom front page in the year before its
+    tournament, newest first.
+    '''
+    captures = []
+    for page in KENPOM_PAGES:
+        url = f"{WAYBACK_URL}/cdx/search/cdx?url={page}&from={year}0101&to={capture_cutoff(year)}&filter=statuscode:200&output=json"
+        rows = json.loads(fetch(url, ttl=TTL_PAST_SEASON, getter=getter) or '[]')
+        # the first row holds the field names
+        fields = rows[0] if rows else []
+        captures += [(row[fields.index('timestamp')], row[fields.index('original')]) for row in rows[1:]]
+    return sorted(captures, reverse=True)
+
+def ratings_columns(table):
+    '''
+    Body cell index of each of COLUMNS in a table, from its last leading header row, or None if
+    the table doesn't have them all.
+    '''
+    header = None
+    for row in table.find_all('tr'):
+        if row.find('td') is not None:
+            break
+        header = row
+    if header is None:
+        return None
+
+    positions = {}
+    column = 0
+    for cell in header.find_all(['th', 'td']):
+        positions.setdefault(cell.get_text(strip=True), column)
+        column += int(cell.get('colspan', 1))
+    index = {name: next((positions[h] for h in headers if h in positions), None) for name, headers in COLUMNS.items()}
+    return None if None in index.values() else index
+
+def parse_kenpom_page(html_content):
+    '''
+    The ratings table of a KenPom front page (any layout since 2008) as Team, NetRtg, ORtg,
+    DRtg and AdjT, in the format load_team_data.pre_tournament_kenpom reads. Raises a ValueError
+    when the page has no ratings table (e.g. a captured error or login page).
+    '''
+    soup = BeautifulSoup(html_content, 'html.parser')
+    tables = [soup.find('table', id='ratings-table')] + soup.find_all('table')
+    for table in filter(None, tables):
+        index = ratings_columns(table)
+        if index is not None:
+            break
+    else:
+        raise ValueError("No KenPom ratings table on the page.")
+
+    rows = []
+    for row in table.find_all('tr'):
+        cells = row.find_all('td')
+        # repeated header rows have no data cells
+        if len(cells) <= max(index.values()):
+            continue
+        # the seed follows the team's link after Selection Sunday
+        team = cells[index['Team']].find('a') or cells[index['Team']]
+        rows.append({'Team': team.get_text(strip=True),
+                     **{name: pd.to_numeric(cells[index[name]].get_text(strip=True), errors='coerce') for name in ['ORtg', 'DRtg', 'AdjT']}})
+
+    ratings = pd.DataFrame(rows, columns=['Team', 'ORtg', 'DRtg', 'AdjT'])
+    ratings.insert(1, 'NetRtg', (ratings['ORtg'] - ratings['DRtg']).round(2))
+    return ratings
+
+def build_snapshot(year, getter=None, directory=PRE_TOURNAMENT_DIR):
+    '''
+    Writes directory/kenpom_<year>.csv from the newest pre-tournament capture that holds a
+    ratings table.
+
+    Returns:
+        str: The snapshot's path.
+
+    Raises:
+        FileNotFoundError: No capture before the tournament has the ratings.
+    '''
+    for timestamp, original in list_captures(year, getter):
+        try:
+            ratings = parse_kenpom_page(fetch(f"{WAYBACK_URL}/web/{timestamp}id_/{original}", ttl=TTL_PAST_SEASON, getter=getter))
+        except ValueError:
+            continue
+        os.makedirs(directory, exist_ok=True)
+        path = os.path.join(directory, f'kenpom_{year}.csv')
+        ratings.to_csv(path, index=False)
+        print(f"{year}: {len(ratings)} teams from the capture of {original} at {timestamp}.")
+        return path
+    raise FileNotFoundError(f"No capture of the KenPom ratings before the {year} tournament.")
+
+def main():
+    parser = argparse.ArgumentParser(description="Build pre-tournament KenPom snapshots for the backtest.")
+    parser.add_argument('years', nargs='*', type=int, help="Tournaments to build, every year without a snapshot by default.")
+    parser.add_argument('--refresh', action='store_true', help="Rebuild snapshots that already exist.")
+    args = parser.parse_args()
+
+    years = args.years or list(SELECTION_SUNDAY)
+    if not args.refresh:
+        years = [year for year in years if not os.path.exists(os.path.join(PRE_TOURNAMENT_DIR, f'kenpom_{year}.csv'))]
+    fetcher = RateLimitedFetcher(rate=WAYBACK_RATE)
+    for year in years:
+        try:
+            build_snapshot(year, fetcher.get)
+        except FileNotFoundError as error:
+            print(error)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,199 @@
+import os
+import json
+import numpy as np
+import pandas as pd
+from team_registry import team_registry
+from player_distributions import N_QUANTILES, stats_quantiles, has_gamelog
+
+# Columnar on-disk format for player and ratings data: a directory holding one .npy file per
+# column plus a columns.json listing them. Strings are stored as fixed-width unicode so every
+# column, names included, can be memory-mapped. Worker processes that open the same bundle
+# share the OS page cache instead of each unpickling their own copy.
+
+BUNDLE_DIR = os.environ.get('MM_BUNDLE_DIR', os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'data', 'bundles'))
+
+def write_columns(path, columns):
+    '''
+    Writes a dict of arrays as a bundle. The manifest is written last, so a bundle that
+    was interrupted mid-write is never picked up by read_columns.
+    '''
+    os.makedirs(path, exist_ok=True)
+    manifest = os.path.join(path, 'columns.json')
+    if os.path.exists(manifest):
+        os.remove(manifest)
+    for name, values in columns.items():
+        np.save(os.path.join(path, f'{name}.npy'), np.asarray(values))
+    with open(manifest, 'w') as f:
+        json.dump(list(columns), f)
+
+def read_columns(path, mmap=True):
+    with open(os.path.join(path, 'columns.json')) as f:
+        names = json.load(f)
+    return {name: np.load(os.path.join(path, f'{name}.npy'), mmap_mode='r' if mmap else None) for name in names}
+
+def text_column(values):
+    # fixed-width unicode instead of object dtype, which np.load can't memory-map
+    return np.array([str(value) for value in values], dtype=str) if len(values) else np.array([], dtype='<U1')
+
+class Bundle:
+    '''
+    Columns loaded from (or to be written to) a bundle directory. Pickles as its path when it
+    has one, so handing it to a process pool doesn't copy the data.
+    '''
+    def __init__(self, columns, path=None):
+        self.columns = columns
+        self.path = os.path.abspath(path) if path else None
+
+    @classmethod
+    def load(cls, path, mmap=True):
+        return cls(read_columns(path, mmap), path)
+
+    def save(self, path):
+        write_columns(path, self.columns)
+        self.path = os.path.abspath(path)
+        return self
+
+    def __getitem__(self, name):
+        return self.columns[name]
+
+    def __reduce__(self):
+        if self.path is None:
+            return (type(self), (self.columns,))
+        return (type(self).load, (self.path,))
+
+class PlayerBundle(Bundle):
+    '''
+    Every player of a season, keyed by integer team and player IDs (the team ID here is the
+    row in team_names, not the registry's ID, which is only fixed within a process).
+
+    Columns:
+        team_names (T,): Team name of each team ID.
+        team_id (P,): Team ID of each player, players sorted by team ID.
+        player_names (P,): Player name (the player ID is the row).
+        ppg (P,): Points per game (NaN if missing).
+        ground_truth_total (P,): Actual tournament points (NaN if not played yet), and any other
+            numeric per-player stats found in the dict.
+        pts_quantiles (P, N_QUANTILES): Per-game points quantile tables, only when some player
+            has a gamelog (see player_distributions).
+    '''
+    @classmethod
+    def from_dict(cls, player_data):
+        '''
+        Builds a bundle from the nested {team: {player: stats}} dict of load_player_data.
+        '''
+        team_names = sorted(player_data)
+        team_id, player_names, stats = [], [], []
+        for t, team in enumerate(team_names):
+            for player, player_stats in player_data[team].items():
+                # skip stray team-level entries such as 'ground_truth_total'
+                if isinstance(player_stats, dict):
+                    team_id.append(t)
+                    player_names.append(player)
+                    stats.append(player_stats)
+
+        columns = {
+            'team_names': text_column(team_names),
+            'team_id': np.array(team_id, dtype=np.int32),
+            'player_names': text_column(player_names),
+        }
+        numeric = sorted({key for s in stats for key, value in s.items()
+                          if key != 'running_total_simulated' and isinstance(value, (int, float, np.number))})
+        for key in ['ppg'] + [key for key in numeric if key != 'ppg']:
+            columns[key] = np.array([s.get(key, np.nan) for s in stats], dtype=np.float64)
+        if any(has_gamelog(s) for s in stats):
+            columns['pts_quantiles'] = np.array([stats_quantiles(s) for s in stats], dtype=np.float32).reshape(len(stats), N_QUANTILES)
+        return cls(columns)
+
+    def __len__(self):
+        return len(self['team_id'])
+
+    def team_rows(self, team_names):
+        '''
+        Row in team_names of each team (matched through the team registry), -1 for teams
+        with no players in the bundle. Raises a KeyError listing every name the registry can't
+        resolve, on either side.
+        '''
+        registry = team_registry()
+        row_by_id = {team_id: row for row, team_id in enumerate(registry.ids(self['team_names'], 'roster team').tolist())}
+        return np.array([row_by_id.get(team_id, -1) for team_id in registry.ids(team_names, 'bracket team').tolist()], dtype=int)
+
+    def bracket_rows(self, teams):
+        '''
+        Rows of the bracket's players, ordered by bracket slot, and each one's slot.
+        '''
+        slot_of_team = np.full(len(self['team_names']), -1)
+        rows = self.team_rows([team.team_name for team in teams])
+        slot_of_team[rows[rows >= 0]] = np.flatnonzero(rows >= 0)
+
+        player_slots = slot_of_team[self['team_id']]
+        rows = np.flatnonzero(player_slots >= 0)
+        rows = rows[np.argsort(player_slots[rows], kind='stable')]
+        return rows, player_slots[rows]
+
+    def inputs(self, teams):
+        '''
+        The batch engine's per-player arrays for a bracket, see batch_engine.player_inputs.
+        '''
+        rows, slots = self.bracket_rows(teams)
+
+        players = [(int(slot), teams[slot].team_name, str(name)) for slot, name in zip(slots, self['player_names'][rows])]
+        team_multipliers = np.array([team.get_multiplier() for team in teams])
+        return players, slots, np.asarray(self['ppg'][rows]), team_multipliers[slots]
+
+    def quantiles(self, teams):
+        '''
+        The bracket players' quantile tables, see batch_engine.player_quantiles.
+        '''
+        if 'pts_quantiles' not in self.columns:
+            return None
+        rows, _ = self.bracket_rows(teams)
+        return np.asarray(self['pts_quantiles'][rows])
+
+    def to_dict(self):
+        '''
+        The nested {team: {player: stats}} dict, for the object engine.
+        '''
+        stat_columns = [name for name in self.columns if name not in ('team_names', 'team_id', 'player_names') and self[name].ndim == 1]
+        player_data = {str(team): {} for team in self['team_names']}
+        for row, (t, player) in enumerate(zip(self['team_id'], self['player_names'])):
+            stats = {'ppg': float(self['ppg'][row]), 'running_total_simulated': 0}
+            if 'pts_quantiles' in self.columns:
+                stats['pts_quantiles'] = np.array(self['pts_quantiles'][row])
+            for name in stat_columns:
+                value = float(self[name][row])
+                if name != 'ppg' and not np.isnan(value):
+                    stats[name] = value
+            player_data[str(self['team_names'][t])][str(player)] = stats
+        return player_data
+
+class RatingsBundle(Bundle):
+    '''
+    A ratings table (the Team column plus numeric rating columns) that CompiledRatings can
+    take in place of a DataFrame.
+    '''
+    @classmethod
+    def from_frame(cls, ratings_df):
+        columns = {'Team': text_column(ratings_df['Team'])}
+        for name in ratings_df.columns:
+            values = pd.to_numeric(ratings_df[name], errors='coerce')
+            if name != 'Team' and values.notna().any():
+                columns[name] = values.to_numpy(dtype=np.float64)
+        return cls(columns)
+
+    def to_frame(self):
+        return pd.DataFrame({name: np.asarray(values) for name, values in self.columns.items()})
+
+def cached_bundle(cls, name, build, refresh=False):
+    '''
+    Loads bundle BUNDLE_DIR/name, first building it with build() if it doesn't exist yet.
+
+    Args:
+        cls: PlayerBundle or RatingsBundle.
+        build (callable): Returns the source data (player dict or ratings DataFrame).
+    '''
+    path = os.path.join(BUNDLE_DIR, name)
+    if refresh or not os.path.exists(os.path.join(path, 'columns.json')):
+        data = build()
+        bundle = cls.from_dict(data) if cls is PlayerBundle else cls.from_frame(data)
+        bundle.save(path)
+    return cls.load(path)
@@ -0,0 +1,118 @@
+import copy
+import weakref
+import numpy as np
+from scipy.stats import norm
+from team_registry import team_registry
+from bracket import balanced_schedule
+from instrument import count
+from tempo_model import TEMPO_COLUMNS, game_expectations, tempo_win_prob
+
+RATING_COLUMNS = {'kenpom': 'NetRtg', 'silver': 'Quasi-Sagarin'}
+# Suggested gain for in-simulation rating updates: the Kalman gain of a margin with sd 11 for
+# ratings known to within about 4 points, tau^2 / (2 tau^2 + sd^2)
+RATING_UPDATE = 0.1
+METHODS = list(RATING_COLUMNS) + ['tempo']
+# Team ID -> row index of every ratings table looked up so far, by id() of the table and dropped
+# with it, so a table's names are resolved once however many games read it (see team_rows)
+_TEAM_ROWS = {}
+
+def team_rows(ratings_df):
+    '''
+    Row of each team ID in a ratings table (the first row when a team has several), built the
+    first time the table is looked up. Tables are taken to be left as they are afterwards.
+    '''
+    key = id(ratings_df)
+    rows = _TEAM_ROWS.get(key)
+    if rows is None:
+        registry = team_registry()
+        rows = {}
+        for row, name in enumerate(np.asarray(ratings_df['Team'])):
+            team_id = registry.resolve(str(name))
+            if team_id is not None:
+                rows.setdefault(team_id, row)
+        _TEAM_ROWS[key] = rows
+        weakref.finalize(ratings_df, _TEAM_ROWS.pop, key, None)
+    return rows
+
+class CompiledRatings:
+    '''
+    Ratings for a fixed set of bracket teams, resolved once, with a dense win-probability matrix.
+
+    Can be passed anywhere a ratings_df is expected by simulate_game, in which case the
+    per-game DataFrame lookups are replaced by a single matrix read. ratings_df can be a
+    DataFrame or a RatingsBundle.
+
+    With method='tempo' the KenPom ORtg, DRtg and AdjT columns are compiled into the expected
+    possessions and points per possession of every pairing (see tempo_model), and the win
+    probabilities follow from the score model.
+
+    updating() gives a per-tournament copy whose ratings move with the simulated results.
+
+    schedule is the compiled bracket the teams are in (see bracket.compile_bracket), by default
+    the layout in which adjacent slots meet.
+    '''
+    def __init__(self, teams, ratings_df, method, sd=11, schedule=None):
+        if method not in METHODS:
+            raise ValueError("Method must be one of 'kenpom', 'silver' or 'tempo'.")
+
+        self.teams = list(teams)
+        self.schedule = schedule if schedule is not None else balanced_schedule(self.teams)
+        self.method = method
+        self.sd = sd
+        self.index = {team.team_name: i for i, team in enumerate(self.teams)}
+        # every bracket team must resolve, a misspelled one is reported before anything is looked up
+        self.team_ids = team_registry().ids([team.team_name for team in self.teams], 'bracket team')
+        # rating changes from games simulated so far, only set on updating() copies
+        self.shift = None
+        self.update_k = 0
+
+        if method == 'tempo':
+            ortg, drtg, tempo = (self.resolve_ratings(self.team_ids, ratings_df, method, column) for column in TEMPO_COLUMNS)
+            # Division I averages over the whole ratings table, not just the bracket
+            avg_efficiency, avg_tempo = (np.nanmean(np.asarray(ratings_df[column], dtype=float)) for column in ('ORtg', 'AdjT'))
+            self.ratings = ortg - drtg
+            self.possessions, self.ppp = game_expectations(ortg, drtg, tempo, avg_efficiency, avg_tempo)
+            # each team's points noise, so margins keep the standard deviation sd
+            self.points_sd = sd / np.sqrt(2)
+            self.wp = tempo_win_prob(self.possessions, self.ppp, self.points_sd)
+        else:
+            self.ratings = self.resolve_ratings(self.team_ids, ratings_df, method)
+            # wp[i, j] is the probability that teams[i] beats teams[j]
+            self.wp = norm.cdf((self.ratings[:, None] - self.ratings[None, :]) / sd)
+
+    @staticmethod
+    def resolve_ratings(team_ids, ratings_df, method, column=None):
+        '''
+        Looks up each team's rating by team ID, so the ratings source can spell names its own way.
+        The table's names are only resolved the first time it is looked up (see team_rows).
+        Raises a KeyError listing every team that could not be resolved.
+
+        Args:
+            column (str): Ratings column to read, the method's rating column by default.
+        '''
+        rows = team_rows(ratings_df)
+        missing = [team_registry().name(team_id) for team_id in team_ids if team_id not in rows]
+        if missing:
+            raise KeyError(f"No {method} rating found for: {', '.join(missing)}")
+
+        ratings = np.asarray(ratings_df[column or RATING_COLUMNS[method]])
+        return np.array([float(ratings[rows[team_id]]) for team_id in team_ids])
+
+    def updating(self, k=RATING_UPDATE):
+        '''
+        Copy for one simulated tournament in which every game moves both teams' ratings: by k
+        times the margin's deviation from its expectation, up for the team that beat it and
+        down for the other (see simulate_game). The compiled matrices are shared, the only new
+        state is an (n_teams,) array of rating shifts.
+        '''
+        state = copy.copy(self)
+        state.update_k = k
+        state.shift = np.zeros(len(self.teams))
+        return state
+
+    def win_prob(self, team1, team2):
+        '''
+        Probability that team1 beats team2.
+        '''
+        count('rating lookups')
+        return self.wp[self.index[team1.team_name], self.index[team2.team_name]]
@@ -137,7 +137,11 @@ ESPN_TO_PP_MAP = {
     "San Diego State Aztecs": "San Diego St.",
     "St. Francis (PA) Red Flash": "St. Fran.-Pa.",
     "American University Eagles": "American",
-    "Texas Longhorns": "Texas"
+    "Texas Longhorns": "Texas",
+    # past tournament teams in notebooks/bk_df.csv whose name without the mascot is ambiguous or unknown
+    "Miami Hurricanes": "Miami (FL)",
+    "Loyola Maryland Greyhounds": "Loyola (MD)",
+    "UAlbany Great Danes": "Albany (NY)"
 }
 
 PP_TO_SILVER_MAP = {
@@ -316,6 +320,7 @@ sr_to_kenpom = {
     'SIU-Edwardsville': 'SIU Edwardsville',
     'McNeese State': 'McNeese St.',
     'Utah State': 'Utah St.',
+    'Omaha': 'Nebraska Omaha',
     
 }
 
@@ -0,0 +1,117 @@
+import numpy as np
+import pandas as pd
+from scipy import sparse
+from select_strategy import strategies_to_selection
+from columnar import PlayerBundle
+from batch_engine import bracket_rosters
+
+def ppg_weights(sims, players_dict):
+    '''
+    Per-player popularity weights proportional to points per game. Rosters are matched to the
+    bracket teams by team ID (see batch_engine.bracket_rosters), so players_dict may spell team
+    names differently from the bracket.
+    '''
+    if isinstance(players_dict, PlayerBundle):
+        players_dict = players_dict.to_dict()
+    rosters = bracket_rosters(sims.teams, players_dict)
+    ppg = [rosters[slot][player]['ppg'] for slot, (_, player) in zip(sims.player_slots, sims.players)]
+    return np.nan_to_num(np.array(ppg, dtype=float))
+
+def generate_field(sims, n_entries, weights='mean', power=1.0, size=15, rng=None):
+    '''
+    Samples a field of opponent lineups, each `size` distinct players drawn with probability
+    proportional to weights ** power (Gumbel top-k sampling, so the whole field is one draw).
+
+    Args:
+        sims (SimResults): Simulation results the player columns refer to
+        n_entries (int): Number of opposing entries
+        weights (str or np.ndarray): 'mean' for expected simulated points, or per-player
+            popularity weights (e.g. ppg_weights) in the order of sims.players
+        power (float): Sharpens (> 1) or flattens (< 1) the weights
+        size (int): Players per lineup
+
+    Returns:
+        field (np.ndarray): (n_entries, size) player column indices
+    '''
+    if rng is None:
+        rng = np.random.default_rng()
+    if isinstance(weights, str):
+        if weights != 'mean':
+            raise ValueError("Weights must be 'mean' or an array of per-player weights.")
+        weights = sims.totals.mean(axis=0, dtype=np.float64)
+
+    with np.errstate(divide='ignore'):
+        log_weights = power * np.log(np.maximum(np.asarray(weights, dtype=float), 0))
+    keys = log_weights + rng.gumbel(size=(n_entries, len(log_weights)))
+    return np.argpartition(-keys, size - 1, axis=1)[:, :size]
+
+def field_standing(ours, entries):
+    '''
+    How one strategy finishes against a field in each simulation.
+
+    Args:
+        ours (np.ndarray): (N,) the strategy's score in each simulation
+        entries (np.ndarray): (N, n_entries) every field entry's score
+
+    Returns:
+        better (np.ndarray): (N,) number of entries that outscore the strategy
+        share (np.ndarray): (N,) the strategy's share of first place (entries that tie for first split the win)
+    '''
+    ours = ours[:, None]
+    better = (entries > ours).sum(axis=1)
+    ties = (entries == ours).sum(axis=1)
+    return better, np.where(better == 0, 1 / (1 + ties), 0)
+
+def simulate_contest(strategies, sims, n_entries=(10, 100, 1000), weights='mean', power=1.0, top_k=(3, 10), size=15, seed=None, chunk_size=2000):
+    '''
+    Probability that each candidate strategy finishes first (or top k) against a modeled field.
+
+    One field of the largest size is sampled and smaller fields are its leading entries. In each
+    simulation a strategy's rank is the number of field entries that outscore it; entries that tie
+    for first split the win.
+
+    Args:
+        strategies (list): Candidate strategies, each a list of (team, player) tuples
+        sims (SimResults): Simulation results with an (N x P) player totals array
+        n_entries (int or tuple): Field size(s) to evaluate
+        weights, power, size: How opponents pick players, see generate_field
+        top_k (tuple): Finishing positions to report P(rank < k) for
+        seed (int): Seed for the field sampling
+        chunk_size (int): Simulations scored at a time
+
+    Returns:
+        pd.DataFrame: One row per (strategy, field size) with the win and top-k probabilities
+    '''
+    field_sizes = np.atleast_1d(n_entries)
+    field = generate_field(sims, int(field_sizes.max()), weights, power, size, np.random.default_rng(seed))
+    rows = np.repeat(np.arange(len(field)), size)
+    field_selection = sparse.csr_matrix((np.ones(field.size, dtype=np.float32), (rows, field.ravel())),
+                                        shape=(len(field), len(sims.players)))
+    our_selection = strategies_to_selection(strategies, sims)
+
+    n_strategies = len(strategies)
+    wins = np.zeros((n_strategies, len(field_sizes)))
+    top = np.zeros((n_strategies, len(field_sizes), len(top_k)))
+
+    for start in range(0, len(sims), chunk_size):
+        totals = np.ascontiguousarray(sims.totals[start:start + chunk_size].T)
+        field_scores = np.asarray(field_selection @ totals).T  # (chunk, entries)
+        our_scores = np.asarray(our_selection @ totals).T  # (chunk, strategies)
+
+        for f, n_field in enumerate(field_sizes):
+            entries = field_scores[:, :n_field]
+            for s in range(n_strategies):
+                better, share = field_standing(our_scores[:, s], entries)
+                wins[s, f] += share.sum()
+                for k, cutoff in enumerate(top_k):
+                    top[s, f, k] += (better < cutoff).sum()
+
+    records = []
+    for s in range(n_strategies):
+        for f, n_field in enumerate(field_sizes):
+            record = {'strategy': s, 'entries': int(n_field), 'win': wins[s, f] / len(sims)}
+            for k, cutoff in enumerate(top_k):
+                record[f'top_{cutoff}'] = top[s, f, k] / len(sims)
+            records.append(record)
+
+    return pd.DataFrame(records)
@@ -0,0 +1,131 @@
+import numpy as np
+import pandas as pd
+from batch_engine import compile_bracket_ratings
+from bracket import balanced_schedule
+
+def game_probs(win_probs, schedule=None):
+    '''
+    Exact probability that each slot plays and wins a game in each round, with no sampling.
+
+    Games are independent given the ratings, so a team wins in round r if it came out of its
+    side of its round r game's part of the bracket and beats whichever team comes out of the
+    other side (the slots marked in schedule.opponents[r]). Slots without a round r game (a
+    team waiting out a play-in round) keep their probability.
+
+    Args:
+        win_probs (np.ndarray): (n_teams, n_teams) pairwise win-probability matrix in slot order.
+        schedule (Schedule): The compiled bracket, by default the layout in which adjacent
+            slots meet (see bracket.balanced_schedule).
+
+    Returns:
+        reach (np.ndarray): (n_teams, n_rounds) probability of playing a game in each round.
+        advancement (np.ndarray): (n_teams, n_rounds) probability of winning a game in each
+            round, the last column is the title probability.
+    '''
+    if schedule is None:
+        schedule = balanced_schedule(win_probs.shape[0])
+    unbeaten = np.ones(win_probs.shape[0])
+    reach = np.zeros((len(unbeaten), len(schedule.rounds)))
+    advancement = np.zeros_like(reach)
+
+    for r, opponents in enumerate(schedule.opponents):
+        playing = opponents.any(axis=1)
+        reach[playing, r] = unbeaten[playing]
+        unbeaten = np.where(playing, unbeaten * ((win_probs * opponents) @ unbeaten), unbeaten)
+        advancement[playing, r] = unbeaten[playing]
+
+    return reach, advancement
+
+def advancement_probs(win_probs, schedule=None):
+    '''
+    Exact probability that each slot wins a game in each round, see game_probs.
+    '''
+    return game_probs(win_probs, schedule)[1]
+
+def expected_games_played(reach, schedule=None):
+    '''
+    Expected number of tournament games played by each slot. Play-in games don't count: a
+    play-in team surely plays its play-in game, so it comes off the games the slot reaches.
+    '''
+    games = reach.sum(axis=1)
+    if schedule is not None:
+        games -= schedule.play_in_games
+    return games
+
+def games_played_moments(win_probs, schedule=None):
+    '''
+    Exact mean and covariance matrix of the number of games each slot plays.
+
+    Built up game by game in schedule order. Within each part of the bracket decided so far,
+    X[a] is the games slot a has played in it and W[c] whether c won them all, and the part
+    keeps S[a, b] = E[X[a] X[b]] and M[a, c] = E[X[a] W[c]]. When a game joins two parts, a
+    slot's games grow by one if it won its side, the two sides are independent of each other,
+    and c wins the game if it won its side and beats the other side's winner, so both are
+    updated from the sides' own S and M. A play-in game decides who goes on but isn't counted,
+    so it adds no games.
+
+    Args:
+        win_probs (np.ndarray): (n_teams, n_teams) pairwise win-probability matrix in slot order.
+        schedule (Schedule): The compiled bracket, see game_probs.
+
+    Returns:
+        mean (np.ndarray): (n_teams,) expected games played.
+        cov (np.ndarray): (n_teams, n_teams) covariance of games played.
+    '''
+    if schedule is None:
+        schedule = balanced_schedule(win_probs.shape[0])
+    n_teams = win_probs.shape[0]
+    unbeaten = np.ones(n_teams)
+    mean = np.zeros(n_teams)
+    S = np.zeros((n_teams, n_teams))
+    M = np.zeros((n_teams, n_teams))
+
+    for lo, mid, hi, play_in in zip(schedule.lo, schedule.mid, schedule.hi, schedule.play_in):
+        first, second = slice(lo, mid), slice(mid, hi)
+        # 1 when the game counts as a game played, 0 for a play-in game
+        counted = 0.0 if play_in else 1.0
+        # T[a, c] = E[(X[a] + W[a]) W[c]] on each side: a's games counting this one, c won its side
+        T_first = M[first, first] + counted * np.diag(unbeaten[first])
+        T_second = M[second, second] + counted * np.diag(unbeaten[second])
+        S[first, first] += counted * (M[first, first] + M[first, first].T + np.diag(unbeaten[first]))
+        S[second, second] += counted * (M[second, second] + M[second, second].T + np.diag(unbeaten[second]))
+        S[first, second] = np.outer(mean[first] + counted * unbeaten[first], mean[second] + counted * unbeaten[second])
+        S[second, first] = S[first, second].T
+
+        beat_second = win_probs[first, second] @ unbeaten[second]
+        beat_first = win_probs[second, first] @ unbeaten[first]
+        M[first, first] = T_first * beat_second[None, :]
+        M[second, second] = T_second * beat_first[None, :]
+        M[first, second] = (T_first @ win_probs[second, first].T) * unbeaten[second][None, :]
+        M[second, first] = (T_second @ win_probs[first, second].T) * unbeaten[first][None, :]
+
+        mean[lo:hi] += counted * unbeaten[lo:hi]
+        unbeaten[first] *= beat_second
+        unbeaten[second] *= beat_first
+
+    return mean, S - np.outer(mean, mean)
+
+def advancement_table(reach, advancement, teams, round_names, schedule=None):
+    '''
+    Team x round probability table, one row per bracket slot. The expected games played leave
+    out the play-in games of the schedule.
+    '''
+    table = pd.DataFrame(advancement, columns=round_names)
+    table.insert(0, 'Seed', [team.seed for team in teams])
+    table.insert(0, 'Team', [team.team_name for team in teams])
+    table['Games Played'] = expected_games_played(reach, schedule)
+    return table
+
+def exact_tournament(matchups_dict, ratings_df, method):
+    '''
+    Exact counterpart of simulate_n_tournaments.
+
+    Returns:
+        champion_probs (dict): Team string -> probability of winning the championship.
+        table (pd.DataFrame): Probability of each team winning in each round plus expected games played.
+    '''
+    ratings = compile_bracket_ratings(matchups_dict, ratings_df, method)
+    reach, advancement = game_probs(ratings.wp, ratings.schedule)
+
+    champion_probs = {str(team): float(prob) for team, prob in zip(ratings.teams, advancement[:, -1])}
+    return champion_probs, advancement_table(reach, advancement, ratings.teams, ratings.schedule.round_names, ratings.schedule)
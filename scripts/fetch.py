@@ -0,0 +1,103 @@
+import os
+import json
+import time
+import hashlib
+import threading
+import requests
+
+# Shared fetch layer for the scrapers. Page bodies are stored content-addressed under
+# blobs/<sha256 of body>, and index/<sha256 of url>.json records which blob a URL last
+# returned and when, so the freshness policy is decided per URL without touching the body.
+
+CACHE_DIR = os.environ.get('MM_CACHE_DIR', os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'data', 'http_cache'))
+OFFLINE = os.environ.get('MM_OFFLINE', '') not in ('', '0')
+
+# How long (in seconds) a cached page stays fresh; None means it never expires
+DAY = 24 * 60 * 60
+TTL_KENPOM = DAY / 4
+TTL_BRACKET = DAY
+TTL_ROSTER = DAY
+TTL_PAST_SEASON = None
+
+class CacheMiss(Exception):
+    '''
+    Raised in offline mode when a page is not in the cache.
+    '''
+    pass
+
+def set_offline(offline=True):
+    '''
+    Serve pages only from the cache, never from the network.
+    '''
+    global OFFLINE
+    OFFLINE = offline
+
+def url_key(url):
+    return hashlib.sha256(url.encode('utf-8')).hexdigest()
+
+def index_path(url):
+    return os.path.join(CACHE_DIR, 'index', url_key(url) + '.json')
+
+def blob_path(digest):
+    return os.path.join(CACHE_DIR, 'blobs', digest[:2], digest)
+
+def write_atomic(path, data):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f'{path}.{os.getpid()}.{threading.get_ident()}.tmp'
+    with open(tmp_path, 'wb') as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+
+def read_cached(url):
+    '''
+    Returns (entry, body) for a cached URL, or (None, None) if it has not been fetched.
+    '''
+    try:
+        with open(index_path(url)) as f:
+            entry = json.load(f)
+        with open(blob_path(entry['blob']), 'rb') as f:
+            return entry, f.read().decode('utf-8')
+    except (FileNotFoundError, json.JSONDecodeError, KeyError):
+        return None, None
+
+def store(url, body):
+    data = body.encode('utf-8')
+    digest = hashlib.sha256(data).hexdigest()
+    if not os.path.exists(blob_path(digest)):
+        write_atomic(blob_path(digest), data)
+    entry = {'url': url, 'blob': digest, 'fetched_at': time.time()}
+    write_atomic(index_path(url), json.dumps(entry).encode('utf-8'))
+
+def is_fresh(entry, ttl):
+    return ttl is None or time.time() - entry['fetched_at'] < ttl
+
+def fetch(url, ttl=DAY, getter=None, delay=0, refresh=False):
+    '''
+    Fetch a page's HTML through the on-disk cache.
+
+    Args:
+        url (str): The page to fetch.
+        ttl (float): Seconds a cached copy stays fresh (None: forever). Stale pages are re-fetched,
+            except in offline mode where any cached copy is served.
+        getter (callable): Function doing the actual GET, requests.get by default (e.g. a
+            cloudscraper session's get for KenPom). Only called on a cache miss.
+        delay (float): Seconds to wait after a network request, to stay polite to the site.
+        refresh (bool): Ignore the cache and always go to the network.
+
+    Returns:
+        str: The page body.
+    '''
+    entry, body = read_cached(url)
+    if entry is not None and (OFFLINE or (not refresh and is_fresh(entry, ttl))):
+        return body
+    if OFFLINE:
+        raise CacheMiss(f"Offline mode and no cached copy of {url}")
+
+    response = (getter or requests.get)(url)
+    if response.status_code != 200:
+        raise Exception(f"Failed to fetch data from {url}: HTTP {response.status_code}")
+
+    store(url, response.text)
+    if delay:
+        time.sleep(delay)
+    return response.text
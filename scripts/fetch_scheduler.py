@@ -0,0 +1,72 @@
+import os
+import time
+import threading
+import requests
+from requests.adapters import HTTPAdapter
+
+# Where the sports-reference pages are fetched from (e.g. a local stub server in tests)
+SR_BASE_URL = os.environ.get('MM_SR_BASE_URL', "https://www.sports-reference.com")
+# sports-reference allows roughly 20 requests per minute before it starts refusing clients
+SR_RATE = 20 / 60
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+class TokenBucket:
+    '''
+    Thread-safe token bucket: at most `capacity` requests at once, refilled at `rate` per second.
+    '''
+    def __init__(self, rate, capacity=1):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        # Holding the lock while waiting hands out tokens in arrival order
+        with self.lock:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            if self.tokens < 1:
+                time.sleep((1 - self.tokens) / self.rate)
+                self.tokens = 1
+                self.updated = time.monotonic()
+            self.tokens -= 1
+
+class RateLimitedFetcher:
+    '''
+    GETs through a pooled keep-alive session under one global rate limit, retrying throttled
+    or failed requests with exponential backoff. Its get method can be handed to fetch.fetch as
+    the getter so cached pages never spend a token.
+    '''
+    def __init__(self, rate=SR_RATE, burst=1, pool_size=8, max_retries=4, backoff=2.0, timeout=30):
+        self.bucket = TokenBucket(rate, burst)
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.timeout = timeout
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+
+    def retry_wait(self, attempt, response=None):
+        retry_after = response.headers.get('Retry-After') if response is not None else None
+        if retry_after is not None and retry_after.isdigit():
+            return float(retry_after)
+        return self.backoff * 2 ** attempt
+
+    def get(self, url):
+        for attempt in range(self.max_retries + 1):
+            self.bucket.acquire()
+            try:
+                response = self.session.get(url, timeout=self.timeout)
+            except requests.RequestException:
+                if attempt == self.max_retries:
+                    raise
+                time.sleep(self.retry_wait(attempt))
+                continue
+
+            if response.status_code not in RETRY_STATUSES or attempt == self.max_retries:
+                return response
+            time.sleep(self.retry_wait(attempt, response))
@@ -0,0 +1,198 @@
+import sys
+import json
+import time
+import cProfile
+import pstats
+import tracemalloc
+from contextlib import contextmanager
+
+# Opt-in instrumentation of simulation runs: wall-clock time per stage, counts of games, random
+# draws and rating lookups, simulations per second and memory high-water marks.
+#
+#   with instrumented() as run:
+#       simulate_n_tournaments(...)
+#   print(run.report())
+#
+# Probes in the simulator call stage()/count(), which only check a module global while no run
+# is active, so leaving them in the hot paths costs close to nothing.
+
+_active = None
+
+def max_rss_mb():
+    '''
+    The process' memory high-water mark in MB, or None on Windows, which has no resource module.
+    '''
+    if sys.platform == 'win32':
+        return None
+    import resource
+    max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS and in kilobytes on Linux and the BSDs
+    return max_rss / 2 ** 20 if sys.platform == 'darwin' else max_rss / 1024
+
+class NullStage:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+NULL_STAGE = NullStage()
+
+class Stage:
+    def __init__(self, run, name):
+        self.run = run
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        timer = self.run.timers.setdefault(self.name, [0.0, 0])
+        timer[0] += time.perf_counter() - self.start
+        timer[1] += 1
+        return False
+
+class Instrumentation:
+    '''
+    Collected measurements of one instrumented run.
+
+    Args:
+        trace_memory (bool): Also record the Python-level allocation peak with tracemalloc
+            (numpy arrays included). Slows pure-Python code down noticeably.
+        profiler: 'cprofile' to run cProfile over the run, or any profiler object with start()
+            and stop() methods (e.g. a sampling profiler), or None.
+    '''
+    def __init__(self, trace_memory=False, profiler=None):
+        self.timers = {}
+        self.counters = {}
+        self.trace_memory = trace_memory
+        self.profiler = cProfile.Profile() if profiler == 'cprofile' else profiler
+        self.elapsed = None
+        self.peak_traced_mb = None
+        self.max_rss_mb = None
+
+    def start(self):
+        self.started = time.perf_counter()
+        if self.trace_memory:
+            tracemalloc.start()
+        if self.profiler is not None:
+            if isinstance(self.profiler, cProfile.Profile):
+                self.profiler.enable()
+            else:
+                self.profiler.start()
+
+    def stop(self):
+        if self.profiler is not None:
+            if isinstance(self.profiler, cProfile.Profile):
+                self.profiler.disable()
+            else:
+                self.profiler.stop()
+        if self.trace_memory:
+            self.peak_traced_mb = tracemalloc.get_traced_memory()[1] / 2 ** 20
+            tracemalloc.stop()
+        self.elapsed = time.perf_counter() - self.started
+        self.max_rss_mb = max_rss_mb()
+
+    def summary(self):
+        '''
+        Measurements as a JSON-serializable dict.
+        '''
+        sims = self.counters.get('sims', 0)
+        return {
+            'elapsed_s': self.elapsed,
+            'sims_per_s': sims / self.elapsed if sims and self.elapsed else None,
+            'stages': {name: {'seconds': total, 'calls': calls} for name, (total, calls) in
+                       sorted(self.timers.items(), key=lambda item: -item[1][0])},
+            'counters': dict(self.counters),
+            'max_rss_mb': self.max_rss_mb,
+            'peak_traced_mb': self.peak_traced_mb,
+        }
+
+    def report(self):
+        '''
+        Human-readable summary: stage times (inclusive of nested stages) and counters.
+        '''
+        summary = self.summary()
+        lines = [f"elapsed {summary['elapsed_s']:.3f}s"]
+        if summary['sims_per_s'] is not None:
+            lines[0] += f", {summary['sims_per_s']:,.1f} sims/s"
+        for name, stage in summary['stages'].items():
+            share = stage['seconds'] / summary['elapsed_s'] if summary['elapsed_s'] else 0
+            lines.append(f"  {name:30s} {stage['seconds']:9.3f}s {share:6.1%} {stage['calls']:>12,} calls")
+        for name, value in summary['counters'].items():
+            lines.append(f"  {name:30s} {value:>12,}")
+        if summary['max_rss_mb'] is not None:
+            lines.append(f"  max RSS {summary['max_rss_mb']:.1f} MB")
+        if summary['peak_traced_mb'] is not None:
+            lines.append(f"  peak traced {summary['peak_traced_mb']:.1f} MB")
+        return '\n'.join(lines)
+
+    def to_json(self, path):
+        with open(path, 'w') as f:
+            json.dump(self.summary(), f, indent=2)
+
+    def profile_stats(self, sort='cumulative'):
+        '''
+        pstats.Stats of the run when it was profiled with cProfile.
+        '''
+        if not isinstance(self.profiler, cProfile.Profile):
+            raise ValueError("The run was not profiled with cProfile.")
+        return pstats.Stats(self.profiler).sort_stats(sort)
+
+@contextmanager
+def instrumented(trace_memory=False, profiler=None):
+    '''
+    Instruments everything run inside the block and yields the Instrumentation.
+
+    Only the current process is measured, so use workers=1 to see the batch engine's stages.
+    '''
+    global _active
+    if _active is not None:
+        raise RuntimeError("An instrumented run is already active.")
+    run = Instrumentation(trace_memory, profiler)
+    _active = run
+    run.start()
+    try:
+        yield run
+    finally:
+        run.stop()
+        _active = None
+
+def stage(name):
+    '''
+    Context manager timing a stage of the active run (a shared no-op when nothing is measured).
+    '''
+    if _active is None:
+        return NULL_STAGE
+    return Stage(_active, name)
+
+def timed(name, iterable):
+    '''
+    Wraps an iterable so the time spent fetching each item (e.g. in a tqdm progress bar) is
+    recorded as a stage. Returns the iterable unchanged when nothing is measured.
+    '''
+    if _active is None:
+        return iterable
+    return _timed(name, iterable)
+
+def _timed(name, iterable):
+    iterator = iter(iterable)
+    while True:
+        with stage(name):
+            item = next(iterator, _DONE)
+        if item is _DONE:
+            return
+        yield item
+
+_DONE = object()
+
+def count(name, n=1):
+    '''
+    Adds n to a counter of the active run.
+    '''
+    if _active is not None:
+        _active.counters[name] = _active.counters.get(name, 0) + n
+
+def enabled():
+    return _active is not None
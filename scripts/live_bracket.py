@@ -0,0 +1,78 @@
+import numpy as np
+from batch_engine import compile_bracket_ratings, player_inputs, player_quantiles, tempo_inputs, rating_updates, known_winners
+from simulate_tournament import run_batch
+from team_registry import team_registry
+
+class LiveBracket:
+    '''
+    Re-forecasts a tournament in progress: games already played keep their actual winners,
+    players start from the points they have actually scored, and only the remaining games are
+    simulated.
+
+    The compiled ratings and player inputs are built once, so each update after a game session
+    only swaps in the new results before simulating again.
+
+    Example:
+        live = LiveBracket(matchups_dict, players_dict, ratings_df, 'kenpom')
+        live.update(read_tournament_wins(2025), load_live_player_points(2025, players_dict, teams))
+        champion_probs, sims = live.simulate(100000)
+    '''
+    def __init__(self, matchups_dict, players_dict, ratings_df, method):
+        self.ratings = compile_bracket_ratings(matchups_dict, ratings_df, method)
+        self.teams = self.ratings.teams
+        self.players, self.slots, self.ppg, self.multipliers = player_inputs(self.teams, players_dict)
+        self.quantiles = player_quantiles(self.teams, players_dict)
+        self.tempo = tempo_inputs(self.ratings, players_dict) if self.ratings.method == 'tempo' else None
+        self.known = np.full(self.ratings.schedule.n_games, -1, dtype=np.int8)
+        self.actual = np.zeros(len(self.players), dtype=np.float32)
+
+    def update(self, wins=None, player_points=None):
+        '''
+        Sets the results so far.
+
+        Args:
+            wins (dict): Team name -> tournament games won so far, see batch_engine.known_winners.
+            player_points (dict): Team name -> player name -> actual tournament points so far
+                (before the seed multiplier). Players left out keep their previous points.
+        '''
+        if wins is not None:
+            self.known = known_winners(self.ratings.schedule, wins)
+        if player_points is not None:
+            registry = team_registry()
+            points_by_id = dict(zip(registry.ids(player_points, 'player points team').tolist(), player_points.values()))
+            team_ids = registry.ids([team.team_name for team in self.teams], 'bracket team')
+            for col, (slot, _, player) in enumerate(self.players):
+                points = points_by_id.get(int(team_ids[slot]), {}).get(player)
+                if points is not None:
+                    self.actual[col] = float(points) * self.multipliers[col]
+
+    def remaining_games(self):
+        return int((self.known < 0).sum())
+
+    def alive(self):
+        '''
+        Names of the teams that haven't lost a played game.
+        '''
+        # the team of a decided game that didn't win it is out
+        team1, team2 = self.ratings.schedule.entrants(self.known)
+        decided = self.known >= 0
+        eliminated = np.zeros(len(self.teams), dtype=bool)
+        eliminated[np.where(self.known == team1, team2, team1)[decided]] = True
+        return [team.team_name for team, out in zip(self.teams, eliminated) if not out]
+
+    def simulate(self, N, seed=None, workers=1, rating_update=0, sampling=None):
+        '''
+        Simulates the remaining games N times. With rating_update > 0 ratings move with the
+        simulated results, see simulate_n_tournaments (played games are in the ratings already).
+        With a sampling scheme (see variance_reduction) forecasts from the same seed share every
+        game slot's uniforms, so consecutive updates differ by the new results rather than noise.
+
+        Returns:
+            champion_probs (dict): Team string -> probability of winning the championship.
+            results (SimResults): Every game's winner (played games fixed) and player totals,
+                including the points already scored.
+        '''
+        results = run_batch(self.ratings, self.players, self.slots, self.ppg, self.multipliers, N, seed, workers,
+                            known=self.known, actual=self.actual, quantiles=self.quantiles, tempo=self.tempo,
+                            updates=rating_updates(self.ratings, rating_update), sampling=sampling)
+        return results.champion_probs(), results
@@ -1,19 +1,39 @@
-import time
-import pickle
-import requests
+import os
 import pandas as pd
 from bs4 import BeautifulSoup
 from io import StringIO
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from fetch import fetch, TTL_ROSTER, TTL_PAST_SEASON
+from fetch_scheduler import RateLimitedFetcher, SR_BASE_URL
+from player_store import PlayerStore
+from columnar import PlayerBundle, cached_bundle
+from bracket import description_teams
+
+CURRENT_SEASON = 2025
+# Seconds to wait after each request that actually reaches sports-reference (without a scheduler)
+SR_DELAY = 3.6
+
+def sr_fetch(url, year, getter=None, refresh=False):
+    # a rate-limited getter paces itself, otherwise wait SR_DELAY after each network request
+    return fetch(url, ttl=season_ttl(year), getter=getter, delay=0 if getter else SR_DELAY, refresh=refresh)
+
+def season_ttl(year):
+    # pages for finished seasons don't change, so they never need re-fetching
+    return TTL_ROSTER if int(year) >= CURRENT_SEASON else TTL_PAST_SEASON
 
 def get_tournament_games(player_gamelog_df):
     # Filter for tournament games (ROUND-64, ROUND-32,..., NATIONAL-SEMI, NATIONAL-FINAL)
     tournament_games = player_gamelog_df[player_gamelog_df['Type'].isin(['ROUND-64', 'ROUND-32', 'ROUND-16', 'ROUND-8', 'NATIONAL-SEMI', 'NATIONAL-FINAL'])]
     return tournament_games
 
-def get_player_pts_gamelog(player_link, year):
-    url = f'https://www.sports-reference.com{player_link[:-5]}/gamelog/{year}'
-    response = requests.get(url)
-    html_content = response.text
+def get_pre_tournament_pts(player_gamelog_df):
+    # Points in every game played before the tournament (rows without points weren't played)
+    tournament = player_gamelog_df.index.isin(get_tournament_games(player_gamelog_df).index)
+    return player_gamelog_df.loc[~tournament, 'PTS'].dropna().tolist()
+
+def get_player_pts_gamelog(player_link, year, getter=None, refresh=False, base_url=SR_BASE_URL):
+    url = f'{base_url}{player_link[:-5]}/gamelog/{year}'
+    html_content = sr_fetch(url, year, getter, refresh)
     soup = BeautifulSoup(html_content, 'html.parser')
 
     # Find the table with id 'player_game_log'
@@ -34,37 +54,45 @@ def get_player_pts_gamelog(player_link, year):
 
     return df
 
-def get_player_tournament_pts(player_link, year):
+def get_player_tournament_pts(player_link, year, getter=None, refresh=False, base_url=SR_BASE_URL):
     """
     Get the total points scored by a player in tournament games from their gamelog.
 
     Args:
         player_link (str): The link to the player's SR page.
         year (str): The year of the tournament.
+        getter (callable): Optional rate-limited GET to use on cache misses.
+        refresh (bool): Re-fetch the gamelog even if a cached copy is fresh (live tournaments).
+        base_url (str): Site the link is on, sports-reference by default.
 
     Returns:
         total_pts (int): The total points scored in tournament games.
     """
-    player_gamelog_df = get_player_pts_gamelog(player_link, year)
+    player_gamelog_df = get_player_pts_gamelog(player_link, year, getter, refresh, base_url)
     tournament_games = get_tournament_games(player_gamelog_df)
     total_pts = tournament_games['PTS'].sum()
     
     return total_pts
 
-def load_player_data_for_team(team_link, year):
+def load_player_data_for_team(team_link, year, getter=None, gamelogs=None, base_url=SR_BASE_URL, refresh=False):
     """
     Load the roster for a team from the link to the team's SR page.
 
     Args:
         team_link (str): The link to the team's SR page.
+        getter (callable): Optional rate-limited GET to use on cache misses.
+        gamelogs (bool): Also fetch every player's gamelog and keep their points in each game
+            before the tournament as 'game_pts' (see player_distributions). Defaults to past
+            seasons only, whose gamelogs are fetched for the actual tournament points anyway.
+        base_url (str): Site the links are on, sports-reference by default.
+        refresh (bool): Fetch the pages again even if they are cached.
 
     Returns:
         player_ppg (dict): A dictionary mapping player names to their average points per game.
     """
     print(f"Loading player data for team link: {team_link}")
-    url = "https://www.sports-reference.com" + team_link
-    response = requests.get(url)
-    html_content = response.text
+    url = base_url + team_link
+    html_content = sr_fetch(url, year, getter, refresh)
     soup = BeautifulSoup(html_content, 'html.parser')
 
     # Find the table with id 'players_per_game'
@@ -122,44 +150,138 @@ def load_player_data_for_team(team_link, year):
     # Convert the DataFrame to a list of dictionaries
     raw_ppg = df.to_dict(orient='records')
 
+    past_season = int(year) < CURRENT_SEASON
+    if gamelogs is None:
+        gamelogs = past_season
+
     player_dict = {}
     for player in raw_ppg:
-        player_dict[player['name_display']] = {'ppg': player['pts_per_g'], 'running_total_simulated': 0, 'link': player['player_link']}
-        if year != '2025':
-            player_dict['ground_truth_total'] = get_player_tournament_pts(player['player_link'], year)
-        time.sleep(3.6) # Simulate a delay to avoid overwhelming the server
+        player_stats = {'ppg': player['pts_per_g'], 'running_total_simulated': 0, 'link': player['player_link'],
+                        # shooting volume and minutes, used to split team points by usage (see tempo_model)
+                        'fga': player.get('fga_per_g'), 'fta': player.get('fta_per_g'), 'mp': player.get('mp_per_g')}
+        if gamelogs and isinstance(player['player_link'], str):
+            gamelog_df = get_player_pts_gamelog(player['player_link'], year, getter, refresh, base_url=base_url)
+            player_stats['game_pts'] = get_pre_tournament_pts(gamelog_df)
+            # past tournaments have actually been played, so record what each player really scored
+            if past_season:
+                player_stats['ground_truth_total'] = get_tournament_games(gamelog_df)['PTS'].sum()
+        player_dict[player['name_display']] = player_stats
 
     return player_dict
 
-def load_player_data(year, matchups_dict):
-    # Load player ppg data if not already loaded
+def bracket_team_links(matchups_dict):
+    """
+    Team name -> SR link for every team in the bracket (region matchups or any bracket description,
+    First Four teams included) that has a page (skips play-in placeholders).
+    """
+    links = {}
+    for team in description_teams(matchups_dict):
+        if team.get('link') is not None:
+            links[team['name']] = team['link']
+    return links
+
+def import_legacy_pickles(store, year):
+    # older runs left their rosters in a pickle, under one of two names
+    for path in (f'player_data_{year}_COMPLETE.pkl', f'player_data_{year}.pkl'):
+        if os.path.exists(path):
+            n_teams = store.import_pickle(path)
+            print(f"Imported {n_teams} teams from {path}.")
+            return
+
+def load_player_data(year, matchups_dict, workers=4, fetcher=None, store=None, gamelogs=None, base_url=SR_BASE_URL, refresh=False):
+    """
+    Load every bracket team's roster, fetching teams concurrently under one global rate limit.
+
+    Rosters live in a per-year PlayerStore and each team is written to it as soon as it is loaded,
+    so a rerun after an interruption only loads the teams still missing, and once every bracket team
+    is stored no page is fetched at all. Within a team, pages already fetched come from the page
+    cache, so only the missing players' gamelogs go to the network.
+
+    Args:
+        year (int): The season.
+        matchups_dict (dict): Region -> matchups, as from read_unplayed_tournament, or any bracket
+            description (see bracket.py).
+        workers (int): Number of teams loaded at once.
+        fetcher (RateLimitedFetcher): Shared fetcher, one at the sports-reference rate by default.
+        store (PlayerStore): Where rosters are kept, the default store for the year if not given.
+        gamelogs (bool): Fetch per-game points of every player, see load_player_data_for_team.
+            Only applies to teams not stored yet.
+        base_url (str): Site the team and player links are on, sports-reference by default
+            (fetch_scheduler.SR_BASE_URL, overridden by the MM_SR_BASE_URL environment variable).
+        refresh (bool): Load every bracket team again, pages included, and overwrite the stored
+            rosters.
+    """
+    own_store = store is None
+    if own_store:
+        store = PlayerStore(year)
+
     try:
-        with open(f'player_data_{year}_COMPLETE.pkl', 'rb') as f:
-            player_data = pickle.load(f)
-    except FileNotFoundError:
-        player_data = {}
-        for region in matchups_dict.values():
-            for matchup in region:
-                team1 = matchup['team_1']
-                team2 = matchup['team_2']
-
-                if team1['name'] not in player_data:
-                    player_data[team1['name']] = load_player_data_for_team(team1['link'], year)
-                if team2['name'] not in player_data:
-                    player_data[team2['name']] = load_player_data_for_team(team2['link'], year)
-
-                # Simulate a delay to avoid overwhelming the server
-                time.sleep(3.6)
-                print(f"Loaded player data for {team1['name']} and {team2['name']}")
-                print(player_data[team1['name']])
-                print(player_data[team2['name']])
-                
-                # Save the player data to a pickle file for future use
-                with open(f'player_data_{year}.pkl', 'wb') as f:
-                    pickle.dump(player_data, f)
-
-
-        print("Player data loaded successfully.")
-        print(player_data)
-
-    return player_data
\ No newline at end of file
+        if not store.teams():
+            import_legacy_pickles(store, year)
+
+        team_links = bracket_team_links(matchups_dict)
+        missing = team_links if refresh else store.missing_teams(team_links)
+        if missing:
+            print(f"Loading rosters for {len(missing)} teams.")
+            if fetcher is None:
+                fetcher = RateLimitedFetcher()
+
+            with ThreadPoolExecutor(max_workers=workers) as pool:
+                futures = {pool.submit(load_player_data_for_team, link, year, fetcher.get, gamelogs, base_url, refresh): name
+                           for name, link in missing.items()}
+                for future in as_completed(futures):
+                    name = futures[future]
+                    store.upsert_team(name, future.result(), missing[name])
+                    print(f"Loaded player data for {name}")
+
+            print("Player data loaded successfully.")
+
+        return store.load()
+    finally:
+        if own_store:
+            store.close()
+
+def load_live_player_points(year, player_data, teams, workers=4, fetcher=None, base_url=SR_BASE_URL):
+    """
+    Actual tournament points so far for the players of some teams, for LiveBracket.update.
+
+    Only the given teams' gamelogs are re-fetched, so after a game session pass just the teams
+    that played in it; points of other players are kept from the previous update.
+
+    Args:
+        year (int): The season.
+        player_data (dict): Team -> player -> stats, as from load_player_data (needs each 'link').
+        teams (list): Names of the teams whose players to update.
+        workers (int): Number of gamelogs fetched at once.
+        fetcher (RateLimitedFetcher): Shared fetcher, one at the sports-reference rate by default.
+        base_url (str): Site the player links are on, see load_player_data.
+
+    Returns:
+        dict: Team -> player -> points scored in tournament games.
+    """
+    if fetcher is None:
+        fetcher = RateLimitedFetcher()
+
+    jobs = [(team, player, stats['link']) for team in teams for player, stats in player_data.get(team, {}).items()
+            if isinstance(stats, dict) and isinstance(stats.get('link'), str)]
+    points = {team: {} for team in teams}
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        futures = {pool.submit(get_player_tournament_pts, link, year, fetcher.get, True, base_url): (team, player)
+                   for team, player, link in jobs}
+        for future in as_completed(futures):
+            team, player = futures[future]
+            points[team][player] = float(future.result())
+    return points
+
+def load_player_bundle(year, matchups_dict, refresh=False, **kwargs):
+    """
+    Memory-mapped columnar copy of load_player_data's result, see columnar.PlayerBundle.
+
+    The bundle is rebuilt (through load_player_data, with any extra keyword arguments) when it
+    doesn't exist yet, when refresh is set, or when it is missing teams from the bracket.
+    """
+    build = lambda: load_player_data(year, matchups_dict, **kwargs)
+    bundle = cached_bundle(PlayerBundle, f'players_{year}', build, refresh)
+    if (bundle.team_rows(list(bracket_team_links(matchups_dict))) < 0).any():
+        bundle = cached_bundle(PlayerBundle, f'players_{year}', build, refresh=True)
+    return bundle
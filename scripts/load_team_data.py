@@ -1,29 +1,42 @@
-import requests
+import os
+import hashlib
 import pandas as pd
 from bs4 import BeautifulSoup
 # from kenpompy.misc import get_pomeroy_ratings
 import cloudscraper
+from fetch import fetch, TTL_KENPOM, TTL_BRACKET
+from fetch_scheduler import SR_BASE_URL
+from columnar import RatingsBundle, cached_bundle
 
-def scrape_kenpom_to_df(year=2025):
+# KenPom ratings pages saved before each tournament's first game, exported to CSV as
+# kenpom_<year>.csv (the live page of a past season shows its final ratings, which already
+# include the tournament's games)
+PRE_TOURNAMENT_DIR = os.environ.get('MM_PRE_TOURNAMENT_DIR', os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'data', 'kenpom_pre_tournament'))
+
+def kenpom_page(year=2025, refresh=False):
+    """
+    The KenPom ratings page's HTML, through the page cache (fresh for TTL_KENPOM).
+    """
+    # Use cloudscraper to bypass Cloudflare protection, only created when the page isn't cached
+    # print(get_pomeroy_ratings(browser=scraper, season='2025'))
+    url = f"https://kenpom.com/index.php?y={year}"
+    return fetch(url, ttl=TTL_KENPOM, getter=lambda u: cloudscraper.create_scraper().get(u), refresh=refresh)
+
+def scrape_kenpom_to_df(year=2025, html_content=None):
     """
     Scrape KenPom data and return it as a pandas DataFrame.
+
+    Args:
+        year (int): The season.
+        html_content (str): The ratings page, fetched with kenpom_page if not given.
     
     Returns:
         pd.DataFrame: DataFrame containing KenPom data.
     """
-    # Use cloudscraper to bypass Cloudflare protection
-    scraper = cloudscraper.create_scraper()
-    # print(get_pomeroy_ratings(browser=scraper, season='2025'))
-    
-    url = f"https://kenpom.com/index.php?y={year}"
-    response = scraper.get(url)
-    
-    if response.status_code != 200:
-        print(f"Error: {response.status}")
-        print(response)
-        raise Exception(f"Failed to fetch data from {url}")
+    if html_content is None:
+        html_content = kenpom_page(year)
     
-    soup = BeautifulSoup(response.text, 'html.parser')
+    soup = BeautifulSoup(html_content, 'html.parser')
     # Parse the HTML content using BeautifulSoup
     table = soup.find("table", id="ratings-table")
 
@@ -45,8 +58,9 @@ def clean_kenpom_df(kenpom_df):
         pd.DataFrame: The cleaned KenPom DataFrame.
     """
     kenpom_df.columns = kenpom_df.columns.get_level_values(1)
-    # select only the relevant columns
-    kenpom_df = kenpom_df.iloc[:, :5]
+    # select only the relevant columns: Rk, Team, Conf, W-L, NetRtg and the ORtg, DRtg and AdjT
+    # values (each is followed by its rank, which shares its column name)
+    kenpom_df = kenpom_df.iloc[:, [0, 1, 2, 3, 4, 5, 7, 9]]
 
     # get rid of duplicate rows of header
     kenpom_df = kenpom_df.drop_duplicates()
@@ -65,42 +79,115 @@ def clean_kenpom_df(kenpom_df):
 
     return kenpom_df
 
-def full_kenpom_pipeline(year=2025):
+def full_kenpom_pipeline(year=2025, html_content=None):
     """
     Full pipeline to scrape, clean, and return KenPom data as a DataFrame.
     
     Args:
         year (int): The year for which to scrape KenPom data.
+        html_content (str): The ratings page, fetched with kenpom_page if not given.
     
     Returns:
         pd.DataFrame: The cleaned KenPom DataFrame.
     """
     print(f"Scraping KenPom data for {year}...")
 
-    kenpom_df = scrape_kenpom_to_df(year)
+    kenpom_df = scrape_kenpom_to_df(year, html_content)
     kenpom_df = clean_kenpom_df(kenpom_df)
     
     # Convert columns to appropriate types
-    kenpom_df['NetRtg'] = pd.to_numeric(kenpom_df['NetRtg'], errors='coerce')
+    for column in ['NetRtg', 'ORtg', 'DRtg', 'AdjT']:
+        kenpom_df[column] = pd.to_numeric(kenpom_df[column], errors='coerce')
     
     return kenpom_df
 
-def read_played_region(year, region):
-    # similar to unplayed except we find_all for this: round_64 = soup.find(id=region).find(class_='team16').find(class_='round', recursive=False)
-    pass
+def kenpom_ratings_bundle(year=2025, refresh=False):
+    """
+    Memory-mapped columnar copy of full_kenpom_pipeline's ratings, built on first use.
+
+    The bundle is keyed on the content digest of the ratings page, which stays cached for
+    TTL_KENPOM: once the page is re-fetched with new ratings, a new bundle is built from it.
+    """
+    html_content = kenpom_page(year, refresh)
+    digest = hashlib.sha256(html_content.encode('utf-8')).hexdigest()[:16]
+    return cached_bundle(RatingsBundle, f'kenpom_{year}_{digest}', lambda: full_kenpom_pipeline(year, html_content), refresh)
+
+def pre_tournament_kenpom(year, directory=PRE_TOURNAMENT_DIR):
+    """
+    A season's KenPom ratings as they stood before its tournament, from the snapshots in
+    directory (see PRE_TOURNAMENT_DIR).
+
+    Args:
+        year (int): The year of the tournament.
+        directory (str): Folder of the kenpom_<year>.csv snapshots.
+
+    Returns:
+        pd.DataFrame: Team, NetRtg, ORtg, DRtg and AdjT, like full_kenpom_pipeline.
+
+    Raises:
+        FileNotFoundError: There is no snapshot of the year.
+    """
+    path = os.path.join(directory, f'kenpom_{year}.csv')
+    if not os.path.exists(path):
+        raise FileNotFoundError(f"No pre-tournament KenPom ratings for {year} at {path}.")
+
+    kenpom_df = pd.read_csv(path)
+    # drop repeated header rows, the rank columns after each value come in as '.1' duplicates
+    kenpom_df = kenpom_df[kenpom_df['Team'] != 'Team'].reset_index(drop=True)
+    # remove seed numbers
+    kenpom_df['Team'] = kenpom_df['Team'].str.replace(r' \d{1,2}[\*]?$', '', regex=True)
+    for column in ['NetRtg', 'ORtg', 'DRtg', 'AdjT']:
+        kenpom_df[column] = pd.to_numeric(kenpom_df[column], errors='coerce')
+    return kenpom_df[['Team', 'NetRtg', 'ORtg', 'DRtg', 'AdjT']]
+
+def read_played_region(year, region, soup=None):
+    """
+    Count the games each team has won in a region (or the 'national' final rounds) so far.
+
+    Returns:
+        dict: Team name -> games won, only teams that have won a game.
+    """
+    if soup is None:
+        soup = read_bracket_page(year)
+
+    # the bracket marks the winning team of every completed game with the 'winner' class
+    wins = {}
+    bracket = soup.find(id=region)
+    if bracket is None:
+        return wins
+    for team in bracket.find_all('div', class_='winner'):
+        name = team.find('a').text
+        wins[name] = wins.get(name, 0) + 1
+    return wins
+
+def read_tournament_wins(year, refresh=True):
+    """
+    Games won so far by every team in the tournament, for LiveBracket.update.
 
-def read_unplayed_region(year, region):
-    BASE_URL = "https://www.sports-reference.com/cbb/postseason/men/{}-ncaa.html"
+    Args:
+        year (int): The year of the tournament.
+        refresh (bool): Re-fetch the bracket page instead of using a cached copy, since results
+            change while the tournament is on.
+    """
+    soup = read_bracket_page(year, refresh)
+    wins = {}
+    for region in ["east", "west", "south", "midwest", "national"]:
+        for name, n_wins in read_played_region(year, region, soup).items():
+            wins[name] = wins.get(name, 0) + n_wins
+    return wins
+
+def read_bracket_page(year, refresh=False):
+    """
+    Fetch and parse the Sports-Reference bracket page for a year (one request for all regions).
+    """
+    BASE_URL = SR_BASE_URL + "/cbb/postseason/men/{}-ncaa.html"
     url = BASE_URL.format(year)
-    
-    # Use requests to get the content of the webpage
-    response = requests.get(url)
-    html_content = response.text
-    if response.status_code != 200:
-        print(response)
-        raise Exception(f"Failed to fetch data from {url}")
+    html_content = fetch(url, ttl=TTL_BRACKET, refresh=refresh)
+    return BeautifulSoup(html_content, 'html.parser')
 
-    soup = BeautifulSoup(html_content, 'html.parser')
+def read_unplayed_region(year, region, soup=None):
+    if soup is None:
+        soup = read_bracket_page(year)
 
     # Find the container for the east region
     round_64 = soup.find(id=region).find(class_='team16').find(class_='round', recursive=False)
@@ -139,10 +226,11 @@ def read_unplayed_tournament(year):
     Returns:
         list: A list of dictionaries containing matchups.
     """
-    east_list = read_unplayed_region(year, "east")
-    west_list = read_unplayed_region(year, "west")
-    south_list = read_unplayed_region(year, "south")
-    midwest_list = read_unplayed_region(year, "midwest")
+    soup = read_bracket_page(year)
+    east_list = read_unplayed_region(year, "east", soup)
+    west_list = read_unplayed_region(year, "west", soup)
+    south_list = read_unplayed_region(year, "south", soup)
+    midwest_list = read_unplayed_region(year, "midwest", soup)
 
     matchups_dict = {
         "east": east_list,
@@ -170,6 +258,12 @@ def parse_silver_ratings(silver_path):
     
     return silver_df
 
+def silver_ratings_bundle(silver_path, name='silver', refresh=False):
+    """
+    Memory-mapped columnar copy of parse_silver_ratings's ratings, built on first use.
+    """
+    return cached_bundle(RatingsBundle, name, lambda: parse_silver_ratings(silver_path), refresh)
+
 if __name__ == "__main__":
     # Example usage
     year = 2023
@@ -1,15 +1,27 @@
 import pickle
+import argparse
 import pandas as pd
+from fetch import set_offline
 from load_team_data import full_kenpom_pipeline, read_unplayed_tournament, parse_silver_ratings
 from load_player_data import load_player_data
 from simulate_tournament import simulate_n_tournaments
+from adaptive import simulate_to_precision, champion_target, player_mean_target, precision_table, CHAMPION_TOLERANCE
+from instrument import instrumented
 
-def main():
+def main(tolerance=None, time_budget=None):
     year = 2025
     kenpom_ratings_df = full_kenpom_pipeline(year)
     matchups_dict = read_unplayed_tournament(year)
     player = load_player_data(year, matchups_dict)
-    probs, sims = simulate_n_tournaments(matchups_dict, player, kenpom_ratings_df, N=1000)
+    if tolerance is None and time_budget is None:
+        probs, sims = simulate_n_tournaments(matchups_dict, player, kenpom_ratings_df, method='kenpom', N=1000)
+    else:
+        # simulate until the champion probabilities and players' means are precise enough
+        targets = [champion_target(tolerance if tolerance is not None else CHAMPION_TOLERANCE), player_mean_target()]
+        probs, precision = simulate_to_precision(matchups_dict, player, kenpom_ratings_df, 'kenpom', targets,
+                                                 time_budget=time_budget, keep=True, sampling='sobol')
+        print(precision_table(precision))
+        sims = precision.results
 
     # Convert the probabilities to a DataFrame for better readability
     df = pd.DataFrame(probs.items(), columns=['Team', 'Probability'])
@@ -37,3 +49,23 @@ def main():
 # print(main())
 # convert_player_data('player_data_2024.pkl')
 # print(load_player_data(2024, {}))
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--offline', action='store_true', help="only use cached pages, never hit the network")
+    parser.add_argument('--instrument', metavar='JSON', help="time the run's stages and write the measurements to this file")
+    parser.add_argument('--profile', action='store_true', help="with --instrument, also run cProfile and print the top functions")
+    parser.add_argument('--tolerance', type=float, help="simulate until champion probabilities are within this of the truth (95%% confidence)")
+    parser.add_argument('--time-budget', type=float, help="with adaptive stopping, stop after about this many seconds")
+    args = parser.parse_args()
+
+    set_offline(args.offline)
+    if args.instrument:
+        with instrumented(profiler='cprofile' if args.profile else None) as run:
+            print(main(args.tolerance, args.time_budget))
+        print(run.report())
+        run.to_json(args.instrument)
+        if args.profile:
+            run.profile_stats().print_stats(25)
+    else:
+        print(main(args.tolerance, args.time_budget))
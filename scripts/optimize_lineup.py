@@ -0,0 +1,94 @@
+import numpy as np
+
+OBJECTIVES = ('mean', 'quantile', 'prob_exceed')
+
+def objective_values(scores, objective, q=0.9, target=None):
+    '''
+    Objective of each column of an (N x C) matrix of lineup scores.
+
+    Args:
+        scores (np.ndarray): Simulated scores, one column per candidate lineup
+        objective (str): 'mean', 'quantile' (empirical q-quantile) or 'prob_exceed' (P(score > target))
+    '''
+    if objective == 'mean':
+        return scores.mean(axis=0, dtype=np.float64)
+    elif objective == 'quantile':
+        k = int(q * (len(scores) - 1))
+        return np.partition(scores, k, axis=0)[k]
+    elif objective == 'prob_exceed':
+        if target is None:
+            raise ValueError("The 'prob_exceed' objective needs a target score.")
+        return (scores > target).mean(axis=0)
+    else:
+        raise ValueError(f"Objective must be one of {', '.join(OBJECTIVES)}.")
+
+def candidate_pool(totals, pool_size):
+    '''
+    Column indices worth searching over: the best players by mean plus the best by upside
+    (95th percentile), since high-variance players matter for quantile/exceedance objectives.
+    '''
+    n_players = totals.shape[1]
+    if n_players <= pool_size:
+        return np.arange(n_players)
+
+    means = totals.mean(axis=0, dtype=np.float64)
+    k = int(0.95 * (len(totals) - 1))
+    upside = np.partition(totals, k, axis=0)[k]
+    by_mean = np.argsort(-means)[:pool_size // 2]
+    by_upside = np.argsort(-upside)[:pool_size // 2]
+    return np.union1d(by_mean, by_upside)
+
+def optimize_lineup(sims, objective='mean', size=15, q=0.9, target=None, pool_size=200, max_sweeps=20):
+    '''
+    Picks the lineup of `size` players that maximizes an objective over the simulations.
+
+    The expected points objective is separable, so the top players by mean are optimal. For the
+    quantile and exceedance objectives the search starts from that lineup and does local search
+    over single swaps: for each lineup spot, every candidate replacement is evaluated at once from
+    the running score vector (score - out + in), and the best improving swap is taken. Sweeps
+    continue until no swap helps or max_sweeps is reached.
+
+    Args:
+        sims (SimResults): Simulation results with an (N x P) player totals array
+        objective (str): 'mean', 'quantile' or 'prob_exceed'
+        size (int): Number of players to pick (15 under the README rules)
+        q (float): Quantile for the 'quantile' objective
+        target (float): Score to beat for the 'prob_exceed' objective
+        pool_size (int): Number of candidate players the local search considers
+        max_sweeps (int): Upper bound on passes over the lineup
+
+    Returns:
+        strategy (list): The chosen (team, player) tuples
+        value (float): The objective value of the chosen lineup
+    '''
+    if objective not in OBJECTIVES:
+        raise ValueError(f"Objective must be one of {', '.join(OBJECTIVES)}.")
+
+    totals = sims.totals
+    means = totals.mean(axis=0, dtype=np.float64)
+    lineup = list(np.argsort(-means)[:size])
+    scores = totals[:, lineup].sum(axis=1, dtype=np.float64).astype(np.float32)
+    best = objective_values(scores[:, None], objective, q, target)[0]
+
+    if objective != 'mean':
+        pool = candidate_pool(totals, pool_size)
+        pool_totals = np.ascontiguousarray(totals[:, pool])
+
+        for _ in range(max_sweeps):
+            improved = False
+            for spot in range(size):
+                without = scores - totals[:, lineup[spot]]
+                values = objective_values(without[:, None] + pool_totals, objective, q, target)
+                values[np.isin(pool, lineup)] = -np.inf
+
+                candidate = int(np.argmax(values))
+                if values[candidate] > best:
+                    lineup[spot] = pool[candidate]
+                    scores = without + pool_totals[:, candidate]
+                    best = values[candidate]
+                    improved = True
+            if not improved:
+                break
+
+    strategy = [sims.players[col] for col in lineup]
+    return strategy, float(best)
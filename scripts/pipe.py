@@ -9,36 +9,28 @@ kenpom_ratings_df = full_kenpom_pipeline(year)
 matchups_dict = read_unplayed_tournament(year)
 
 
-play_ins_found = 0
-for region, matchups in matchups_dict.items():
-    # check where the team name is play-in
-    print(matchups)
-    for i, matchup in enumerate(matchups):
-        t1 = matchup['team_1']['name']
-        t2 = matchup['team_2']['name']
-        if t2 == 'Play-In':
-            if play_ins_found == 0:
-                matchup['team_2'] = {
-                    'name': 'Mount St. Mary\'s (MD)',
-                    'seed': 16,
-                    'link': '/cbb/schools/mount-st-marys/men/2025.html'
-                }
-            else:
-                matchup['team_2'] = {
-                    'name': 'Xavier',
-                    'seed': 11,
-                    'link': '/cbb/schools/xavier/men/2025.html'
-                }
-            play_ins_found += 1
-
-
-print(matchups_dict)
+# the bracket page leaves the First Four games as placeholders, so describe them and let the
+# bracket compiler put them in (see bracket.py). Both have been played: their winners take the
+# spots without a game, so they aren't simulated again
+bracket = {
+    'regions': matchups_dict,
+    'first_four': [
+        {'region': 'east', 'seed': 16, 'winner': 'Mount St. Mary\'s (MD)', 'teams': [
+            {'name': 'American', 'seed': 16, 'link': '/cbb/schools/american/men/2025.html'},
+            {'name': 'Mount St. Mary\'s (MD)', 'seed': 16, 'link': '/cbb/schools/mount-st-marys/men/2025.html'},
+        ]},
+        {'region': 'midwest', 'seed': 11, 'winner': 'Xavier', 'teams': [
+            {'name': 'Texas', 'seed': 11, 'link': '/cbb/schools/texas/men/2025.html'},
+            {'name': 'Xavier', 'seed': 11, 'link': '/cbb/schools/xavier/men/2025.html'},
+        ]},
+    ],
+}
+print(bracket)
 
 
 import pickle
 
-with open('player_data_2025.pkl', 'rb') as f:
-    player = pickle.load(f)
+player = load_player_data(year, bracket)
 
 
 # find instances where 'ground_truth_total' is in the player dict
@@ -59,7 +51,7 @@ silver_path = '../data/silver.csv'
 silver_df = parse_silver_ratings(silver_path)
 print(silver_df)
 
-probs, sims = simulate_n_tournaments(matchups_dict, player, silver_df, method='silver', N=20000)
+probs, sims = simulate_n_tournaments(bracket, player, silver_df, method='silver', N=20000)
 
 # Convert the probabilities to a DataFrame for better readability
 df = pd.DataFrame(probs.items(), columns=['Team', 'Probability'])
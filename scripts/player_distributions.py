@@ -0,0 +1,137 @@
+import numpy as np
+from scipy.stats import norm
+
+# Per-player distributions of the points scored in one game. A player's gamelog is compiled into
+# a table of N_QUANTILES quantiles, shrunk toward the Normal(ppg, ppg / 5) clipped at zero that
+# simulate_player_pts assumes when there is no gamelog. For the batch engine the tables are
+# expanded into TABLE_SIZE equally likely values, so drawing a score is a uniform draw and one
+# table read (inverse CDF sampling) and any number of player-games are drawn in one call.
+
+N_QUANTILES = 64
+# Probability of each quantile knot: interval midpoints, so the normal's knots are finite
+KNOTS = (np.arange(N_QUANTILES) + 0.5) / N_QUANTILES
+# Equally likely values per player in the batch engine's sampling tables
+TABLE_SIZE = 1024
+# Weight of the parametric prior, in games, when it is blended with a player's gamelog
+PRIOR_GAMES = 8
+
+def normal_quantiles(ppg):
+    '''
+    Quantile tables of Normal(ppg, ppg / 5) clipped at zero. Missing ppg counts as zero.
+
+    Args:
+        ppg (array-like): (n,) points per game.
+
+    Returns:
+        np.ndarray: (n, N_QUANTILES) quantile tables.
+    '''
+    ppg = np.nan_to_num(np.atleast_1d(np.asarray(ppg, dtype=np.float64)))
+    return np.maximum(ppg[:, None] * (1 + norm.ppf(KNOTS) / 5), 0)
+
+def fit_quantiles(game_pts, ppg, prior_games=PRIOR_GAMES):
+    '''
+    Quantile table of a player's points per game, fitted from their gamelog.
+
+    The empirical quantiles are averaged with the normal prior's, the gamelog weighted by
+    n / (n + prior_games), so a player with a handful of games stays close to the prior.
+
+    Args:
+        game_pts (array-like): Points scored in each game (NaN for games not played).
+        ppg (float): Season points per game, the prior's mean.
+        prior_games (float): Games' worth of weight given to the prior.
+
+    Returns:
+        np.ndarray: (N_QUANTILES,) quantile table.
+    '''
+    game_pts = np.asarray(game_pts, dtype=np.float64)
+    game_pts = game_pts[~np.isnan(game_pts)]
+    prior = normal_quantiles(ppg)[0]
+    if len(game_pts) == 0:
+        return prior
+    weight = len(game_pts) / (len(game_pts) + prior_games)
+    # Hazen quantiles sit at the same midpoint probabilities, which keeps the gamelog's mean
+    return weight * np.quantile(game_pts, KNOTS, method='hazen') + (1 - weight) * prior
+
+def stats_quantiles(player_stats):
+    '''
+    Quantile table of a player's stats dict: the compiled 'pts_quantiles' if present, else one
+    fitted from 'game_pts', else the normal prior.
+    '''
+    if player_stats.get('pts_quantiles') is not None:
+        return np.asarray(player_stats['pts_quantiles'], dtype=np.float64)
+    return fit_quantiles(player_stats.get('game_pts', []), player_stats['ppg'])
+
+def has_gamelog(player_stats):
+    return player_stats.get('pts_quantiles') is not None or len(player_stats.get('game_pts', [])) > 0
+
+def compile_distributions(players_dict):
+    '''
+    Copy of the nested {team: {player: stats}} dict in which every player with a gamelog has
+    its compiled 'pts_quantiles', so the object engine fits each table only once.
+    '''
+    compiled = {}
+    for team, roster in players_dict.items():
+        compiled[team] = {}
+        for player, stats in roster.items():
+            if isinstance(stats, dict) and has_gamelog(stats):
+                stats = dict(stats, pts_quantiles=stats_quantiles(stats))
+            compiled[team][player] = stats
+    return compiled
+
+def quantile_points(quantiles, probs):
+    '''
+    Inverse CDF of quantile tables at the given probabilities: linear interpolation between the
+    knots, clamped to the outer knots in the tails (like np.interp over KNOTS).
+
+    Returns:
+        np.ndarray: (n, len(probs)) points.
+    '''
+    quantiles = np.asarray(quantiles)
+    n_knots = quantiles.shape[1]
+    position = np.clip(np.asarray(probs) * n_knots - 0.5, 0, n_knots - 1)
+    lower = np.minimum(position.astype(np.intp), n_knots - 2)
+    return quantiles[:, lower] + (position - lower) * (quantiles[:, lower + 1] - quantiles[:, lower])
+
+def sampling_tables(quantiles):
+    '''
+    Expands quantile tables into TABLE_SIZE equally likely values each, the inverse CDF at the
+    midpoints of TABLE_SIZE equal-probability cells. The cells split every interval between
+    knots evenly, so a table's mean is exactly its distribution's.
+
+    Returns:
+        np.ndarray: (n, TABLE_SIZE) float32 tables for sample_tables.
+    '''
+    cells = (np.arange(TABLE_SIZE) + 0.5) / TABLE_SIZE
+    return quantile_points(quantiles, cells).astype(np.float32)
+
+def sample_tables(tables, offsets, u):
+    '''
+    Draws points from sampling tables, one table read per draw.
+
+    Args:
+        tables (np.ndarray): (n, TABLE_SIZE) tables from sampling_tables.
+        offsets (np.ndarray): Row of each draw's table times TABLE_SIZE (int32), any shape.
+        u (np.ndarray): Uniform [0, 1) float32 draws, same shape as offsets.
+
+    Returns:
+        np.ndarray: Sampled points, same shape as offsets.
+    '''
+    index = (u * np.float32(TABLE_SIZE)).astype(np.int32)
+    index += offsets
+    return tables.ravel()[index]
+
+def quantile_moments(quantiles):
+    '''
+    Exact mean and variance of the distributions quantile tables describe (the sampling tables
+    match the mean exactly and the variance up to their discretization).
+
+    Each interval between knots holds 1 / n of the probability with points uniform between
+    its two knots, and each tail holds 1 / (2n) at the outer knot.
+    '''
+    quantiles = np.asarray(quantiles, dtype=np.float64)
+    n_knots = quantiles.shape[1]
+    lower, upper = quantiles[:, :-1], quantiles[:, 1:]
+    mean = quantiles.mean(axis=1)
+    second_moment = ((lower ** 2 + lower * upper + upper ** 2).sum(axis=1) / 3
+                     + (quantiles[:, 0] ** 2 + quantiles[:, -1] ** 2) / 2) / n_knots
+    return mean, second_moment - mean ** 2
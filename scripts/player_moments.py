@@ -0,0 +1,64 @@
+import numpy as np
+import pandas as pd
+from scipy.stats import norm
+from batch_engine import compile_bracket_ratings, player_inputs, player_quantiles
+from player_distributions import quantile_moments
+from exact_bracket import games_played_moments
+
+def game_pts_moments(ppg):
+    '''
+    Mean and variance of one game's points as drawn by simulate_player_pts, i.e. a
+    Normal(ppg, ppg / 5) clipped at zero. Missing ppg counts as zero, like the simulation.
+    '''
+    ppg = np.nan_to_num(np.asarray(ppg, dtype=float))
+    sd = ppg / 5
+    z = np.divide(ppg, sd, out=np.zeros_like(ppg), where=sd > 0)
+
+    mean = ppg * norm.cdf(z) + sd * norm.pdf(z)
+    second_moment = (ppg ** 2 + sd ** 2) * norm.cdf(z) + ppg * sd * norm.pdf(z)
+    return mean, second_moment - mean ** 2
+
+def player_moments(matchups_dict, players_dict, ratings_df, method):
+    '''
+    Exact mean, variance and covariance of every player's fantasy points, with no simulation.
+
+    A player's total is multiplier * (sum of per-game points over the games their team plays),
+    with independent per-game draws. So for players i, j on teams a, b with per-game mean mu and
+    variance var:
+        E[T_i] = m_i * mu_i * E[G_a]
+        Cov(T_i, T_j) = m_i * m_j * mu_i * mu_j * Cov(G_a, G_b) (+ m_i^2 * var_i * E[G_a] when i == j)
+    which covers teammates (a == b) and teams that can knock each other out.
+
+    Returns:
+        table (pd.DataFrame): One row per player in bracket slot order with the expected games
+            played, mean, variance and standard deviation of their total.
+        cov (np.ndarray): (n_players, n_players) covariance matrix in the same order as table.
+    '''
+    ratings = compile_bracket_ratings(matchups_dict, ratings_df, method)
+    games_mean, games_cov = games_played_moments(ratings.wp, ratings.schedule)
+
+    players, slots, ppg, multiplier = player_inputs(ratings.teams, players_dict)
+    ppg = np.asarray(ppg, dtype=float)
+    multiplier = np.asarray(multiplier, dtype=float)
+
+    quantiles = player_quantiles(ratings.teams, players_dict)
+    pts_mean, pts_var = game_pts_moments(ppg) if quantiles is None else quantile_moments(quantiles)
+    per_game = multiplier * pts_mean
+
+    mean = per_game * games_mean[slots]
+    cov = np.outer(per_game, per_game) * games_cov[np.ix_(slots, slots)]
+    cov[np.diag_indices_from(cov)] += multiplier ** 2 * pts_var * games_mean[slots]
+
+    table = pd.DataFrame({
+        'Team': [team for _, team, _ in players],
+        'Player': [player for _, _, player in players],
+        'Seed': [ratings.teams[slot].seed for slot in slots],
+        'Multiplier': multiplier.astype(int),
+        'PPG': ppg,
+        'Games Played': games_mean[slots],
+        'Mean': mean,
+        'Variance': np.diag(cov).copy(),
+    })
+    table['SD'] = np.sqrt(table['Variance'])
+
+    return table, cov
@@ -0,0 +1,155 @@
+import os
+import ast
+import json
+import pickle
+import time
+import sqlite3
+
+# One SQLite file per season. Each team's roster is written in a single transaction as it is
+# scraped, so an interrupted load keeps every finished team and never leaves a half-written one.
+
+STORE_DIR = os.environ.get('MM_PLAYER_STORE_DIR', os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'data', 'players'))
+# Columns kept as real columns; any other per-player stats go in the JSON `extra` column
+PLAYER_COLUMNS = ['ppg', 'link', 'ground_truth_total']
+# What a Python repr of numpy scalars may contain besides literals
+REPR_CALLS = {'float64': float, 'float32': float, 'int64': int, 'int32': int}
+REPR_NAMES = {'nan': float('nan'), 'inf': float('inf')}
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS teams (
+    team TEXT PRIMARY KEY,
+    link TEXT,
+    loaded_at REAL
+);
+CREATE TABLE IF NOT EXISTS players (
+    team TEXT NOT NULL REFERENCES teams(team) ON DELETE CASCADE,
+    player TEXT NOT NULL,
+    ppg REAL,
+    link TEXT,
+    ground_truth_total REAL,
+    extra TEXT,
+    PRIMARY KEY (team, player)
+);
+'''
+
+class PlayerStore:
+    '''
+    Per-year store of team rosters.
+
+    Args:
+        year (int): The season.
+        path (str): Database file, STORE_DIR/player_data_{year}.sqlite by default.
+    '''
+    def __init__(self, year, path=None):
+        self.year = year
+        self.path = path or os.path.join(STORE_DIR, f'player_data_{year}.sqlite')
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        self.conn = sqlite3.connect(self.path)
+        self.conn.execute('PRAGMA foreign_keys = ON')
+        self.conn.execute('PRAGMA journal_mode = WAL')
+        self.conn.executescript(SCHEMA)
+
+    def close(self):
+        self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def teams(self):
+        return {team for team, in self.conn.execute('SELECT team FROM teams')}
+
+    def upsert_team(self, team, roster, link=None):
+        '''
+        Replaces one team's roster atomically.
+
+        Args:
+            team (str): Team name as in the bracket.
+            roster (dict): Player name -> stats dict, as from load_player_data_for_team.
+            link (str): The team's SR link.
+        '''
+        rows = []
+        for player, stats in roster.items():
+            # skip stray team-level entries such as 'ground_truth_total'
+            if not isinstance(stats, dict):
+                continue
+            extra = {k: v for k, v in stats.items() if k not in PLAYER_COLUMNS and k != 'running_total_simulated'}
+            rows.append((team, player, *(to_sql(stats.get(col)) for col in PLAYER_COLUMNS),
+                         json.dumps(extra, default=to_sql) if extra else None))
+
+        with self.conn:
+            self.conn.execute('DELETE FROM players WHERE team = ?', (team,))
+            self.conn.execute('INSERT OR REPLACE INTO teams VALUES (?, ?, ?)', (team, link, time.time()))
+            self.conn.executemany('INSERT INTO players VALUES (?, ?, ?, ?, ?, ?)', rows)
+
+    def load(self):
+        '''
+        Returns every stored roster as the nested {team: {player: stats}} dict the simulations take.
+        '''
+        player_data = {team: {} for team in self.teams()}
+        for team, player, ppg, link, ground_truth_total, extra in self.conn.execute('SELECT * FROM players'):
+            # sqlite stores NaN as NULL
+            stats = {'ppg': float('nan') if ppg is None else ppg, 'running_total_simulated': 0, 'link': link}
+            if ground_truth_total is not None:
+                stats['ground_truth_total'] = ground_truth_total
+            if extra:
+                stats.update(json.loads(extra))
+            player_data[team][player] = stats
+        return player_data
+
+    def missing_teams(self, team_links):
+        '''
+        Teams of the bracket (name -> link, as from bracket_team_links) that have no stored roster.
+        '''
+        stored = self.teams()
+        return {team: link for team, link in team_links.items() if team not in stored}
+
+    def is_complete(self, team_links):
+        return not self.missing_teams(team_links)
+
+    def import_pickle(self, path):
+        '''
+        Imports a player_data pickle written by older versions of load_player_data.
+        '''
+        with open(path, 'rb') as f:
+            player_data = pickle.load(f)
+        for team, roster in player_data.items():
+            self.upsert_team(team, roster)
+        return len(player_data)
+
+def read_repr(path):
+    '''
+    Reads a file holding the Python repr of nested dicts, lists and numbers, which may include
+    numpy scalars (np.float64(87.0)) and nan. Nothing in the file is executed: anything else
+    raises a ValueError.
+    '''
+    def value(node):
+        if isinstance(node, ast.Constant):
+            return node.value
+        if isinstance(node, ast.Dict):
+            return {value(key): value(item) for key, item in zip(node.keys, node.values)}
+        if isinstance(node, (ast.List, ast.Tuple)):
+            items = [value(item) for item in node.elts]
+            return items if isinstance(node, ast.List) else tuple(items)
+        if isinstance(node, ast.UnaryOp) and isinstance(node.op, (ast.USub, ast.UAdd)):
+            number = value(node.operand)
+            return -number if isinstance(node.op, ast.USub) else number
+        if isinstance(node, ast.Name) and node.id in REPR_NAMES:
+            return REPR_NAMES[node.id]
+        if (isinstance(node, ast.Call) and isinstance(node.func, ast.Attribute) and isinstance(node.func.value, ast.Name)
+                and node.func.value.id in ('np', 'numpy') and node.func.attr in REPR_CALLS and len(node.args) == 1 and not node.keywords):
+            return REPR_CALLS[node.func.attr](value(node.args[0]))
+        raise ValueError(f"Unexpected {type(node).__name__} at line {getattr(node, 'lineno', '?')} of {path}.")
+
+    with open(path) as f:
+        return value(ast.parse(f.read(), path, mode='eval').body)
+
+def to_sql(value):
+    # numpy scalars (e.g. summed gamelog points) aren't valid sqlite parameters
+    if hasattr(value, 'item'):
+        value = value.item()
+    if isinstance(value, float) and value != value:
+        return None
+    return value
@@ -1,6 +1,6 @@
-from collections import deque
 from simulate_game import simulate_game, handle_player_bookkeeping_for_team
 from matchup import Matchup
+from bracket import compile_bracket
 
 class Node:
     def __init__(self, matchup=None, left=None, right=None, parent=None):
@@ -13,119 +13,100 @@ class Node:
     def is_leaf(self):
         return self.left is None and self.right is None
 
+def play_schedule(schedule, ratings_df, method, player_bk_dict, player_bk_used=True):
+    '''
+    Plays every game of a compiled bracket (see bracket.compile_bracket) in schedule order.
+    Play-in games decide who goes on but give the players no points and don't count in the
+    teams' games_played.
+
+    Returns:
+        list: The winning Team of every game, in schedule order (the final is last).
+    '''
+    # start the teams afresh in case the schedule has been played before
+    for team in schedule.teams:
+        team.games_played = 0
+        team.game_points = None
+
+    # the schedule's node layout: game winners, then the teams
+    entrants = [None] * schedule.n_games + schedule.teams
+    for game, (left, right) in enumerate(schedule.pairs):
+        team1, team2 = entrants[left], entrants[right]
+        # ratings that move with simulated results (CompiledRatings.updating) are updated in simulate_game
+        entrants[game] = simulate_game(team1, team2, ratings_df, method)
+
+        if schedule.play_in[game]:
+            # play-in games don't count
+            team1.games_played -= 1
+            team2.games_played -= 1
+        elif player_bk_used:
+            # players score in every game their team plays; include seed multiplier
+            handle_player_bookkeeping_for_team(player_bk_dict, team1)
+            handle_player_bookkeeping_for_team(player_bk_dict, team2)
+
+    return entrants[:schedule.n_games]
+
+def game_node(schedule, winners, game):
+    '''
+    Node of a played game with its matchup, winner and children, built on demand.
+    '''
+    def child(column):
+        if column < schedule.n_games:
+            return game_node(schedule, winners, column), winners[column]
+        return None, schedule.teams[column - schedule.n_games]
+
+    left, team1 = child(schedule.left[game])
+    right, team2 = child(schedule.right[game])
+    node = Node(matchup=Matchup(team1, team2), left=left, right=right)
+    node.winner = winners[game]
+    for branch in (left, right):
+        if branch is not None:
+            branch.parent = node
+    return node
+
+def print_bracket(node, indent=""):
+    '''
+    Prints a played bracket from its final game node, winners in green.
+    '''
+    green_color = "\033[92m"
+    reset_color = "\033[0m"
+    for team, branch, last in ((node.matchup.team1, node.left, False), (node.matchup.team2, node.right, True)):
+        name = f"{green_color}{team}{reset_color}" if node.winner == team else str(team)
+        print(indent + ("└──" if last else "├──") + name)
+        if branch is not None:
+            print_bracket(branch, indent + ("    " if last else "│   "))
+
 class Region:
+    '''
+    One region simulated on its own: a small tournament compiled from its first round matchups.
+    '''
     def __init__(self, matchups):
-        if len(matchups) > 0:
-            self.matchup_q = deque(self.parse_matchups_into_nodes(matchups))
-        else:
-            self.matchup_q = deque()
-        self.championship = None
+        self.matchups = matchups
+        self.schedule = compile_bracket({'regions': {'region': matchups}})
+        self.winners = None
 
-    def parse_matchups_into_nodes(self, matchups_list):
+    def sim_region(self, ratings_df, player_bk_dict, method, player_bk_used=True):
         '''
-        Takes a list of matchups and creates a tree of matchups.
+        Starting from initial matchups, sims a region of the tournament.
         '''
-        nodes = []
-        for matchup in matchups_list:
-            # Parse the matchup and create a Matchup object
-            Matchup_obj = Matchup.parse_matchup(matchup)
-            # Create a Node object for the matchup
-            node = Node(matchup=Matchup_obj)
-            nodes.append(node)
-        
-        return nodes
+        self.winners = play_schedule(self.schedule, ratings_df, method, player_bk_dict, player_bk_used)
 
-    def sim_region(self, ratings_df, player_bk_dict, method, player_bk_used=True):
+    @property
+    def champion(self):
+        return self.winners[-1]
+
+    @property
+    def championship(self):
         '''
-        Starting from initial matchups, sims a region of the tournament.
+        The region final as a Node, whose children lead back through the earlier games.
         '''
-        # east plays west and south plays midwest in final four, so process east, west, south, midwest in that order
-        # could start simulations in parallel when you add games to the queue
-        while len(self.matchup_q) >= 2:
-            game1 = self.matchup_q.popleft()  # pop the first game
-            game2 = self.matchup_q.popleft()  # pop the second game
-
-            # simulate those two games and do appropriate calculation and bookkeeping
-            # uncertainty could be here in terms of player score (use reg. season to make distribution?)
-            # simulation will lead to uncertainty in game outcomes
-            
-            game1winner = simulate_game(game1.matchup.team1, game1.matchup.team2, ratings_df, method)
-            game1.winner = game1winner
-            
-            game2winner = simulate_game(game2.matchup.team1, game2.matchup.team2, ratings_df, method)
-            game2.winner = game2winner
-
-            if player_bk_used:
-                # Handle player bookkeeping for game 1; include seed multiplier
-                handle_player_bookkeeping_for_team(player_bk_dict, game1.matchup.team1)
-                handle_player_bookkeeping_for_team(player_bk_dict, game1.matchup.team2)
-                
-                # Handle player bookkeeping for game 2; include seed multiplier
-                handle_player_bookkeeping_for_team(player_bk_dict, game2.matchup.team1)
-                handle_player_bookkeeping_for_team(player_bk_dict, game2.matchup.team2)
-
-            # TODO: Update team ratings based on simulated game outcomes
-
-            # create new Game object with the winner of those two games
-            new_game = Node(matchup=Matchup(game1winner, game2winner))
-            
-            # set the left and right children of the new game
-            new_game.left = game1
-            new_game.right = game2
-            
-            # mark the game as the parent of the other two games
-            game1.parent = new_game
-            game2.parent = new_game
-
-            # add the new game to queue
-            self.matchup_q.append(new_game)
-        
-        # sim championship
-        if len(self.matchup_q) == 1:
-            final_game = self.matchup_q.popleft()
-            champ = simulate_game(final_game.matchup.team1, final_game.matchup.team2, ratings_df, method)
-            
-            final_game.winner = champ
-        
-            self.championship = final_game
-        else:
-            raise Exception("Error: Region simulation did not end with a single championship game.")
-    
+        return game_node(self.schedule, self.winners, self.schedule.n_games - 1)
+
     def print_region(self):
         '''
         Prints the bracket in a readable format.
         '''
-        def print_node(node, indent=""):
-            if node is None:
-                return
-            
-            green_color = "\033[92m"
-            reset_color = "\033[0m"
-            
-            # If the node has children, print them in a bracket-like structure.
-            if node.is_leaf():
-                if node.winner == node.matchup.team1:
-                    print(indent + "├──" + f"{green_color}{node.matchup.team1}{reset_color}")
-                    print(indent + "└──" + str(node.matchup.team2))
-                else:
-                    print(indent + "├──" + str(node.matchup.team1))
-                    print(indent + "└──" + f"{green_color}{node.matchup.team2}{reset_color}")
-           
-            else:
-                # find winner of the game
-                if node.winner == node.matchup.team1:
-                    print(indent + "├──" + f"{green_color}{node.matchup.team1}{reset_color}")
-                    print_node(node.left, indent + "│   ")
-                    print(indent + "└──" + str(node.matchup.team2))
-                    print_node(node.right, indent + "    ")
-                else:
-                    print(indent + "├──" + str(node.matchup.team1))
-                    print_node(node.left, indent + "│   ")
-                    print(indent + "└──" + f"{green_color}{node.matchup.team2}{reset_color}")
-                    print_node(node.right, indent + "    ")
-                
-        print(self.championship.winner)
-        print_node(self.championship)
+        print(self.champion)
+        print_bracket(self.championship)
 
 if __name__ == "__main__":
     # Example usage
@@ -136,42 +117,30 @@ if __name__ == "__main__":
         print(matchup)
 
     
-    # Create a Region object with the matchups
+    # Load both sets of ratings
     silver_path = '../data/silver.csv'  # Replace with actual path
     silver_ratings = parse_silver_ratings(silver_path)
     kenpom_ratings = full_kenpom_pipeline(2025)  # Load KenPom ratings for the year
     print(silver_ratings.head())  # Print the silver ratings for verification
 
 
-    # Simulate the region with dummy ratings and player bookkeeping 1000 times
-    probs_of_champ_silver = {}
-    probs_of_champ_kenpom = {}
-    n = 5000
-    for _ in range(n):
-        region = Region(matchups)
-        region2 = Region(matchups)
-        region.sim_region(silver_ratings, {}, method='silver')
-        region2.sim_region(kenpom_ratings, {}, method='kenpom')
-        champ1 = region.championship.winner.team_name
-        champ2 = region2.championship.winner.team_name
-        if champ1 not in probs_of_champ_silver:
-            probs_of_champ_silver[champ1] = 1
-        else:
-            probs_of_champ_silver[champ1] += 1
-        if champ2 not in probs_of_champ_kenpom:
-            probs_of_champ_kenpom[champ2] = 1
-        else:
-            probs_of_champ_kenpom[champ2] += 1
+    # Simulate the region with both ratings. Same seed and sampling, so both methods play every
+    # game off the same Sobol uniforms and the differences between them aren't Monte Carlo noise
+    from simulate_tournament import simulate_n_tournaments
+    n = 2 ** 12
+    region = {'regions': {'south': matchups}}
+    probs_of_champ_silver, _ = simulate_n_tournaments(region, {}, silver_ratings, 'silver', N=n, engine='batch', seed=0, sampling='sobol')
+    probs_of_champ_kenpom, _ = simulate_n_tournaments(region, {}, kenpom_ratings, 'kenpom', N=n, engine='batch', seed=0, sampling='sobol')
 
     # Print the probabilities of each team winning the championship sorted by their chances
     sorted_probs = sorted(probs_of_champ_kenpom.items(), key=lambda x: x[1], reverse=True)
     print("Probabilities of each team winning the south region kenpom:")
     for team, prob in sorted_probs:
         # Print the team and its probability
-        print(f"{team}: {prob / n:.2%}")
+        print(f"{team}: {prob:.2%}")
 
     sorted_probs = sorted(probs_of_champ_silver.items(), key=lambda x: x[1], reverse=True)
     print("Probabilities of each team winning the south region silver:")
     for team, prob in sorted_probs:
         # Print the team and its probability
-        print(f"{team}: {prob / n:.2%}")
+        print(f"{team}: {prob:.2%}")
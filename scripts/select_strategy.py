@@ -1,5 +1,9 @@
+import numpy as np
+import pandas as pd
 import matplotlib.pyplot as plt
 import seaborn as sns
+from scipy import sparse
+from sim_results import SimResults
 
 def score_strategy(strategy, sims):
     '''
@@ -7,11 +11,16 @@ def score_strategy(strategy, sims):
 
     Args:
         strategy (list): A list of (team, player) tuples representing the players chosen
-        sims (list): A list of *n* Tournament objects representing *n* simulated tournaments
+        sims (list or SimResults): A list of *n* Tournament objects representing *n* simulated tournaments,
+            or the SimResults of a batch run
     
     Returns:
         scores (list): A list of scores for this strategy across the *n* simulations run
+            (a numpy array when sims is a SimResults)
     '''
+    if isinstance(sims, SimResults):
+        return sims.strategy_scores(strategy)
+
     scores = []
     for sim in sims:
         # extract score for strategy for the sim
@@ -25,6 +34,85 @@ def score_strategy(strategy, sims):
 
     return scores
 
+def strategies_to_selection(strategies, sims):
+    '''
+    Builds the sparse (S x P) selection matrix for a list of strategies.
+
+    Args:
+        strategies (list): S strategies, each a list of (team, player) tuples
+        sims (SimResults): Simulation results whose player columns the matrix refers to
+    
+    Returns:
+        selection (scipy.sparse.csr_matrix): 1 where a strategy picks a player column
+    '''
+    cols = [sims.columns(strategy) for strategy in strategies]
+    rows = np.repeat(np.arange(len(strategies)), [len(c) for c in cols])
+    data = np.ones(len(rows), dtype=np.float32)
+    return sparse.csr_matrix((data, (rows, np.concatenate(cols))), shape=(len(strategies), len(sims.players)))
+
+def player_covariance(sims, chunk_size=10000):
+    '''
+    Mean vector and covariance matrix of the simulated player totals, accumulated in float64
+    over chunks of simulations.
+    '''
+    totals = sims.totals
+    mean = totals.mean(axis=0, dtype=np.float64)
+    cov = np.zeros((totals.shape[1], totals.shape[1]))
+    for start in range(0, len(totals), chunk_size):
+        centered = totals[start:start + chunk_size] - mean.astype(np.float32)
+        cov += (centered.T @ centered).astype(np.float64)
+    return mean, cov / max(len(totals) - 1, 1)
+
+def score_strategies(selection, sims, summary=False, quantiles=(), max_cells=5 * 10 ** 7):
+    '''
+    Scores many strategies against every simulation at once as a single matrix product.
+
+    Args:
+        selection (np.ndarray or scipy.sparse matrix or list): (S x P) boolean/0-1 selection of
+            player columns, or a list of strategies for strategies_to_selection
+        sims (SimResults): Simulation results with an (N x P) player totals array
+        summary (bool): If True, return summary stats per strategy instead of every score
+        quantiles (tuple): Quantiles to include in the summary. These need the actual scores, which
+            are computed max_cells at a time; the mean and std come from the player covariance
+            matrix and cost nothing per simulation
+        max_cells (int): Memory budget, in scores, for each block of strategies in summary mode
+    
+    Returns:
+        scores (np.ndarray): (S x N) float32 scores, or with summary=True a DataFrame with the
+            mean, standard deviation and requested quantiles of each strategy's score
+    '''
+    if isinstance(selection, list):
+        selection = strategies_to_selection(selection, sims)
+    selection = sparse.csr_matrix(selection, dtype=np.float32)
+
+    # (P x N) so that each block product reads whole contiguous player rows
+    totals = np.ascontiguousarray(sims.totals.T)
+
+    if not summary:
+        return np.asarray(selection @ totals)
+
+    # a strategy's score is a sum of player totals, so Var = sum of the covariances of its players
+    mean, cov = player_covariance(sims)
+    selection64 = selection.astype(np.float64)
+    n_strategies = selection.shape[0]
+    variance = np.empty(n_strategies)
+    block = max(1, max_cells // max(len(sims.players), 1))
+    for start in range(0, n_strategies, block):
+        rows = selection64[start:start + block]
+        variance[start:start + block] = np.asarray(rows.multiply(rows @ cov).sum(axis=1)).ravel()
+
+    stats = {'mean': selection64 @ mean, 'std': np.sqrt(np.maximum(variance, 0))}
+    if quantiles:
+        for q in quantiles:
+            stats[f'q{round(q * 100)}'] = np.empty(n_strategies)
+        block = max(1, max_cells // max(len(sims), 1))
+        for start in range(0, n_strategies, block):
+            scores = np.asarray(selection[start:start + block] @ totals)
+            for q, values in zip(quantiles, np.quantile(scores, quantiles, axis=1)):
+                stats[f'q{round(q * 100)}'][start:start + block] = values
+
+    return pd.DataFrame(stats)
+
 def visualize_strategies(scores):
     # histograms and legend
     # maybe dots w/ sd and plot w different y values based on height
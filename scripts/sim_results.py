@@ -0,0 +1,110 @@
+import numpy as np
+from batch_engine import games_played, advancement_counts, champion_probs_from_winners
+from team_registry import team_registry
+from bracket import balanced_schedule
+
+class SimResults:
+    '''
+    Compact, array-backed results of N simulated tournaments.
+
+    Instead of keeping a Tournament (and a deep copy of the roster dict) per simulation, the
+    winners of each game are stored as a small-int (N, n_games) array and every player's
+    simulated total as one column of a float32 (N, n_players) array.
+    '''
+    def __init__(self, teams, players, winners, totals=None, schedule=None):
+        '''
+        Args:
+            teams (list): Team objects in bracket slot order.
+            players (list): (slot, team_name, player_name) tuples, see batch_engine.bracket_players.
+            winners (np.ndarray): (N, n_games) winning slot indices, see batch_engine.simulate_batch.
+            totals (np.ndarray): (N, n_players) simulated fantasy points totals.
+            schedule (Schedule): The compiled bracket, by default the layout in which adjacent
+                slots meet.
+        '''
+        self.teams = teams
+        self.schedule = schedule if schedule is not None else balanced_schedule(teams)
+        self.team_ids = team_registry().ids([team.team_name for team in teams], 'bracket team')
+        self.players = [(team, player) for _, team, player in players]
+        self.player_slots = np.array([slot for slot, _, _ in players], dtype=np.int8)
+        # keyed by (team ID, player name), so strategies can name teams as any source does
+        self.player_index = {(int(self.team_ids[slot]), player): col for col, (slot, _, player) in enumerate(players)}
+        self.winners = winners
+        if totals is None:
+            totals = np.zeros((winners.shape[0], len(self.players)), dtype=np.float32)
+        self.totals = totals
+
+    def __len__(self):
+        return self.winners.shape[0]
+
+    def __getitem__(self, i):
+        return SimView(self, i)
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield SimView(self, i)
+
+    def player_totals(self, team, player):
+        '''
+        Simulated totals of one player across all simulations.
+        '''
+        return self.totals[:, self.columns([(team, player)])[0]]
+
+    def columns(self, strategy):
+        '''
+        Column indices of a list of (team, player) tuples, where team is a name from any source
+        or a team ID. Raises a KeyError listing every pick that isn't a simulated player.
+        '''
+        registry = team_registry()
+        keys = [(team if isinstance(team, (int, np.integer)) else registry.resolve(team), player) for team, player in strategy]
+        missing = [pick for pick, key in zip(strategy, keys) if key not in self.player_index]
+        if missing:
+            raise KeyError(f"Not simulated players: {', '.join(f'{player} ({team})' for team, player in missing)}")
+        return np.array([self.player_index[(int(team_id), player)] for team_id, player in keys], dtype=int)
+
+    def strategy_scores(self, strategy):
+        '''
+        Total points of a list of (team, player) tuples in every simulation.
+        '''
+        return self.totals[:, self.columns(strategy)].sum(axis=1, dtype=np.float64)
+
+    def champions(self):
+        '''
+        Slot index of the champion in every simulation.
+        '''
+        return self.winners[:, -1]
+
+    def champion_probs(self):
+        return champion_probs_from_winners(self.winners, self.teams)
+
+    def games_played(self):
+        return games_played(self.winners, self.schedule)
+
+    def advancement_probs(self):
+        return advancement_counts(self.winners, self.schedule) / len(self)
+
+    def bookkeeping(self, i):
+        '''
+        Nested team -> player -> stats dict for simulation i, in the shape of
+        Tournament.players_bookkeeping.
+        '''
+        bk = {}
+        for (team, player), total in zip(self.players, self.totals[i]):
+            bk.setdefault(team, {})[player] = {'running_total_simulated': float(total)}
+        return bk
+
+class SimView:
+    '''
+    Read-only view of one simulation, standing in for a Tournament in code that reads
+    sim.players_bookkeeping.
+    '''
+    def __init__(self, results, i):
+        self.results = results
+        self.i = i
+
+    @property
+    def players_bookkeeping(self):
+        return self.results.bookkeeping(self.i)
+
+    @property
+    def champion(self):
+        return self.results.teams[self.results.winners[self.i, -1]]
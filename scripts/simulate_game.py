@@ -1,23 +1,21 @@
 import numpy as np
 from scipy.stats import norm
 from load_team_data import full_kenpom_pipeline
-from constants import PP_TO_SILVER_MAP, sr_to_kenpom, sr_to_silver
+from team_registry import team_registry
+from compiled_ratings import CompiledRatings
+from instrument import stage, count
+from player_distributions import KNOTS
+from tempo_model import POSSESSIONS_SD, usage_split, split_team_points
+
+def team_ratings(team1, team2, ratings_df, method):
+    # Resolve both names through the team registry, whichever way the ratings source spells them
+    count('rating lookups')
+    team_ids = team_registry().ids([team1.team_name, team2.team_name], 'bracket team')
+    return CompiledRatings.resolve_ratings(team_ids, ratings_df, method)
 
 def wp_kenpom(team1, team2, ratings_df, sd=11):
     # Extract ratings for each team in the matchup
-    # First, check if team name is in the kenpom teams
-    if team1.team_name not in ratings_df['Team'].values:
-        team1_kp = sr_to_kenpom[team1.team_name]
-    else:
-        team1_kp = team1.team_name
-    
-    if team2.team_name not in ratings_df['Team'].values:
-        team2_kp = sr_to_kenpom[team2.team_name]
-    else:
-        team2_kp = team2.team_name
-        
-    rating1 = ratings_df[ratings_df['Team'] == team1_kp]['NetRtg'].values[0]
-    rating2 = ratings_df[ratings_df['Team'] == team2_kp]['NetRtg'].values[0]
+    rating1, rating2 = team_ratings(team1, team2, ratings_df, 'kenpom')
     rating_diff = float(rating1) - float(rating2)
 
     # Calculate the probability of team1 winning
@@ -29,26 +27,8 @@ def wp_kenpom(team1, team2, ratings_df, sd=11):
     return prob_team1_wins
 
 def wp_silver(team1, team2, ratings_df, sd=11):
-
-    if team1.team_name not in ratings_df['Team'].values:
-        if team1.team_name in sr_to_silver:
-            team1_silver = sr_to_silver[team1.team_name]
-        else:
-            team1_silver = PP_TO_SILVER_MAP[team1.team_name]
-    else:
-        team1_silver = team1.team_name
-    if team2.team_name not in ratings_df['Team'].values:
-        if team2.team_name in sr_to_silver:
-            team2_silver = sr_to_silver[team2.team_name]
-        else:
-            team2_silver = PP_TO_SILVER_MAP[team2.team_name]
-    else:
-        team2_silver = team2.team_name
-
-    # Extract the ratings for each team
     # Get the 'Quasi-Sagarin' rating for each team
-    team1_rating = ratings_df.loc[ratings_df['Team'] == team1_silver, 'Quasi-Sagarin'].values[0]
-    team2_rating = ratings_df.loc[ratings_df['Team'] == team2_silver, 'Quasi-Sagarin'].values[0]
+    team1_rating, team2_rating = team_ratings(team1, team2, ratings_df, 'silver')
     
     rating_diff = team1_rating - team2_rating
     prob_team_1_wins = norm.cdf(rating_diff / sd)
@@ -59,9 +39,11 @@ def wp_silver(team1, team2, ratings_df, sd=11):
 
 def simulate_game_kenpom(team1, team2, kenpom_ratings_df):
     # Calculate the probability of team1 winning
-    prob_team1_wins = wp_kenpom(team1, team2, kenpom_ratings_df)
+    with stage('win prob lookup'):
+        prob_team1_wins = wp_kenpom(team1, team2, kenpom_ratings_df)
 
     # Simulate the game based on the probability
+    count('game draws')
     if np.random.rand() < prob_team1_wins:
         return team1
     else:
@@ -69,14 +51,62 @@ def simulate_game_kenpom(team1, team2, kenpom_ratings_df):
     
 def simulate_game_silver(team1, team2, silver_ratings_df):
     # Calculate the probability of team1 winning
-    prob_team1_wins = wp_silver(team1, team2, silver_ratings_df)
+    with stage('win prob lookup'):
+        prob_team1_wins = wp_silver(team1, team2, silver_ratings_df)
+
+    # Simulate the game based on the probability
+    count('game draws')
+    if np.random.rand() < prob_team1_wins:
+        return team1
+    else:
+        return team2
+
+def simulate_game_compiled(team1, team2, compiled_ratings):
+    # Read the probability of team1 winning from the precomputed matrix
+    with stage('win prob lookup'):
+        prob_team1_wins = compiled_ratings.win_prob(team1, team2)
 
     # Simulate the game based on the probability
+    count('game draws')
     if np.random.rand() < prob_team1_wins:
         return team1
     else:
         return team2
     
+def simulate_game_updating(team1, team2, compiled_ratings):
+    # Draw the margin from the current ratings, then move both ratings by the surprise in it
+    i, j = compiled_ratings.index[team1.team_name], compiled_ratings.index[team2.team_name]
+    count('game draws')
+    shift = compiled_ratings.shift
+    surprise = compiled_ratings.sd * np.random.randn()
+    margin = compiled_ratings.ratings[i] + shift[i] - compiled_ratings.ratings[j] - shift[j] + surprise
+    shift[i] += compiled_ratings.update_k * surprise
+    shift[j] -= compiled_ratings.update_k * surprise
+
+    if margin > 0:
+        return team1
+    else:
+        return team2
+
+def simulate_game_tempo(team1, team2, compiled_ratings):
+    # Draw the game's possessions and both teams' points, and keep the points for the players
+    i, j = compiled_ratings.index[team1.team_name], compiled_ratings.index[team2.team_name]
+    count('game draws', 3)
+    possessions = compiled_ratings.possessions[i, j] + POSSESSIONS_SD * np.random.randn()
+    noise1, noise2 = compiled_ratings.points_sd * np.random.randn(2)
+    # half of any rating shift goes to each team's points, like a change in their margin
+    edge = 0 if compiled_ratings.shift is None else (compiled_ratings.shift[i] - compiled_ratings.shift[j]) / 2
+    team1.game_points = max(0, possessions * compiled_ratings.ppp[i, j] + edge + noise1)
+    team2.game_points = max(0, possessions * compiled_ratings.ppp[j, i] - edge + noise2)
+    if compiled_ratings.shift is not None:
+        compiled_ratings.shift[i] += compiled_ratings.update_k * (noise1 - noise2)
+        compiled_ratings.shift[j] -= compiled_ratings.update_k * (noise1 - noise2)
+
+    if team1.game_points > team2.game_points:
+        return team1
+    else:
+        return team2
+
 def simulate_game(team1, team2, ratings_df, method):
     """
     Simulate a game between two teams using either KenPom or Silver ratings.
@@ -84,47 +114,82 @@ def simulate_game(team1, team2, ratings_df, method):
     Args:
         team1 (Team): The first team.
         team2 (Team): The second team.
-        kenpom_ratings_df (pd.DataFrame): DataFrame containing KenPom ratings.
-        silver_ratings_df (pd.DataFrame): DataFrame containing Silver ratings.
-        method (str): The method to use for simulation ('kenpom' or 'silver').
+        ratings_df (pd.DataFrame or CompiledRatings): DataFrame containing KenPom or Silver ratings,
+            or ratings already compiled for the bracket teams.
+        method (str): The method to use for simulation ('kenpom', 'silver' or 'tempo'). With
+            'tempo' both teams' points are simulated from KenPom tempo and efficiencies and kept
+            on the teams' game_points, for the player bookkeeping. Ratings from
+            CompiledRatings.updating() are moved by the simulated result.
         
     Returns:
         Team: The winning team.
     """
     # Add to the games played for each team
+    count('games')
     team1.games_played += 1
     team2.games_played += 1
-    
-    if method == 'kenpom':
+
+    if method == 'tempo' and not isinstance(ratings_df, CompiledRatings):
+        # the score model needs league averages, so compile the pairing from the whole table
+        ratings_df = CompiledRatings([team1, team2], ratings_df, method)
+
+    if isinstance(ratings_df, CompiledRatings):
+        if ratings_df.method != method:
+            raise ValueError(f"Ratings were compiled for '{ratings_df.method}', not '{method}'.")
+        if method == 'tempo':
+            return simulate_game_tempo(team1, team2, ratings_df)
+        if ratings_df.shift is not None:
+            return simulate_game_updating(team1, team2, ratings_df)
+        return simulate_game_compiled(team1, team2, ratings_df)
+    elif method == 'kenpom':
         return simulate_game_kenpom(team1, team2, ratings_df)
     elif method == 'silver':
         return simulate_game_silver(team1, team2, ratings_df)
     else:
-        raise ValueError("Method must be either 'kenpom' or 'silver'.")
+        raise ValueError("Method must be one of 'kenpom', 'silver' or 'tempo'.")
 
-# TODO: SHOULD MAKE THE SIMULATION DATA-BASED INSTEAD OF ASSUMING NORMAL
-def simulate_player_pts(player_avg_pts, variance=None):
+def simulate_player_pts(player_avg_pts, variance=None, quantiles=None):
     """
     Simulate the points scored by a player in a game based on their average points and variance.
     
     Args:
         player_avg_pts (float): The average points scored by the player.
         variance (float): The variance in the player's scoring. Default is avg/5.
+        quantiles (np.ndarray): The player's fitted quantile table (see player_distributions),
+            sampled instead of the normal when given.
         
     Returns:
         float: The simulated points scored by the player.
     """
+    if quantiles is not None:
+        # inverse CDF, interpolating between the knots like player_distributions.quantile_points
+        return float(np.interp(np.random.rand(), KNOTS, quantiles))
     if variance is None:
         variance = player_avg_pts / 5
     return max(0, np.random.normal(player_avg_pts, variance))
 
 def handle_player_bookkeeping_for_team(player_bk_dict, winning_team_ref):
-    winning_team_multiplier = winning_team_ref.get_multiplier()
-    winning_team_dict = player_bk_dict[winning_team_ref.team_name]
-
-    # sample from player pts and add to running total, including seed multiplier
-    for player in winning_team_dict:
-        player_stats = winning_team_dict[player]
-        player_ppg = simulate_player_pts(player_stats['ppg'])
-        increment = player_ppg * winning_team_multiplier
-        player_stats['running_total_simulated'] += increment
+    with stage('player bookkeeping'):
+        winning_team_multiplier = winning_team_ref.get_multiplier()
+        winning_team_dict = player_bk_dict[winning_team_ref.team_name]
+        count('player draws', len(winning_team_dict))
+
+        if winning_team_ref.game_points is not None:
+            split_team_points_for_team(winning_team_dict, winning_team_ref.game_points, winning_team_multiplier)
+            return
+
+        # sample from player pts and add to running total, including seed multiplier
+        for player in winning_team_dict:
+            player_stats = winning_team_dict[player]
+            player_ppg = simulate_player_pts(player_stats['ppg'], quantiles=player_stats.get('pts_quantiles'))
+            increment = player_ppg * winning_team_multiplier
+            player_stats['running_total_simulated'] += increment
+
+def split_team_points_for_team(team_dict, team_points, multiplier):
+    # share the team's simulated points among its players by usage (see tempo_model)
+    players = [player for player in team_dict if isinstance(team_dict[player], dict)]
+    stats = [team_dict[player] for player in players]
+    mean, sd = usage_split([s['ppg'] for s in stats], [s.get('fga', np.nan) for s in stats], [s.get('fta', np.nan) for s in stats])
+    points = split_team_points(np.float64(team_points * multiplier), mean, sd, np.random.standard_normal(len(players)))
+    for player_stats, player_points in zip(stats, points):
+        player_stats['running_total_simulated'] += player_points
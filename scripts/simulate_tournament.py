@@ -1,24 +1,197 @@
 from tqdm import tqdm
 from collections import defaultdict
-from region import Region
 from tournament import Tournament
+import numpy as np
+from itertools import repeat
+from concurrent.futures import ProcessPoolExecutor
+from copy import deepcopy
+from batch_engine import compile_bracket_ratings, player_inputs, player_quantiles, tempo_inputs, rating_updates, simulate_batch_part, split_sims, split_blocks
+from exact_bracket import exact_tournament
+from sim_results import SimResults
+from columnar import PlayerBundle
+from instrument import stage, count, timed
+from player_distributions import compile_distributions
+from accumulators import ChampionCounter, AdvancementCounter, Welford, QuantileSketch
+
+def simulate_n_tournaments_batch(matchups_dict, players_dict, ratings_df, method, N=100, player_bk_used=True, seed=None, workers=1, rating_update=0, sampling=None):
+    '''
+    Vectorized counterpart of simulate_n_tournaments.
+
+    The N simulations are run in blocks (see batch_engine.BLOCK_SIZE), each with its own
+    generator spawned from numpy.random.SeedSequence(seed), and the blocks are concatenated in
+    order. With workers > 1 the blocks are shared out across a process pool, so the same seed
+    reproduces the same results whatever the number of workers.
+
+    Returns:
+        champion_probs (dict): Team string -> probability of winning the championship.
+        results (SimResults): Winners of every game and every player's simulated total.
+    '''
+    with stage('compile ratings'):
+        ratings = compile_bracket_ratings(matchups_dict, ratings_df, method)
+        players, slots, ppg, multipliers = player_inputs(ratings.teams, players_dict if player_bk_used else {})
+        quantiles = player_quantiles(ratings.teams, players_dict) if player_bk_used else None
+        tempo = tempo_inputs(ratings, players_dict if player_bk_used else {}) if ratings.method == 'tempo' else None
+    results = run_batch(ratings, players, slots, ppg, multipliers, N, seed, workers, quantiles=quantiles, tempo=tempo,
+                        updates=rating_updates(ratings, rating_update), sampling=sampling)
+    return results.champion_probs(), results
+
+def run_batch(ratings, players, slots, ppg, multipliers, N, seed=None, workers=1, known=None, actual=None, quantiles=None, tempo=None, updates=None, sampling=None):
+    '''
+    Runs N batch simulations from compiled ratings and player inputs, see simulate_batch_part for
+    known, actual, quantiles, tempo, updates and sampling. Returns a SimResults.
+    '''
+    sizes = split_blocks(N)
+    seeds = np.random.SeedSequence(seed).spawn(len(sizes))
+    if workers == 1:
+        parts = [simulate_batch_part(ratings.wp, size, block_seed, slots, ppg, multipliers, known, actual, quantiles, tempo, updates,
+                                     ratings.schedule, sampling) for size, block_seed in zip(sizes, seeds)]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            parts = list(pool.map(simulate_batch_part, repeat(ratings.wp), sizes, seeds,
+                                  repeat(slots), repeat(ppg), repeat(multipliers), repeat(known), repeat(actual), repeat(quantiles), repeat(tempo),
+                                  repeat(updates), repeat(ratings.schedule), repeat(sampling)))
+
+    winners = np.concatenate([winners for winners, _ in parts])
+    totals = None
+    if len(players) > 0:
+        totals = np.concatenate([totals for _, totals in parts])
+
+    return SimResults(ratings.teams, players, winners, totals, ratings.schedule)
+
+def stream_part(win_probs, sizes, seeds, teams, players, ppg, multipliers, accumulators, quantiles=None, tempo=None, updates=None, schedule=None, sampling=None):
+    '''
+    Runs batches of simulations one at a time, each of the given size and drawn from its own
+    seed, feeding each batch to the accumulators and then dropping it.
+    '''
+    slots = np.array([slot for slot, _, _ in players], dtype=int)
+
+    for size, seed in zip(sizes, seeds):
+        winners, totals = simulate_batch_part(win_probs, size, seed, slots, ppg, multipliers, quantiles=quantiles,
+                                            tempo=tempo, updates=updates, schedule=schedule, sampling=sampling)
+        results = SimResults(teams, players, winners, totals, schedule)
+        for accumulator in accumulators:
+            accumulator.update(results)
+
+    return accumulators
+
+def stream_n_tournaments(matchups_dict, players_dict, ratings_df, method, accumulators, N=100, player_bk_used=True, seed=None, workers=1, batch_size=10000, rating_update=0, sampling=None):
+    '''
+    Streaming counterpart of simulate_n_tournaments_batch that never keeps individual simulations.
+
+    Simulations are generated in batches, fed to the online accumulators (see accumulators.py)
+    and discarded, so memory does not grow with N. Every batch draws from its own generator
+    spawned from the seed. With workers > 1 every worker runs a contiguous share of the batches
+    into its own copy of the accumulators and the copies are merged in worker order, so the
+    counts come out the same whatever the number of workers (and the Welford moments up to
+    rounding).
+
+    Returns:
+        accumulators (list): The accumulators, updated with all N simulations.
+    '''
+    ratings = compile_bracket_ratings(matchups_dict, ratings_df, method)
+    players, _, ppg, multipliers = player_inputs(ratings.teams, players_dict if player_bk_used else {})
+    quantiles = player_quantiles(ratings.teams, players_dict) if player_bk_used else None
+    tempo = tempo_inputs(ratings, players_dict if player_bk_used else {}) if ratings.method == 'tempo' else None
+    updates = rating_updates(ratings, rating_update)
+
+    sizes = split_blocks(N, batch_size)
+    seeds = np.random.SeedSequence(seed).spawn(len(sizes))
+    if workers == 1:
+        return stream_part(ratings.wp, sizes, seeds, ratings.teams, players, ppg, multipliers, accumulators, quantiles, tempo, updates,
+                           ratings.schedule, sampling)
+
+    bounds = np.cumsum([0] + split_sims(len(sizes), workers))
+    shares = [slice(start, stop) for start, stop in zip(bounds[:-1], bounds[1:])]
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        parts = list(pool.map(stream_part, repeat(ratings.wp), [sizes[share] for share in shares], [seeds[share] for share in shares],
+                              repeat(ratings.teams), repeat(players), repeat(ppg), repeat(multipliers),
+                              [deepcopy(accumulators) for _ in range(workers)], repeat(quantiles), repeat(tempo), repeat(updates),
+                              repeat(ratings.schedule), repeat(sampling)))
+
+    for part in parts:
+        for accumulator, partial in zip(accumulators, part):
+            accumulator.merge(partial)
+    return accumulators
+
+def simulate_n_tournaments(matchups_dict, players_dict, ratings_df, method, N=100, player_bk_used=True, engine='object', seed=None, workers=1, accumulators=None, rating_update=0, sampling=None):
+    '''
+    Simulates N tournaments and returns the champion probabilities along with the simulations.
+
+    matchups_dict is the bracket: read_unplayed_tournament's region matchups or any bracket
+    description, First Four included (see bracket.py). Every engine plays its compiled schedule.
+
+    With engine='object' the simulations are a list of Tournament objects. With engine='batch'
+    all N tournaments are run as array operations, optionally split over `workers` processes,
+    and the simulations are a SimResults.
+    With engine='stream' the simulations are summarised by online accumulators and then discarded;
+    the second value is the list of accumulators (by default champion and advancement counters and
+    a Welford mean/variance and quantile sketch of the player totals).
+    With engine='exact' nothing is sampled (N is ignored) and the second value is the team x
+    round advancement probability table from exact_bracket.exact_tournament.
+
+    With rating_update > 0 every simulated game moves both teams' ratings for the rest of that
+    simulated tournament: by rating_update times the deviation of the simulated margin from the
+    expected one, so a team that keeps winning comfortably gets stronger (see
+    CompiledRatings.updating; compiled_ratings.RATING_UPDATE is a reasonable gain). It is not
+    supported by the exact engine, whose probabilities assume fixed ratings.
+
+    With a sampling scheme ('random', 'antithetic', 'stratified' or 'sobol', batch and stream
+    engines) every game slot plays off its own stream of uniforms drawn up front, see
+    variance_reduction. Runs with the same seed and N then share them across methods,
+    rating updates and brackets with the same schedule, so their differences are estimated on
+    common random numbers, and the antithetic, stratified and Sobol designs also cut the noise
+    of each run's own estimates.
+    '''
+    if engine == 'batch':
+        count('sims', N)
+        return simulate_n_tournaments_batch(matchups_dict, players_dict, ratings_df, method, N=N,
+                                            player_bk_used=player_bk_used, seed=seed, workers=workers,
+                                            rating_update=rating_update, sampling=sampling)
+    elif engine == 'stream':
+        if accumulators is None:
+            accumulators = [ChampionCounter(), AdvancementCounter(), Welford(), QuantileSketch()]
+        champion_counter = next((a for a in accumulators if isinstance(a, ChampionCounter)), None)
+        if champion_counter is None:
+            champion_counter = ChampionCounter()
+            accumulators = accumulators + [champion_counter]
+        count('sims', N)
+        stream_n_tournaments(matchups_dict, players_dict, ratings_df, method, accumulators, N=N,
+                             player_bk_used=player_bk_used, seed=seed, workers=workers, rating_update=rating_update,
+                             sampling=sampling)
+        return champion_counter.champion_probs(), accumulators
+    elif engine == 'exact':
+        if rating_update:
+            raise ValueError("Rating updates are not supported by the exact engine.")
+        return exact_tournament(matchups_dict, ratings_df, method)
+    elif engine != 'object':
+        raise ValueError("Engine must be one of 'object', 'batch', 'stream' or 'exact'.")
+    elif workers != 1:
+        raise ValueError("Parallel workers are only supported by the batch and stream engines.")
+    elif sampling is not None:
+        raise ValueError("Sampling schemes are only supported by the batch and stream engines.")
+
+    # resolve the bracket teams' ratings once instead of on every game
+    with stage('compile ratings'):
+        ratings = compile_bracket_ratings(matchups_dict, ratings_df, method)
+    if isinstance(players_dict, PlayerBundle):
+        players_dict = players_dict.to_dict()
+    # fit gamelog distributions once rather than in every tournament
+    players_dict = compile_distributions(players_dict)
 
-def simulate_n_tournaments(matchups_dict, players_dict, ratings_df, method, N=100, player_bk_used=True):
     champions = defaultdict(int)
     sims = []
 
-    for i in tqdm(range(N)):
-        east = Region(matchups_dict["east"])
-        west = Region(matchups_dict["west"])
-        south = Region(matchups_dict["south"])
-        midwest = Region(matchups_dict["midwest"])
-
-        tourney = Tournament(east, west, south, midwest, players_dict)
-        tourney.simulate_tournament(ratings_df, method, player_bk_used=player_bk_used)
-        champ = tourney.championship.winner
+    for i in timed('progress bar', tqdm(range(N))):
+        # every tournament plays the same compiled schedule, nothing is rebuilt per simulation
+        tourney = Tournament.from_schedule(ratings.schedule, players_dict)
+        # a fresh copy of the ratings per tournament when they move with the results
+        tourney_ratings = ratings.updating(rating_update) if rating_update else ratings
+        tourney.simulate_tournament(tourney_ratings, method, player_bk_used=player_bk_used)
+        champ = tourney.champion
         sims.append(tourney)
 
         champions[str(champ)] += 1
+        count('sims')
         # print(f"---\n---\n Sim {i}, Overall Champion: {champ}")
 
     # Convert to probabilities
@@ -5,6 +5,8 @@ class Team:
         self.link = link
         # self.roster = load_team_roster(link)
         self.games_played = 0
+        # points scored in the team's latest simulated game (set by the tempo method only)
+        self.game_points = None
 
     def get_multiplier(self):
         if self.seed < 6:
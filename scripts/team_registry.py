@@ -0,0 +1,123 @@
+import os
+import re
+import numpy as np
+from constants import ESPN_TO_PP_MAP, PP_TO_SILVER_MAP, sr_to_kenpom, sr_to_silver
+
+# Every source spells team names its own way (Sports-Reference "Brigham Young", KenPom "BYU",
+# Silver "St. John's", ESPN "Auburn Tigers", ...). The registry gives each team one integer ID
+# and resolves any source's name to it, so names are only looked at once, at load time.
+
+SR_TEAMS_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'data', 'sr_teams.txt')
+# (alias -> name) mappings whose two sides are the same team
+ALIAS_MAPS = [sr_to_kenpom, sr_to_silver, PP_TO_SILVER_MAP, ESPN_TO_PP_MAP]
+# Shortened words used by the pick percentages names (Colo. St., Mich. St., Mt St Mary's)
+ABBREVIATIONS = {'mt': 'mount', 'colo': 'colorado', 'mich': 'michigan', 'miss': 'mississippi', 'fran': 'francis'}
+
+def normalize_name(name):
+    '''
+    Lookup key for a team name: case, punctuation and "St."/"State"/"Saint" spellings don't matter.
+    '''
+    name = name.casefold().replace('&', ' and ')
+    tokens = [ABBREVIATIONS.get(token, token) for token in re.sub(r'[^a-z0-9]+', ' ', re.sub(r"[.'’]", '', name)).split()]
+    # a leading or inner "St" is Saint (St. John's, Mount St. Mary's), a trailing one is State
+    return ' '.join('state' if token == 'st' and i == len(tokens) - 1 else 'saint' if token == 'st' else token
+                    for i, token in enumerate(tokens))
+
+class TeamRegistry:
+    '''
+    Maps team names from every source to integer team IDs through a normalized-name index.
+    '''
+    def __init__(self, names=()):
+        self.names = []
+        self.index = {}
+        for name in names:
+            self.add(name)
+
+    def __len__(self):
+        return len(self.names)
+
+    def resolve(self, name):
+        '''
+        ID of a team name, or None if the registry doesn't know it.
+        '''
+        return self.index.get(normalize_name(name))
+
+    def resolve_prefix(self, name):
+        '''
+        ID of the longest leading run of words of a name that the registry knows, for names
+        followed by a mascot ("Davidson Wildcats", as ESPN writes them), or None.
+        '''
+        words = name.split()
+        for n in range(len(words), 0, -1):
+            team_id = self.resolve(' '.join(words[:n]))
+            if team_id is not None:
+                return team_id
+        return None
+
+    def add(self, name):
+        '''
+        ID of a team name, registering it as a new team if it isn't known yet.
+        '''
+        team_id = self.resolve(name)
+        if team_id is None:
+            team_id = len(self.names)
+            self.names.append(name)
+            self.index[normalize_name(name)] = team_id
+        return team_id
+
+    def link(self, name, other):
+        '''
+        Records that two names are the same team.
+        '''
+        team_id, other_id = self.resolve(name), self.resolve(other)
+        if team_id is None and other_id is None:
+            team_id = self.add(name)
+        elif team_id is None:
+            team_id = other_id
+        elif other_id is not None and other_id != team_id:
+            # both were registered separately, fold the second team's names into the first
+            for key, value in self.index.items():
+                if value == other_id:
+                    self.index[key] = team_id
+        self.index[normalize_name(name)] = team_id
+        self.index[normalize_name(other)] = team_id
+
+    def unresolved(self, names):
+        return [name for name in names if self.resolve(name) is None]
+
+    def ids(self, names, source='team'):
+        '''
+        IDs of a list of names. Raises a KeyError listing every name that could not be resolved.
+        '''
+        names = [str(name) for name in names]
+        missing = self.unresolved(names)
+        if missing:
+            raise KeyError(f"Unknown {source} names: {', '.join(missing)} (add them to {os.path.basename(SR_TEAMS_PATH)} "
+                           f"or as aliases in constants.py)")
+        return np.array([self.resolve(name) for name in names], dtype=np.int32)
+
+    def name(self, team_id):
+        return self.names[team_id]
+
+def build_registry():
+    '''
+    Registry seeded with the Sports-Reference team list and linked through the name mappings
+    in constants.py.
+    '''
+    with open(SR_TEAMS_PATH) as f:
+        registry = TeamRegistry(line.strip() for line in f if line.strip())
+    for mapping in ALIAS_MAPS:
+        for alias, name in mapping.items():
+            registry.link(alias, name)
+    return registry
+
+_registry = None
+
+def team_registry():
+    '''
+    The process-wide registry, built on first use.
+    '''
+    global _registry
+    if _registry is None:
+        _registry = build_registry()
+    return _registry
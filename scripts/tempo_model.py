@@ -0,0 +1,89 @@
+import numpy as np
+from collections import namedtuple
+from scipy.stats import norm
+
+# Game-score model for the 'tempo' method. Instead of a win probability from a rating difference,
+# each game's possessions are drawn from both teams' adjusted tempos and each team's points from
+# its offensive efficiency against the other's defense (KenPom's AdjT, ORtg and DRtg). The
+# team's points are then split among its players by usage: every player's scoring attempts in
+# the game are drawn around their per-game attempts (fga + 0.44 fta) and are worth their points
+# per attempt, and the team's points are shared in proportion.
+
+TEMPO_COLUMNS = ['ORtg', 'DRtg', 'AdjT']
+# Standard deviation of a game's possessions around the tempo-based expectation
+POSSESSIONS_SD = 4.0
+# Free throw attempts per scoring attempt, the usual possession estimate
+FTA_WEIGHT = 0.44
+
+# Per-player and per-game arrays simulate_batch_part needs to run the tempo model, see
+# batch_engine.tempo_inputs
+TempoInputs = namedtuple('TempoInputs', ['possessions', 'ppp', 'points_sd', 'split_mean', 'split_sd'])
+
+def game_expectations(ortg, drtg, tempo, avg_efficiency, avg_tempo):
+    '''
+    Expected possessions and points per possession of every pairing.
+
+    Args:
+        ortg, drtg, tempo (np.ndarray): (n,) adjusted offensive and defensive efficiency (points
+            per 100 possessions) and tempo (possessions per 40 minutes) of each team.
+        avg_efficiency, avg_tempo (float): Division I averages.
+
+    Returns:
+        possessions (np.ndarray): (n, n) expected possessions when team i plays team j.
+        ppp (np.ndarray): (n, n) expected points per possession of team i against team j.
+    '''
+    possessions = tempo[:, None] * tempo[None, :] / avg_tempo
+    ppp = ortg[:, None] * drtg[None, :] / avg_efficiency / 100
+    return possessions, ppp
+
+def tempo_win_prob(possessions, ppp, points_sd):
+    '''
+    Probability that team i beats team j. The margin is possessions * (ppp[i, j] - ppp[j, i])
+    plus the two teams' independent points noise, so it is normal.
+    '''
+    edge = ppp - ppp.T
+    margin_sd = np.sqrt(2 * points_sd ** 2 + (POSSESSIONS_SD * edge) ** 2)
+    return norm.cdf(possessions * edge / margin_sd)
+
+def usage_split(ppg, fga, fta):
+    '''
+    Mean and standard deviation of each player's unscaled points in a game, before the team's
+    points are shared out in proportion to them.
+
+    A player's scoring attempts are close to Poisson(usage), usage = fga + 0.44 fta per game,
+    drawn as Normal(usage, sqrt(usage)), and each is worth ppg / usage points. So their points
+    are Normal(ppg, ppg / sqrt(usage)): high-volume scorers are relatively steadier. Players
+    without shooting stats count one attempt per point.
+
+    Returns:
+        mean (np.ndarray): ppg, missing values as zero.
+        sd (np.ndarray): ppg / sqrt(usage) (zero for players with no attempts).
+    '''
+    ppg = np.nan_to_num(np.asarray(ppg, dtype=np.float64))
+    usage = np.asarray(fga, dtype=np.float64) + FTA_WEIGHT * np.asarray(fta, dtype=np.float64)
+    usage = np.where(np.isnan(usage), ppg, usage)
+    sd = np.divide(ppg, np.sqrt(usage), out=np.zeros_like(ppg), where=usage > 0)
+    return ppg, sd
+
+def split_team_points(team_points, mean, sd, z):
+    '''
+    Splits a team's points in a game among its players in proportion to their unscaled points,
+    Normal(mean, sd) clipped at zero (see usage_split). A player's expected share is about their
+    share of the team's ppg.
+
+    Args:
+        team_points (np.ndarray): (...) the team's points in each game (times any multiplier).
+        mean, sd (np.ndarray): (..., width) each player's usage_split, zero for roster padding.
+        z (np.ndarray): (..., width) standard normal draws, overwritten.
+
+    Returns:
+        np.ndarray: (..., width) each player's points.
+    '''
+    z *= sd
+    z += mean
+    np.maximum(z, 0, out=z)
+    # a matrix-vector product sums the short roster axis much faster than sum(axis=-1)
+    total = (z @ np.ones(z.shape[-1], dtype=z.dtype))[..., None]
+    scale = np.divide(team_points[..., None], total, out=np.zeros_like(total), where=total > 0)
+    z *= scale
+    return z
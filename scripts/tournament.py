@@ -1,32 +1,55 @@
-from region import Region, Matchup, Node
-from collections import defaultdict
-from copy import deepcopy
-
-class Tournament:        
-    def __init__(self, east_matchups, west_matchups, south_matchups, midwest_matchups, player_dict):
-        self.east = east_matchups
-        self.west = west_matchups
-        self.south = south_matchups
-        self.midwest = midwest_matchups
-        self.players_bookkeeping = deepcopy(player_dict) # dict of dicts (team_name -> player_name -> total points scored)
-        self.championship = None
+from region import play_schedule, game_node, print_bracket
+from bracket import compile_bracket
+from copy import copy, deepcopy
+from instrument import stage
+
+class Tournament:
+    '''
+    One simulated tournament of the object engine, played game by game off a compiled bracket
+    (see bracket.compile_bracket). Built from four Regions with the usual Final Four (south
+    plays west, east plays midwest), or with from_schedule for any bracket shape, First Four
+    included.
+    '''
+    def __init__(self, east, west, south, midwest, player_dict):
+        regions = {'south': south.matchups, 'west': west.matchups, 'east': east.matchups, 'midwest': midwest.matchups}
+        self.setup(compile_bracket(regions), player_dict)
+
+    @classmethod
+    def from_schedule(cls, schedule, player_dict):
+        '''
+        Tournament of a compiled bracket, shared by every tournament played off it. The
+        tournament plays its own copies of the schedule's Team objects, so its games_played
+        and game_points stay its own after later tournaments are played.
+        '''
+        tournament = cls.__new__(cls)
+        schedule = copy(schedule)
+        schedule.teams = [copy(team) for team in schedule.teams]
+        tournament.setup(schedule, player_dict)
+        return tournament
+
+    def setup(self, schedule, player_dict):
+        self.schedule = schedule
+        with stage('bookkeeping deepcopy'):
+            self.players_bookkeeping = deepcopy(player_dict) # dict of dicts (team_name -> player_name -> total points scored)
+        self.winners = None
 
     def simulate_tournament(self, ratings_df, method, player_bk_used=True):
-        for region in [self.east, self.west, self.south, self.midwest]:
-            region.sim_region(ratings_df, self.players_bookkeeping, method, player_bk_used=player_bk_used)
-            # region.print_region()
-
-        # final four matchups
-        sw_matchup = Matchup(self.south.championship.winner, self.west.championship.winner)
-        sw_node = Node(matchup=sw_matchup)
-        emw_matchup = Matchup(self.east.championship.winner, self.midwest.championship.winner)
-        emw_node = Node(matchup=emw_matchup)
-        
-        final_four = Region([])
-        final_four.matchup_q.append(sw_node)
-        final_four.matchup_q.append(emw_node)
-        final_four.sim_region(ratings_df, self.players_bookkeeping, method, player_bk_used=player_bk_used)
-        self.championship = final_four.championship
+        self.winners = play_schedule(self.schedule, ratings_df, method, self.players_bookkeeping, player_bk_used=player_bk_used)
+
+    @property
+    def champion(self):
+        return self.winners[-1]
+
+    @property
+    def championship(self):
+        '''
+        The championship game as a Node, whose children lead back through the earlier games.
+        '''
+        return game_node(self.schedule, self.winners, self.schedule.n_games - 1)
+
+    def print_bracket(self):
+        print(self.champion)
+        print_bracket(self.championship)
 
     def bracket_distance(team1, team2):
         '''
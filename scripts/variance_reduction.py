@@ -0,0 +1,127 @@
+import warnings
+import numpy as np
+from scipy.special import ndtri
+from scipy.stats import qmc
+
+# Variance reduction for the batch engines. Every game slot of the schedule gets its own stream
+# of uniforms, drawn up front for the whole batch, and every model turns a game's uniform into
+# its outcome the same way round: a small uniform favors the game's first team (it wins when
+# the uniform is below its win probability, and the normal margin noise is -ndtri(u)). Two runs
+# from the same seed and sampling therefore play every game off the same uniform whatever the
+# method, rating updates or known results, so most of the Monte Carlo noise cancels when their
+# estimates are compared (common random numbers).
+#
+# sampling spreads the uniforms over the batch:
+#   'random'      independent uniforms, common random numbers only
+#   'antithetic'  simulations in interleaved pairs, the second playing off 1 - u of the first
+#                 (players' points draws are mirrored the same way)
+#   'stratified'  Latin hypercube: each game's uniforms hit every 1/N stratum once
+#   'sobol'       scrambled Sobol points, randomized quasi-Monte Carlo (best with N a power of 2)
+
+SAMPLING = ['random', 'antithetic', 'stratified', 'sobol']
+# Uniforms are kept this far from 0 and 1 before they become normal draws
+UNIFORM_EPS = 1e-7
+
+def sample_uniforms(N, d, rng, sampling='random'):
+    '''
+    N points in the d-dimensional unit cube spread as the sampling scheme says.
+
+    Returns:
+        np.ndarray: (d, N) float32 uniforms, one row per dimension.
+    '''
+    if sampling == 'random':
+        return rng.random((d, N), dtype=np.float32)
+    if sampling == 'antithetic':
+        half = rng.random((d, (N + 1) // 2), dtype=np.float32)
+        u = np.empty((d, N), dtype=np.float32)
+        u[:, 0::2] = half
+        u[:, 1::2] = 1 - half[:, :N // 2]
+        return u
+    if sampling == 'stratified':
+        sampler = qmc.LatinHypercube(d, rng=rng)
+    elif sampling == 'sobol':
+        sampler = qmc.Sobol(d, rng=rng)
+    else:
+        raise ValueError(f"Sampling must be one of {', '.join(SAMPLING)}.")
+    with warnings.catch_warnings():
+        # Sobol points lose some balance when N isn't a power of 2, they are still a fine design
+        warnings.simplefilter('ignore', UserWarning)
+        return sampler.random(N).T.astype(np.float32)
+
+def game_uniforms(n_games, N, rng, sampling='random', draws=1):
+    '''
+    Uniform streams of every game slot for a batch of N simulations, see the top of this module.
+
+    Row 0 decides each game's outcome in every model. Models that need more noise per game (the
+    tempo model's total points and possessions) read the further rows, drawn from a generator
+    spawned from rng so that rng continues the same way whatever draws is, and the players'
+    points after the games are common too.
+
+    Returns:
+        np.ndarray: (draws, n_games, N) float32 uniforms.
+    '''
+    uniforms = np.empty((draws, n_games, N), dtype=np.float32)
+    # the final takes the first dimension and the first round the last: the later games decide
+    # the most, and the leading dimensions of a Sobol design are the best balanced
+    uniforms[0] = sample_uniforms(N, n_games, rng, sampling)[::-1]
+    if draws > 1:
+        extra = sample_uniforms(N, (draws - 1) * n_games, rng.spawn(1)[0], sampling)
+        uniforms[1:] = extra.reshape(draws - 1, n_games, N)
+    return uniforms
+
+def normal_draws(uniforms):
+    '''
+    Standard normal draws from uniforms by the inverse CDF, so they keep the uniforms' design.
+    '''
+    return ndtri(np.clip(uniforms, np.float32(UNIFORM_EPS), np.float32(1 - UNIFORM_EPS)))
+
+def standard_normal(rng, shape, antithetic=False):
+    '''
+    float32 standard normal draws whose rows come in interleaved antithetic pairs (z, -z) when
+    antithetic is set.
+    '''
+    if not antithetic:
+        return rng.standard_normal(shape, dtype=np.float32)
+    half = rng.standard_normal(((shape[0] + 1) // 2,) + tuple(shape[1:]), dtype=np.float32)
+    z = np.empty(shape, dtype=np.float32)
+    z[0::2] = half
+    z[1::2] = -half[:shape[0] // 2]
+    return z
+
+def uniform(rng, shape, antithetic=False):
+    '''
+    float32 uniforms whose rows come in interleaved antithetic pairs (u, 1 - u) when antithetic
+    is set.
+    '''
+    if not antithetic:
+        return rng.random(shape, dtype=np.float32)
+    half = rng.random(((shape[0] + 1) // 2,) + tuple(shape[1:]), dtype=np.float32)
+    u = np.empty(shape, dtype=np.float32)
+    u[0::2] = half
+    u[1::2] = 1 - half[:shape[0] // 2]
+    return u
+
+def mean_stderr(values, sampling=None):
+    '''
+    Mean of per-simulation values and its standard error.
+
+    To compare two runs made on common random numbers, pass the simulation by simulation
+    difference of their values (e.g. a champion indicator under two methods): the noise they
+    share cancels, so its standard error is far below either run's own.
+
+    Args:
+        values (np.ndarray): (N, ...) one row per simulation, in simulation order.
+        sampling (str): The run's sampling scheme. Antithetic pairs are averaged first, as
+            their two halves are correlated. Stratified and Sobol designs are treated as
+            independent draws, which overstates their error.
+
+    Returns:
+        mean, stderr (np.ndarray): (...) mean over the simulations and its standard error.
+    '''
+    values = np.asarray(values, dtype=np.float64)
+    mean = values.mean(axis=0)
+    if sampling == 'antithetic' and len(values) > 1:
+        values = (values[0:len(values) - 1:2] + values[1::2]) / 2
+    if len(values) < 2:
+        return mean, np.full_like(mean, np.inf)
+    return mean, values.std(axis=0, ddof=1) / np.sqrt(len(values))
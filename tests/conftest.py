@@ -0,0 +1,72 @@
+import os
+import sys
+import numpy as np
+import pandas as pd
+import pytest
+
+# the scripts import each other as top-level modules
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'scripts'))
+
+from team_registry import SR_TEAMS_PATH, team_registry
+
+# First round seed pairings of a region, top to bottom
+SEED_PAIRS = [(1, 16), (8, 9), (5, 12), (4, 13), (6, 11), (3, 14), (7, 10), (2, 15)]
+REGIONS = ['south', 'west', 'east', 'midwest']
+# (region, seed) of the four play-in games
+PLAY_INS = [('south', 16), ('west', 11), ('east', 16), ('midwest', 11)]
+
+def team_names(n):
+    '''
+    n Sports-Reference team names that resolve to distinct team IDs.
+    '''
+    registry = team_registry()
+    names, seen = [], set()
+    with open(SR_TEAMS_PATH) as f:
+        for line in f:
+            name = line.strip()
+            team_id = registry.resolve(name) if name else None
+            if team_id is not None and team_id not in seen:
+                seen.add(team_id)
+                names.append(name)
+            if len(names) == n:
+                return names
+    raise ValueError(f"Fewer than {n} distinct teams in {SR_TEAMS_PATH}.")
+
+@pytest.fixture(scope='session')
+def bracket_68():
+    '''
+    A 68-team bracket description with four First Four games, its KenPom-style ratings and a
+    roster of two players for every team (play-in teams included).
+    '''
+    names = iter(team_names(68))
+    team = lambda seed: {'name': next(names), 'seed': seed, 'link': None}
+    regions, first_four = {}, []
+    for region in REGIONS:
+        matchups = []
+        for seed1, seed2 in SEED_PAIRS:
+            team2 = team(seed2)
+            if (region, seed2) in PLAY_INS:
+                first_four.append({'region': region, 'seed': seed2, 'teams': [team2, team(seed2)]})
+                team2 = {'name': 'Play-In', 'seed': seed2, 'link': None}
+            matchups.append({'team_1': team(seed1), 'team_2': team2, 'location': None})
+        regions[region] = matchups
+    description = {'regions': regions, 'first_four': first_four}
+
+    teams = [t for matchups in regions.values() for m in matchups for t in (m['team_1'], m['team_2'])]
+    teams = [t for t in teams if t['name'] != 'Play-In'] + [t for p in first_four for t in p['teams']]
+    rng = np.random.default_rng(0)
+    ratings = pd.DataFrame({'Team': [t['name'] for t in teams],
+                            'NetRtg': [30 - 1.5 * t['seed'] + rng.normal(0, 2) for t in teams]})
+    players = {t['name']: {f"{t['name']} {i}": {'ppg': 10.0 + 5 * i, 'running_total_simulated': 0} for i in range(2)}
+               for t in teams}
+    return description, ratings, players
+
+@pytest.fixture
+def south_17(bracket_68):
+    '''
+    The south region of bracket_68 as a 17-team bracket of its own, its play-in game included,
+    with the same ratings and rosters.
+    '''
+    description, ratings, players = bracket_68
+    first_four = [play_in for play_in in description['first_four'] if play_in['region'] == 'south']
+    return {'regions': {'south': description['regions']['south']}, 'first_four': first_four}, ratings, players
@@ -0,0 +1,44 @@
+import numpy as np
+from batch_engine import compile_bracket_ratings, player_inputs, simulate_batch
+from sim_results import SimResults
+from accumulators import ChampionCounter, AdvancementCounter, Welford, QuantileSketch
+
+def accumulators():
+    return [ChampionCounter(), AdvancementCounter(), Welford(), QuantileSketch(n_bins=64)]
+
+def test_merged_chunks_equal_a_single_pass(bracket_68):
+    description, ratings, players_dict = bracket_68
+    compiled = compile_bracket_ratings(description, ratings, 'kenpom')
+    players, _, _, _ = player_inputs(compiled.teams, players_dict)
+    rng = np.random.default_rng(0)
+    N = 3000
+    winners = simulate_batch(compiled.wp, N, rng, schedule=compiled.schedule)
+    # quarter points, which every bin width here splits exactly; the last chunk's totals are
+    # past the sketch's first range, so its bins double twice between the chunks
+    totals = rng.integers(0, 120, (N, len(players))) / 4
+    totals[2000:] *= 3
+    results = lambda rows: SimResults(compiled.teams, players, winners[rows], totals[rows].astype(np.float32), compiled.schedule)
+
+    single = accumulators()
+    for accumulator in single:
+        accumulator.update(results(slice(None)))
+    assert single[3].bin_width == 2
+
+    # merged in either order, so both the sketch being merged into and the one merged are coarsened
+    for chunks in ([slice(0, 1000), slice(1000, 2000), slice(2000, N)], [slice(2000, N), slice(0, 1000), slice(1000, 2000)]):
+        merged = accumulators()
+        for chunk in chunks:
+            part = accumulators()
+            for accumulator in part:
+                accumulator.update(results(chunk))
+            for accumulator, partial in zip(merged, part):
+                accumulator.merge(partial)
+
+        (champions, advancement, welford, sketch), (champions1, advancement1, welford1, sketch1) = merged, single
+        assert np.array_equal(champions.counts, champions1.counts) and champions.n == N
+        assert champions.champion_probs() == champions1.champion_probs()
+        assert np.array_equal(advancement.counts, advancement1.counts)
+        assert np.allclose(welford.mean, welford1.mean) and np.allclose(welford.variance(), welford1.variance())
+        assert np.allclose(welford1.variance(), totals.var(axis=0, ddof=1))
+        assert sketch.bin_width == sketch1.bin_width and np.array_equal(sketch.counts, sketch1.counts)
+        assert np.array_equal(sketch.quantile(0.9), sketch1.quantile(0.9))
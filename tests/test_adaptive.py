@@ -0,0 +1,65 @@
+import numpy as np
+from scipy.stats import norm, t
+import adaptive
+from adaptive import Target, simulate_to_precision
+from batch_engine import compile_bracket_ratings
+from exact_bracket import game_probs
+
+def favorite(description, ratings):
+    '''
+    Slot and exact title probability of the bracket's favorite.
+    '''
+    compiled = compile_bracket_ratings(description, ratings, 'kenpom')
+    _, advancement = game_probs(compiled.wp, compiled.schedule)
+    slot = int(np.argmax(advancement[:, -1]))
+    return slot, advancement[slot, -1]
+
+def title_target(slot, tolerance):
+    return Target('title', lambda results: results.champions() == slot, tolerance, proportion=True)
+
+def test_independent_draws_stop_on_the_agresti_coull_interval(bracket_68):
+    description, ratings, players = bracket_68
+    slot, exact = favorite(description, ratings)
+    target = title_target(slot, 0.005)
+    _, precision = simulate_to_precision(description, players, ratings, 'kenpom', targets=[target], batch_size=1024, min_batches=2,
+                                         seed=0, player_bk_used=False)
+    assert precision.reason == 'tolerance' and precision.n % 1024 == 0
+
+    n, estimate = precision.n, target.estimate[0]
+    z = norm.ppf(0.975)
+    adjusted = (estimate * n + z ** 2 / 2) / (n + z ** 2)
+    half_width = z * np.sqrt(adjusted * (1 - adjusted) / (n + z ** 2))
+    assert np.isclose(target.half_width()[0], half_width) and half_width <= 0.005
+    # one batch fewer wouldn't have been enough
+    assert z * np.sqrt(adjusted * (1 - adjusted) / (n - 1024 + z ** 2)) > 0.005
+    assert abs(estimate - exact) <= 2 * half_width
+
+def test_designs_stop_on_the_batch_means_interval(bracket_68):
+    description, ratings, players = bracket_68
+    slot, exact = favorite(description, ratings)
+    target = title_target(slot, 0.005)
+    _, precision = simulate_to_precision(description, players, ratings, 'kenpom', targets=[target], batch_size=1024, seed=0,
+                                         keep=True, player_bk_used=False, sampling='sobol')
+    assert precision.reason == 'tolerance'
+
+    # Student t over the independent batch means
+    means = (precision.results.champions() == slot).reshape(-1, 1024).mean(axis=1)
+    half_width = t.ppf(0.975, len(means) - 1) * means.std(ddof=1) / np.sqrt(len(means))
+    assert np.isclose(target.half_width()[0], half_width) and half_width <= 0.005
+    assert len(means) >= adaptive.MIN_BATCHES
+    assert abs(target.estimate[0] - exact) <= 2 * half_width
+
+def test_time_budget_is_respected(bracket_68, monkeypatch):
+    description, ratings, players = bracket_68
+    # a clock that moves one second per batch
+    clock = [0.0]
+    monkeypatch.setattr(adaptive.time, 'perf_counter', lambda: clock[0])
+    def values(results):
+        clock[0] += 1
+        return results.champions() == 0
+
+    _, precision = simulate_to_precision(description, players, ratings, 'kenpom', targets=[Target('slow', values, 1e-6)],
+                                         time_budget=5.5, batch_size=256, seed=0, player_bk_used=False)
+    # a sixth batch would have ended past the budget
+    assert precision.reason == 'time budget' and precision.n == 5 * 256
+    assert precision.elapsed <= 5.5
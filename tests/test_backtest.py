@@ -0,0 +1,81 @@
+import os
+import shutil
+import numpy as np
+import pytest
+import fetch
+import backtest
+import player_store
+from load_team_data import pre_tournament_kenpom
+from batch_engine import bracket_teams, bracket_players, bracket_rosters
+from player_store import read_repr
+from backtest import (run_backtest, pick_ppg, load_bracket, actual_points, espn_player_name, player_key, oracle_scores,
+                      ROSTER_PATHS, STRATEGIES)
+
+def test_pre_tournament_snapshot(tmp_path):
+    (tmp_path / 'kenpom_2024.csv').write_text(
+        'Rk,Team,Conf,W-L,NetRtg,ORtg,ORtg,DRtg,DRtg,AdjT,AdjT\n'
+        '1,Connecticut 1,BE,31-3,+30.10,125.0,1,94.9,4,64.6,330\n'
+        'Rk,Team,Conf,W-L,NetRtg,ORtg,ORtg,DRtg,DRtg,AdjT,AdjT\n'
+        '2,Houston 1*,B12,30-4,+29.80,118.9,19,89.1,2,63.5,349\n')
+    ratings = pre_tournament_kenpom(2024, str(tmp_path))
+    assert ratings['Team'].tolist() == ['Connecticut', 'Houston']
+    assert ratings['NetRtg'].tolist() == [30.1, 29.8]
+    with pytest.raises(FileNotFoundError):
+        pre_tournament_kenpom(2023, str(tmp_path))
+
+def test_years_without_snapshot_are_skipped(bracket_68):
+    description, ratings, players = bracket_68
+
+    def loader(year, method):
+        if year == 2009:
+            raise FileNotFoundError("No pre-tournament KenPom ratings for 2009.")
+        return description, players, ratings
+
+    results = run_backtest(years=[2008, 2009], strategies={'ppg': pick_ppg}, N=200, seed=None, workers=1, loader=loader)
+    assert results['year'].unique().tolist() == [2008]
+    assert list(results.attrs['skipped']) == [2009]
+
+    with pytest.raises(ValueError):
+        run_backtest(years=[2009], strategies={'ppg': pick_ppg}, N=200, seed=None, workers=1, loader=loader)
+
+def test_espn_labels_give_full_names():
+    assert espn_player_name('Stephen CurryS. Curry') == 'Stephen Curry'
+    assert espn_player_name('Wade Taylor IVW. Taylor IV#4') == 'Wade Taylor IV'
+    assert espn_player_name('KJ Adams Jr.K.J. Adams Jr.#24') == 'KJ Adams Jr.'
+    assert espn_player_name('Ty JeromeTy Jerome#11') == 'Ty Jerome'
+    assert espn_player_name("Sir'Jabari RiceJ. Rice#10") == "Sir'Jabari Rice"
+    assert player_key('D.J. Burns Jr.') == player_key('DJ Burns') == 'dj burns'
+
+def test_actual_points_match_gamelog_totals():
+    # the 2024 rosters in the repo carry every player's tournament points from their gamelog
+    matchups_dict = load_bracket(2024)
+    teams = bracket_teams(matchups_dict)
+    roster_source = read_repr(ROSTER_PATHS[2024])
+    players = bracket_players(teams, roster_source)
+    actual = actual_points(2024, teams, players)
+
+    rosters = bracket_rosters(teams, roster_source)
+    gamelog = np.array([rosters[slot][player]['ground_truth_total'] * teams[slot].get_multiplier() for slot, _, player in players])
+    found = ~np.isnan(actual)
+    assert found.sum() > 500
+    assert np.array_equal(actual[found], gamelog[found])
+    # players missing from the box scores didn't score
+    assert np.all(gamelog[~found] == 0)
+
+def test_backtest_2024_from_repo_data(tmp_path, monkeypatch):
+    # The repo has no pre-tournament 2024 snapshot (build_pre_tournament.py needs the network),
+    # so the end-of-season export stands in for one: this runs the real bracket, rosters and
+    # box score points through the backtest, it doesn't measure the strategies.
+    shutil.copy(os.path.join(backtest.DATA_DIR, 'kenpom_df(2).csv'), tmp_path / 'kenpom_2024.csv')
+    monkeypatch.setattr(backtest, 'pre_tournament_kenpom', lambda year: pre_tournament_kenpom(year, str(tmp_path)))
+    monkeypatch.setattr(backtest, 'BACKTEST_DIR', str(tmp_path / 'backtest'))
+    monkeypatch.setattr(player_store, 'STORE_DIR', str(tmp_path / 'players'))
+    monkeypatch.setattr(fetch, 'OFFLINE', True)
+
+    results = run_backtest(years=[2024], N=2000, seed=0, workers=1)
+    assert sorted(results['strategy']) == sorted(STRATEGIES)
+    assert (results['actual'] > 0).all()
+    assert (results['share_of_oracle'] <= 1).all()
+    assert results['oracle'].iloc[0] == oracle_scores()[2024]
+    # rerunning reuses the stored rosters and cached simulations
+    assert results.equals(run_backtest(years=[2024], N=2000, seed=0, workers=1))
@@ -0,0 +1,58 @@
+import numpy as np
+from bracket import compile_bracket
+from compiled_ratings import CompiledRatings
+from exact_bracket import game_probs
+from batch_engine import BLOCK_SIZE, simulate_batch, win_counts, games_played, advancement_counts
+from simulate_tournament import simulate_n_tournaments
+from accumulators import ChampionCounter, AdvancementCounter, Welford, QuantileSketch
+
+def compiled_bracket(bracket_68):
+    description, ratings, _ = bracket_68
+    schedule = compile_bracket(description)
+    return CompiledRatings(schedule.teams, ratings, 'kenpom', schedule=schedule)
+
+def test_batch_frequencies_match_exact_probabilities(bracket_68):
+    compiled = compiled_bracket(bracket_68)
+    N = 40000
+    winners = simulate_batch(compiled.wp, N, np.random.default_rng(0), schedule=compiled.schedule)
+    _, advancement = game_probs(compiled.wp, compiled.schedule)
+
+    # within 5 standard errors of a binomial proportion, for every team and round
+    frequencies = advancement_counts(winners, compiled.schedule) / N
+    stderr = np.sqrt(advancement * (1 - advancement) / N)
+    assert np.all(np.abs(frequencies - advancement) <= 5 * stderr + 1e-9)
+    champions = np.bincount(winners[:, -1], minlength=compiled.schedule.n_teams) / N
+    assert np.allclose(champions, frequencies[:, -1])
+    assert np.isclose(advancement[:, -1].sum(), 1)
+
+def test_counts_agree_with_the_object_engine(bracket_68):
+    description, ratings, players = bracket_68
+    np.random.seed(0)
+    _, sims = simulate_n_tournaments(description, players, ratings, 'kenpom', N=30)
+    schedule = sims[0].schedule
+    # the object engine's winners as slot indices
+    winners = np.array([[sim.schedule.teams.index(team) for team in sim.winners] for sim in sims], dtype=np.int8)
+
+    wins = win_counts(winners, schedule)
+    played = games_played(winners, schedule)
+    for i, sim in enumerate(sims):
+        assert played[i].tolist() == [team.games_played for team in sim.schedule.teams]
+        assert wins[i].tolist() == [sum(winner is team for winner in sim.winners) for team in sim.schedule.teams]
+
+def test_worker_count_does_not_change_results(bracket_68):
+    description, ratings, players = bracket_68
+    # more than one block, and more blocks than workers
+    N = 2 * BLOCK_SIZE + 123
+    _, serial = simulate_n_tournaments(description, players, ratings, 'kenpom', N=N, engine='batch', seed=5, workers=1)
+    _, parallel = simulate_n_tournaments(description, players, ratings, 'kenpom', N=N, engine='batch', seed=5, workers=2)
+    assert np.array_equal(serial.winners, parallel.winners)
+    assert np.array_equal(serial.totals, parallel.totals)
+
+    streams = [simulate_n_tournaments(description, players, ratings, 'kenpom', N=25000, engine='stream', seed=5, workers=workers,
+                                      accumulators=[ChampionCounter(), AdvancementCounter(), Welford(), QuantileSketch()])[1]
+               for workers in (1, 2)]
+    (champions1, advancement1, welford1, sketch1), (champions2, advancement2, welford2, sketch2) = streams
+    assert np.array_equal(champions1.counts, champions2.counts) and champions1.n == champions2.n == 25000
+    assert np.array_equal(advancement1.counts, advancement2.counts)
+    assert np.array_equal(sketch1.counts, sketch2.counts) and sketch1.bin_width == sketch2.bin_width
+    assert np.allclose(welford1.mean, welford2.mean) and np.allclose(welford1.m2, welford2.m2)
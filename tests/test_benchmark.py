@@ -0,0 +1,16 @@
+import numpy as np
+import pytest
+from player_store import read_repr
+
+def test_read_repr_parses_numpy_scalars(tmp_path):
+    path = tmp_path / 'roster.json'
+    path.write_text("{'UConn': {'Tristen Newton': {'ppg': 15.1, 'ground_truth_total': np.float64(87.0), 'games': np.int64(6), 'fg': nan, 'pm': -2}}}")
+    stats = read_repr(str(path))['UConn']['Tristen Newton']
+    assert stats['ground_truth_total'] == 87.0 and stats['games'] == 6 and stats['pm'] == -2
+    assert np.isnan(stats['fg'])
+
+def test_read_repr_runs_no_code(tmp_path):
+    path = tmp_path / 'roster.json'
+    path.write_text("{'UConn': __import__('os').getcwd()}")
+    with pytest.raises(ValueError):
+        read_repr(str(path))
@@ -0,0 +1,67 @@
+import json
+import pytest
+import fetch
+from build_pre_tournament import parse_kenpom_page, build_snapshot, capture_cutoff, WAYBACK_URL
+from load_team_data import pre_tournament_kenpom
+
+# The layout since 2025 (NetRtg, value and rank cells under one header) and the one before 2017
+# (Pyth, no thead)
+CURRENT_PAGE = '''<table id="ratings-table"><thead>
+<tr><th colspan="5"></th><th colspan="6">Ratings</th></tr>
+<tr><th>Rk</th><th>Team</th><th>Conf</th><th>W-L</th><th>NetRtg</th><th colspan="2">ORtg</th><th colspan="2">DRtg</th><th colspan="2">AdjT</th></tr>
+</thead><tbody>
+<tr><td>1</td><td><a href="team.php?team=Houston">Houston</a> <span class="seed">1</span></td><td>B12</td><td>30-4</td><td>+29.80</td><td>118.9</td><td>19</td><td>89.1</td><td>2</td><td>63.5</td><td>349</td></tr>
+<tr><th>Rk</th><th>Team</th><th>Conf</th><th>W-L</th><th>NetRtg</th><th colspan="2">ORtg</th><th colspan="2">DRtg</th><th colspan="2">AdjT</th></tr>
+<tr><td>2</td><td><a href="team.php?team=Connecticut">Connecticut</a> <span class="seed">1</span></td><td>BE</td><td>31-3</td><td>+29.67</td><td>124.3</td><td>1</td><td>94.6</td><td>12</td><td>64.6</td><td>330</td></tr>
+</tbody></table>'''
+OLD_PAGE = '''<table>
+<tr><th>Rank</th><th>Team</th><th>Conf</th><th>W-L</th><th>Pyth</th><th>AdjO</th><th></th><th>AdjD</th><th></th><th>AdjT</th><th></th></tr>
+<tr><td>1</td><td><a href="team.php?team=Kansas">Kansas</a></td><td>B12</td><td>31-3</td><td>.9781</td><td>121.6</td><td>2</td><td>85.8</td><td>1</td><td>67.3</td><td>90</td></tr>
+</table>'''
+
+def test_both_layouts_parse():
+    current = parse_kenpom_page(CURRENT_PAGE)
+    assert current['Team'].tolist() == ['Houston', 'Connecticut']
+    assert current['NetRtg'].tolist() == [29.8, 29.7]
+    assert current['AdjT'].tolist() == [63.5, 64.6]
+
+    old = parse_kenpom_page(OLD_PAGE)
+    assert old[['Team', 'NetRtg', 'ORtg', 'DRtg']].values.tolist() == [['Kansas', 35.8, 121.6, 85.8]]
+    with pytest.raises(ValueError):
+        parse_kenpom_page('<html>Please log in</html>')
+
+class FakeWayback:
+    '''
+    Serves a capture listing with a newer capture that isn't a ratings page, and the pages.
+    '''
+    def __init__(self, year):
+        self.urls = []
+        self.pages = {f'{WAYBACK_URL}/web/{year}0317120000id_/https://kenpom.com/': '<html>Please log in</html>',
+                      f'{WAYBACK_URL}/web/{year}0316080000id_/https://kenpom.com/': CURRENT_PAGE}
+
+    def __call__(self, url):
+        self.urls.append(url)
+        if '/cdx/' in url:
+            rows = [['urlkey', 'timestamp', 'original']]
+            if 'url=kenpom.com/&' in url:
+                rows += [['com,kenpom)/', '20240316080000', 'https://kenpom.com/'], ['com,kenpom)/', '20240317120000', 'https://kenpom.com/']]
+            body = json.dumps(rows)
+        else:
+            body = self.pages[url]
+        return type('Response', (), {'status_code': 200, 'text': body})()
+
+def test_snapshot_comes_from_the_last_ratings_capture_before_the_tournament(tmp_path, monkeypatch):
+    monkeypatch.setattr(fetch, 'CACHE_DIR', str(tmp_path / 'cache'))
+    monkeypatch.setattr(fetch, 'OFFLINE', False)
+    wayback = FakeWayback(2024)
+
+    path = build_snapshot(2024, wayback, str(tmp_path))
+    assert all(f'to={capture_cutoff(2024)}' in url for url in wayback.urls if '/cdx/' in url)
+    assert capture_cutoff(2024) == '20240318'
+    ratings = pre_tournament_kenpom(2024, str(tmp_path))
+    assert path.endswith('kenpom_2024.csv') and ratings['Team'].tolist() == ['Houston', 'Connecticut']
+
+    # a rerun is served from the page cache
+    n_requests = len(wayback.urls)
+    build_snapshot(2024, wayback, str(tmp_path))
+    assert len(wayback.urls) == n_requests
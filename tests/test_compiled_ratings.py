@@ -0,0 +1,51 @@
+import gc
+import re
+import numpy as np
+import pytest
+from bracket import compile_bracket
+import compiled_ratings
+from compiled_ratings import CompiledRatings
+from team_registry import team_registry
+from simulate_game import wp_kenpom, wp_silver
+
+def test_matrix_matches_pairwise_win_probabilities(bracket_68):
+    description, ratings, _ = bracket_68
+    teams = compile_bracket(description).teams
+    silver = ratings.rename(columns={'NetRtg': 'Quasi-Sagarin'})
+    for method, ratings_df, wp in (('kenpom', ratings, wp_kenpom), ('silver', silver, wp_silver)):
+        compiled = CompiledRatings(teams, ratings_df, method)
+        expected = np.array([[wp(team1, team2, ratings_df) for team2 in teams] for team1 in teams])
+        assert np.allclose(compiled.wp, expected, rtol=0, atol=1e-12)
+        assert compiled.win_prob(teams[0], teams[1]) == compiled.wp[0, 1]
+
+def test_unresolved_teams_raise(bracket_68):
+    description, ratings, _ = bracket_68
+    teams = compile_bracket(description).teams
+    # a name the registry doesn't know
+    unknown = teams[:3] + [type(teams[0])('Not A College', 1, None)]
+    with pytest.raises(KeyError, match='Not A College'):
+        CompiledRatings(unknown, ratings, 'kenpom')
+    # a known team without a rating
+    unrated = ratings[ratings['Team'] != teams[1].team_name]
+    with pytest.raises(KeyError, match=re.escape(teams[1].team_name)):
+        CompiledRatings(teams, unrated, 'kenpom')
+
+def test_table_names_are_resolved_once(bracket_68, monkeypatch):
+    description, ratings, _ = bracket_68
+    teams = compile_bracket(description).teams
+    table = ratings.copy()
+    expected = [wp_kenpom(teams[0], teams[1], table)]
+    registry = team_registry()
+    calls = []
+    resolve = registry.resolve
+    monkeypatch.setattr(registry, 'resolve', lambda name: calls.append(name) or resolve(name))
+    # every game reads the table through the index built on its first lookup
+    assert [wp_kenpom(teams[0], teams[1], table) for _ in range(3)] == expected * 3
+    assert all(name in (teams[0].team_name, teams[1].team_name) for name in calls)
+
+    # the index goes with the table
+    key = id(table)
+    assert key in compiled_ratings._TEAM_ROWS
+    del table
+    gc.collect()
+    assert key not in compiled_ratings._TEAM_ROWS
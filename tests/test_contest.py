@@ -0,0 +1,12 @@
+import numpy as np
+from simulate_tournament import simulate_n_tournaments
+from contest import ppg_weights
+
+def test_ppg_weights_match_rosters_by_team_id(bracket_68):
+    description, ratings, players = bracket_68
+    _, results = simulate_n_tournaments(description, players, ratings, 'kenpom', N=10, engine='batch', seed=0)
+    # rosters keyed by another spelling of each team than the bracket's
+    respelled = {team.upper(): roster for team, roster in players.items()}
+    weights = ppg_weights(results, respelled)
+    expected = [players[team][player]['ppg'] for team, player in results.players]
+    assert np.array_equal(weights, expected)
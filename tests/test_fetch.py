@@ -0,0 +1,70 @@
+import os
+import pytest
+import fetch
+from fetch import CacheMiss, DAY
+
+class FakeGetter:
+    '''
+    Stands in for requests.get, serving a numbered page and counting the requests.
+    '''
+    def __init__(self):
+        self.calls = 0
+
+    def __call__(self, url):
+        self.calls += 1
+        return type('Response', (), {'status_code': 200, 'text': f'<html>{url} #{self.calls}</html>'})()
+
+@pytest.fixture
+def cache(tmp_path, monkeypatch):
+    monkeypatch.setattr(fetch, 'CACHE_DIR', str(tmp_path))
+    monkeypatch.setattr(fetch, 'OFFLINE', False)
+    return tmp_path
+
+def test_pages_are_cached_content_addressed(cache):
+    getter = FakeGetter()
+    first = fetch.fetch('https://example.com/a', ttl=DAY, getter=getter)
+    assert fetch.fetch('https://example.com/a', ttl=DAY, getter=getter) == first
+    assert getter.calls == 1
+    blobs = [name for _, _, names in os.walk(cache / 'blobs') for name in names]
+    assert len(blobs) == 1 and len(os.listdir(cache / 'index')) == 1
+
+    assert fetch.fetch('https://example.com/a', ttl=DAY, getter=getter, refresh=True) != first
+    assert getter.calls == 2
+
+def test_stale_pages_are_fetched_again(cache, monkeypatch):
+    getter = FakeGetter()
+    now = fetch.time.time()
+    fetch.fetch('https://example.com/a', ttl=60, getter=getter)
+    fetch.fetch('https://example.com/never', ttl=None, getter=getter)
+
+    monkeypatch.setattr(fetch.time, 'time', lambda: now + 59)
+    fetch.fetch('https://example.com/a', ttl=60, getter=getter)
+    assert getter.calls == 2
+    monkeypatch.setattr(fetch.time, 'time', lambda: now + 61)
+    assert fetch.fetch('https://example.com/a', ttl=60, getter=getter).endswith('#3</html>')
+    # pages without a TTL (past seasons) never expire
+    monkeypatch.setattr(fetch.time, 'time', lambda: now + 365 * DAY)
+    fetch.fetch('https://example.com/never', ttl=None, getter=getter)
+    assert getter.calls == 3
+
+def test_offline_mode_never_touches_the_network(cache, monkeypatch):
+    getter = FakeGetter()
+    now = fetch.time.time()
+    page = fetch.fetch('https://example.com/a', ttl=60, getter=getter)
+    fetch.set_offline()
+
+    def no_network(url):
+        raise AssertionError(f"Offline mode requested {url}")
+
+    # stale or refreshed pages are served from the cache
+    monkeypatch.setattr(fetch.time, 'time', lambda: now + DAY)
+    assert fetch.fetch('https://example.com/a', ttl=60, getter=no_network, refresh=True) == page
+    with pytest.raises(CacheMiss):
+        fetch.fetch('https://example.com/b', getter=no_network)
+
+def test_failed_requests_name_the_status_and_url(cache):
+    missing = lambda url: type('Response', (), {'status_code': 404, 'text': 'Not Found'})()
+    with pytest.raises(Exception, match=r'https://example\.com/gone: HTTP 404'):
+        fetch.fetch('https://example.com/gone', ttl=DAY, getter=missing)
+    # nothing is cached
+    assert not os.path.exists(cache / 'index')
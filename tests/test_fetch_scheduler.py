@@ -0,0 +1,93 @@
+import time
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import pytest
+import fetch
+from fetch_scheduler import RateLimitedFetcher
+from load_player_data import load_player_data_for_team
+
+TEAM_PAGE = '''<html><table id="players_per_game"><tbody>
+<tr><td data-stat="name_display"><a href="/cbb/players/first-player-1.html">First Player</a></td>
+<td data-stat="pts_per_g">15.1</td><td data-stat="fga_per_g">11.0</td><td data-stat="fta_per_g">3.5</td><td data-stat="mp_per_g">31.0</td></tr>
+<tr><td data-stat="name_display"><a href="/cbb/players/second-player-1.html">Second Player</a></td>
+<td data-stat="pts_per_g">8.0</td><td data-stat="fga_per_g">6.5</td><td data-stat="fta_per_g">1.0</td><td data-stat="mp_per_g">22.0</td></tr>
+</tbody></table></html>'''
+
+class StubSite(BaseHTTPRequestHandler):
+    '''
+    /team serves a roster page, /flaky/<n> fails with a 503 n times before serving it, /throttled
+    answers 429 with Retry-After: 0 once. Every request's path and arrival time is recorded.
+    '''
+    def do_GET(self):
+        server = self.server
+        with server.lock:
+            server.requests.append((self.path, time.monotonic()))
+            seen = sum(path == self.path for path, _ in server.requests)
+        status, headers = 200, {}
+        if self.path.startswith('/flaky/') and seen <= int(self.path.rsplit('/', 1)[1]):
+            status = 503
+        elif self.path == '/throttled' and seen == 1:
+            status, headers = 429, {'Retry-After': '0'}
+        body = TEAM_PAGE.encode('utf-8') if status == 200 else b'busy'
+        self.send_response(status)
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+@pytest.fixture
+def site():
+    server = ThreadingHTTPServer(('127.0.0.1', 0), StubSite)
+    server.requests, server.lock = [], threading.Lock()
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server, f'http://127.0.0.1:{server.server_address[1]}'
+    server.shutdown()
+    server.server_close()
+
+def test_token_bucket_paces_concurrent_requests(site):
+    server, base_url = site
+    fetcher = RateLimitedFetcher(rate=20, burst=1)
+    threads = [threading.Thread(target=fetcher.get, args=(f'{base_url}/team',)) for _ in range(6)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    arrivals = sorted(arrival for _, arrival in server.requests)
+    assert len(arrivals) == 6
+    # one token every 1 / 20 seconds, whatever the number of threads
+    assert arrivals[-1] - arrivals[0] >= 5 / 20 * 0.9
+    assert min(later - earlier for earlier, later in zip(arrivals, arrivals[1:])) >= 1 / 20 * 0.8
+
+def test_failed_requests_back_off_and_retry(site):
+    server, base_url = site
+    fetcher = RateLimitedFetcher(rate=1000, max_retries=4, backoff=0.05)
+    start = time.monotonic()
+    response = fetcher.get(f'{base_url}/flaky/2')
+    assert response.status_code == 200
+    assert [path for path, _ in server.requests] == ['/flaky/2'] * 3
+    # waits of 0.05 and 0.1 seconds before the two retries
+    arrivals = [arrival for _, arrival in server.requests]
+    assert arrivals[1] - arrivals[0] >= 0.05 * 0.9 and arrivals[2] - arrivals[1] >= 0.1 * 0.9
+    assert time.monotonic() - start < 1
+
+    # Retry-After is followed instead of the backoff
+    assert fetcher.get(f'{base_url}/throttled').status_code == 200
+    # once the retries run out the last response is returned
+    assert RateLimitedFetcher(rate=1000, max_retries=1, backoff=0.01).get(f'{base_url}/flaky/5').status_code == 503
+
+def test_rosters_load_from_an_injected_site(site, tmp_path, monkeypatch):
+    server, base_url = site
+    monkeypatch.setattr(fetch, 'CACHE_DIR', str(tmp_path))
+    monkeypatch.setattr(fetch, 'OFFLINE', False)
+    fetcher = RateLimitedFetcher(rate=1000)
+    roster = load_player_data_for_team('/team', 2025, fetcher.get, gamelogs=False, base_url=base_url)
+    assert roster['First Player']['ppg'] == 15.1 and roster['Second Player']['fga'] == 6.5
+    # the page comes from the cache the second time
+    load_player_data_for_team('/team', 2025, fetcher.get, gamelogs=False, base_url=base_url)
+    assert len(server.requests) == 1
@@ -0,0 +1,46 @@
+import sys
+import types
+import pytest
+import instrument
+from instrument import instrumented, stage, count, timed, NULL_STAGE, max_rss_mb
+from simulate_tournament import simulate_n_tournaments
+
+def test_disabled_instrumentation_records_nothing(bracket_68):
+    description, ratings, players = bracket_68
+    items = [1, 2]
+    assert stage('anything') is NULL_STAGE and timed('anything', items) is items
+    simulate_n_tournaments(description, players, ratings, 'kenpom', N=3)
+    assert not instrument.enabled()
+
+    # nothing run before the block shows up in it
+    with instrumented() as run:
+        pass
+    assert run.timers == {} and run.counters == {}
+
+def test_enabled_instrumentation_records_stages_and_counts(bracket_68):
+    description, ratings, players = bracket_68
+    with instrumented() as run:
+        simulate_n_tournaments(description, players, ratings, 'kenpom', N=5)
+        with pytest.raises(RuntimeError):
+            with instrumented():
+                pass
+    summary = run.summary()
+    assert summary['counters']['sims'] == 5
+    # one draw per game, play-in games included
+    assert summary['counters']['game draws'] == 5 * 67
+    assert summary['stages']['compile ratings']['calls'] == 1
+    assert summary['stages']['bookkeeping deepcopy']['calls'] == 5
+    assert summary['stages']['win prob lookup']['calls'] == 5 * 67
+    assert all(stage['seconds'] <= summary['elapsed_s'] for stage in summary['stages'].values())
+    assert summary['sims_per_s'] > 0
+    assert 'compile ratings' in run.report()
+
+def test_max_rss_is_scaled_by_platform(monkeypatch):
+    usage = types.SimpleNamespace(ru_maxrss=3 * 2 ** 20)
+    monkeypatch.setitem(sys.modules, 'resource', types.SimpleNamespace(RUSAGE_SELF=0, getrusage=lambda who: usage))
+    monkeypatch.setattr(sys, 'platform', 'linux')
+    assert max_rss_mb() == 3 * 1024
+    monkeypatch.setattr(sys, 'platform', 'darwin')
+    assert max_rss_mb() == 3
+    monkeypatch.setattr(sys, 'platform', 'win32')
+    assert max_rss_mb() is None
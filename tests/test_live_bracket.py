@@ -0,0 +1,42 @@
+import numpy as np
+from live_bracket import LiveBracket
+
+def first_round_results(description):
+    '''
+    Wins after the First Four and the first round, every higher seed and first play-in team winning.
+    '''
+    wins = {play_in['teams'][0]['name']: 1 for play_in in description['first_four']}
+    for matchups in description['regions'].values():
+        for matchup in matchups:
+            wins[matchup['team_1']['name']] = 1
+    return wins
+
+def test_known_results_are_fixed_and_actual_points_added(bracket_68):
+    description, ratings, players = bracket_68
+    live = LiveBracket(description, players, ratings, 'kenpom')
+    live.update(first_round_results(description))
+    schedule = live.ratings.schedule
+    played = live.known >= 0
+    assert played.sum() == 4 + 32 and live.remaining_games() == 67 - 36
+    assert len(live.alive()) == 32
+
+    _, before = live.simulate(2000, seed=0)
+    # the played games have their actual winner in every simulation
+    assert np.all(before.winners[:, played] == live.known[played])
+    first_round = schedule.rounds[1]
+    winners = set(live.known[first_round].tolist())
+    assert np.allclose(before.advancement_probs()[sorted(winners), 1], 1)
+
+    # a winner's and a loser's players scored in the first round
+    team = description['regions']['south'][0]['team_1']['name']
+    loser = description['regions']['south'][1]['team_2']['name']
+    live.update(player_points={team: {f'{team} 1': 21}, loser: {f'{loser} 0': 9}})
+    _, after = live.simulate(2000, seed=0)
+    col, loser_col = before.columns([(team, f'{team} 1'), (loser, f'{loser} 0')])
+    multiplier, loser_multiplier = live.multipliers[col], live.multipliers[loser_col]
+    # the same draws, plus the points already scored times the seed multiplier
+    assert np.allclose(after.totals[:, col] - before.totals[:, col], 21 * multiplier)
+    assert np.all(before.totals[:, loser_col] == 0) and np.all(after.totals[:, loser_col] == 9 * loser_multiplier)
+    others = np.ones(len(live.players), dtype=bool)
+    others[[col, loser_col]] = False
+    assert np.array_equal(after.totals[:, others], before.totals[:, others])
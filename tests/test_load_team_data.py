@@ -0,0 +1,24 @@
+import pandas as pd
+import columnar
+import load_team_data
+
+def test_kenpom_bundle_is_rebuilt_when_the_page_changes(tmp_path, monkeypatch):
+    monkeypatch.setattr(columnar, 'BUNDLE_DIR', str(tmp_path))
+    page = {'html': '<html>Duke 30.5</html>'}
+    builds = []
+
+    def pipeline(year, html_content):
+        builds.append(html_content)
+        return pd.DataFrame({'Team': ['Duke'], 'NetRtg': [float(html_content.split()[-1][:-7])]})
+
+    monkeypatch.setattr(load_team_data, 'kenpom_page', lambda year, refresh=False: page['html'])
+    monkeypatch.setattr(load_team_data, 'full_kenpom_pipeline', pipeline)
+
+    assert load_team_data.kenpom_ratings_bundle(2025)['NetRtg'][0] == 30.5
+    assert load_team_data.kenpom_ratings_bundle(2025)['NetRtg'][0] == 30.5
+    assert len(builds) == 1
+
+    # the cached page expired and the re-fetched one has new ratings
+    page['html'] = '<html>Duke 31.25</html>'
+    assert load_team_data.kenpom_ratings_bundle(2025)['NetRtg'][0] == 31.25
+    assert len(builds) == 2
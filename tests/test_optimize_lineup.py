@@ -0,0 +1,36 @@
+from itertools import combinations
+import numpy as np
+import pytest
+from batch_engine import compile_bracket_ratings, player_inputs, simulate_batch
+from sim_results import SimResults
+from optimize_lineup import optimize_lineup, objective_values
+
+def test_objectives_find_the_known_optimum(bracket_68):
+    description, ratings, players_dict = bracket_68
+    compiled = compile_bracket_ratings(description, ratings, 'kenpom')
+    players, _, _, _ = player_inputs(compiled.teams, players_dict)
+    players = players[:5]
+    N = 1000
+    rng = np.random.default_rng(0)
+    winners = simulate_batch(compiled.wp, N, rng, schedule=compiled.schedule)
+    # steady players A (10 a sim) and B (9), a boom-or-bust player C (40 in a fifth of the sims,
+    # 8 on average) and two fillers
+    boom = np.zeros(N, dtype=np.float32)
+    boom[rng.choice(N, N // 5, replace=False)] = 40
+    totals = np.column_stack([np.full(N, 10), np.full(N, 9), boom, np.full(N, 1), np.zeros(N)]).astype(np.float32)
+    results = SimResults(compiled.teams, players, winners, totals, compiled.schedule)
+    picks = [(team, player) for _, team, player in players]
+
+    # A and B have the best mean, A and C the best 90th percentile (50) and the only chance of
+    # beating 49.5
+    for objective, kwargs, best, value in (('mean', {}, [0, 1], 19), ('quantile', {'q': 0.9}, [0, 2], 50),
+                                           ('prob_exceed', {'target': 49.5}, [0, 2], 0.2)):
+        strategy, found = optimize_lineup(results, objective, size=2, **kwargs)
+        assert sorted(strategy) == sorted(picks[i] for i in best)
+        assert found == pytest.approx(value)
+        # no lineup does better
+        everything = np.column_stack([totals[:, list(pair)].sum(axis=1) for pair in combinations(range(5), 2)])
+        assert objective_values(everything, objective, **kwargs).max() == pytest.approx(value)
+
+    with pytest.raises(ValueError):
+        optimize_lineup(results, 'prob_exceed', size=2)
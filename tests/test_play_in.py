@@ -0,0 +1,76 @@
+import numpy as np
+from bracket import compile_bracket
+from exact_bracket import exact_tournament, games_played_moments
+from compiled_ratings import CompiledRatings
+from player_moments import player_moments
+from simulate_tournament import simulate_n_tournaments
+from accumulators import Welford
+
+# Play-in games don't count: players score no points in them and they aren't games played
+
+def test_schedule_marks_play_in_games(bracket_68):
+    description, _, _ = bracket_68
+    schedule = compile_bracket(description)
+    assert schedule.n_teams == 68 and schedule.n_games == 67
+    assert schedule.play_in.sum() == 4
+    assert np.all(schedule.play_in[schedule.rounds[0]])
+    assert schedule.play_in_games.sum() == 8
+
+def test_batch_engine_skips_play_in_games(bracket_68):
+    description, ratings, players = bracket_68
+    _, results = simulate_n_tournaments(description, players, ratings, 'kenpom', N=4000, engine='batch', seed=0)
+    schedule = results.schedule
+    played = results.games_played()
+    # every counted game has two teams
+    assert np.all(played.sum(axis=1) == 2 * (~schedule.play_in).sum())
+
+    slots = results.player_slots
+    team1, team2 = schedule.entrants(results.winners)
+    for game in np.flatnonzero(schedule.play_in):
+        losers = np.where(results.winners[:, game] == team1[:, game], team2[:, game], team1[:, game])
+        lost = losers[:, None] == slots[None, :]
+        assert np.all(played[np.arange(len(results)), losers] == 0)
+        assert np.all(results.totals[lost] == 0)
+
+def test_engines_agree_with_exact_games_played(bracket_68):
+    description, ratings, players = bracket_68
+    schedule = compile_bracket(description)
+    compiled = CompiledRatings(schedule.teams, ratings, 'kenpom', schedule=schedule)
+    mean, _ = games_played_moments(compiled.wp, compiled.schedule)
+    _, table = exact_tournament(description, ratings, 'kenpom')
+    assert np.allclose(table['Games Played'], mean)
+    assert np.isclose(mean.sum(), 2 * 63)
+    # a play-in team plays fewer games than it wins, its play-in win doesn't count
+    play_in = compiled.schedule.play_in_games > 0
+    assert np.all(mean[play_in] < table.iloc[:, 2:-1].sum(axis=1)[play_in] + 1e-12)
+
+    _, results = simulate_n_tournaments(description, players, ratings, 'kenpom', N=20000, engine='batch', seed=1)
+    assert np.allclose(results.games_played().mean(axis=0), mean, atol=0.05)
+
+    moments, _ = player_moments(description, players, ratings, 'kenpom')
+    stderr = np.sqrt(moments['Variance'] / len(results))
+    assert np.all(np.abs(results.totals.mean(axis=0) - moments['Mean']) < 5 * stderr + 1e-6)
+
+    _, (welford, _) = simulate_n_tournaments(description, players, ratings, 'kenpom', N=20000, engine='stream', seed=2,
+                                             accumulators=[Welford()])
+    assert np.all(np.abs(welford.mean - moments['Mean']) < 5 * stderr + 1e-6)
+
+def test_object_engine_skips_play_in_games(bracket_68):
+    description, ratings, players = bracket_68
+    _, sims = simulate_n_tournaments(description, players, ratings, 'kenpom', N=50)
+    for tourney in sims:
+        schedule = tourney.schedule
+        for game in np.flatnonzero(schedule.play_in):
+            winner = tourney.winners[game]
+            loser = next(team for team in schedule.teams[schedule.lo[game]:schedule.hi[game]] if team is not winner)
+            assert all(stats['running_total_simulated'] == 0 for stats in tourney.players_bookkeeping[loser.team_name].values())
+
+def test_played_play_in_keeps_its_winner(bracket_68):
+    description, _, _ = bracket_68
+    first_four = [dict(play_in, winner=play_in['teams'][1]['name']) if i < 2 else play_in
+                  for i, play_in in enumerate(description['first_four'])]
+    schedule = compile_bracket(dict(description, first_four=first_four))
+    assert schedule.n_teams == 66 and schedule.play_in.sum() == 2
+    names = [team.team_name for team in schedule.teams]
+    for play_in in first_four[:2]:
+        assert play_in['winner'] in names and play_in['teams'][0]['name'] not in names
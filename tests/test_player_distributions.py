@@ -0,0 +1,21 @@
+import numpy as np
+from player_distributions import TABLE_SIZE, fit_quantiles, normal_quantiles, sampling_tables, sample_tables, quantile_moments
+
+def test_sampled_points_match_the_tables_moments():
+    rng = np.random.default_rng(0)
+    # a skewed gamelog, a short one, a missing game and the normal prior of a few ppg
+    quantiles = np.vstack([fit_quantiles(rng.gamma(2, 6, 30), 12), fit_quantiles([0, 4, 25, np.nan], 9),
+                           normal_quantiles([20, 3.5, 0])])
+    mean, variance = quantile_moments(quantiles)
+    tables = sampling_tables(quantiles)
+    # a table's cells average to the distribution's mean exactly
+    assert np.allclose(tables.mean(axis=1, dtype=np.float64), mean, rtol=1e-5, atol=1e-5)
+
+    N = 200000
+    rows = np.repeat(np.arange(len(quantiles)), N).reshape(len(quantiles), N)
+    points = sample_tables(tables, (rows * TABLE_SIZE).astype(np.int32), rng.random(rows.shape, dtype=np.float32)).astype(np.float64)
+    stderr = np.sqrt(variance / N)
+    assert np.all(np.abs(points.mean(axis=1) - mean) <= 5 * stderr + 1e-9)
+    assert np.allclose(points.var(axis=1), variance, rtol=0.02, atol=1e-9)
+    # a player without points never scores
+    assert np.all(points[-1] == 0)
@@ -0,0 +1,24 @@
+import numpy as np
+from player_moments import player_moments
+from batch_engine import compile_bracket_ratings, player_inputs, simulate_batch, simulate_player_totals
+
+def test_moments_match_simulated_totals(south_17):
+    description, ratings, players = south_17
+    table, cov = player_moments(description, players, ratings, 'kenpom')
+
+    compiled = compile_bracket_ratings(description, ratings, 'kenpom')
+    _, slots, ppg, multipliers = player_inputs(compiled.teams, players)
+    rng = np.random.default_rng(0)
+    N = 100000
+    winners = simulate_batch(compiled.wp, N, rng, schedule=compiled.schedule)
+    totals = simulate_player_totals(winners, slots, ppg, multipliers, rng, schedule=compiled.schedule).astype(float)
+
+    stderr = np.sqrt(table['Variance'].to_numpy() / N)
+    assert np.all(np.abs(totals.mean(axis=0) - table['Mean']) < 5 * stderr)
+    sample_cov = np.cov(totals, rowvar=False)
+    assert np.allclose(np.diag(sample_cov), table['Variance'], rtol=0.05)
+    # relative to the two players' standard deviations
+    scale = np.sqrt(np.outer(table['Variance'], table['Variance']))
+    assert np.all(np.abs(sample_cov - cov) < 0.03 * scale)
+    # teammates play the same games
+    assert slots[0] == slots[1] and cov[0, 1] > 0
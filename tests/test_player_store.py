@@ -0,0 +1,65 @@
+import pytest
+import fetch
+from player_store import PlayerStore
+from load_player_data import load_player_data
+
+TEAM_PAGE = '''<html><table id="players_per_game"><tbody>
+<tr><td data-stat="name_display"><a href="/cbb/players/{team}-1.html">{team} Guard</a></td><td data-stat="pts_per_g">{ppg}</td></tr>
+</tbody></table></html>'''
+BRACKET = {'south': [{'team_1': {'name': 'Duke', 'seed': 1, 'link': '/duke'},
+                      'team_2': {'name': 'Vermont', 'seed': 16, 'link': '/vermont'}, 'location': None},
+                     {'team_1': {'name': 'Kansas', 'seed': 8, 'link': '/kansas'},
+                      'team_2': {'name': 'Iowa', 'seed': 9, 'link': '/iowa'}, 'location': None}]}
+
+class FakeSite:
+    '''
+    Serves a one-player roster page per team, whose ppg is the site's version, and fails for
+    the teams in down. Every requested link is recorded.
+    '''
+    def __init__(self, version=10, down=()):
+        self.version = version
+        self.down = set(down)
+        self.requests = []
+
+    def get(self, url):
+        link = url[len('https://example.com'):]
+        self.requests.append(link)
+        if link in self.down:
+            raise ConnectionError(f"{url} is down")
+        body = TEAM_PAGE.format(team=link.strip('/'), ppg=self.version)
+        return type('Response', (), {'status_code': 200, 'text': body})()
+
+@pytest.fixture
+def store(tmp_path, monkeypatch):
+    monkeypatch.setattr(fetch, 'CACHE_DIR', str(tmp_path / 'cache'))
+    monkeypatch.setattr(fetch, 'OFFLINE', False)
+    with PlayerStore(2025, str(tmp_path / 'players.sqlite')) as store:
+        yield store
+
+def load(store, site, **kwargs):
+    return load_player_data(2025, BRACKET, workers=1, fetcher=site, store=store, gamelogs=False, base_url='https://example.com', **kwargs)
+
+def test_rerun_loads_only_missing_teams_and_refresh_overwrites(store):
+    # an interrupted load keeps the teams finished before the failure
+    with pytest.raises(ConnectionError):
+        load(store, FakeSite(down=['/kansas']))
+    assert store.teams() == {'Duke', 'Vermont'}
+
+    # the rerun only loads the other two, and Iowa's page, fetched before the failure, comes
+    # from the page cache
+    site = FakeSite()
+    rosters = load(store, site)
+    assert site.requests == ['/kansas']
+    assert set(rosters) == {'Duke', 'Vermont', 'Kansas', 'Iowa'}
+    assert rosters['Kansas']['kansas Guard']['ppg'] == 10
+
+    # nothing is fetched once every team is stored
+    site = FakeSite()
+    assert load(store, site) == rosters and site.requests == []
+
+    # refresh fetches every team again, past the page cache, and replaces the stored rosters
+    site = FakeSite(version=12)
+    rosters = load(store, site, refresh=True)
+    assert sorted(site.requests) == ['/duke', '/iowa', '/kansas', '/vermont']
+    assert all(roster[f'{team.lower()} Guard']['ppg'] == 12 for team, roster in rosters.items())
+    assert store.load() == rosters
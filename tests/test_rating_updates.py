@@ -0,0 +1,38 @@
+import numpy as np
+from batch_engine import compile_bracket_ratings, rating_updates, simulate_batch, simulate_batch_updating, advancement_counts
+from variance_reduction import game_uniforms
+from simulate_tournament import simulate_n_tournaments
+
+def test_zero_gain_reproduces_static_ratings(bracket_68):
+    description, ratings, _ = bracket_68
+    compiled = compile_bracket_ratings(description, ratings, 'kenpom')
+    schedule = compiled.schedule
+    assert rating_updates(compiled, 0) is None
+    N = 20000
+    uniforms = game_uniforms(schedule.n_games, N, np.random.default_rng(0))
+    static = simulate_batch(compiled.wp, N, schedule=schedule, uniforms=uniforms)
+    updating = simulate_batch_updating(rating_updates(compiled, 1)._replace(k=0), N, schedule=schedule, uniforms=uniforms)
+    # the same uniform decides every game the same way, up to float32 rounding at the boundary
+    assert (static != updating).any(axis=1).mean() < 1e-3
+
+def test_object_and_batch_engines_agree_with_updates(south_17):
+    description, ratings, players = south_17
+    k = 0.3
+    np.random.seed(0)
+    n_object = 3000
+    _, sims = simulate_n_tournaments(description, players, ratings, 'kenpom', N=n_object, player_bk_used=False, rating_update=k)
+    schedule = sims[0].schedule
+    winners = np.array([[sim.schedule.teams.index(team) for team in sim.winners] for sim in sims], dtype=np.int8)
+    object_probs = advancement_counts(winners, schedule) / n_object
+
+    n_batch = 100000
+    _, results = simulate_n_tournaments(description, players, ratings, 'kenpom', N=n_batch, engine='batch', seed=0, rating_update=k)
+    batch_probs = results.advancement_probs()
+    p = batch_probs
+    stderr = np.sqrt(p * (1 - p) * (1 / n_object + 1 / n_batch))
+    assert np.all(np.abs(object_probs - batch_probs) <= 5 * stderr + 1e-9)
+
+    # and the updates matter: the later rounds depend on how the teams won their earlier games
+    _, static = simulate_n_tournaments(description, players, ratings, 'kenpom', N=n_batch, engine='batch', seed=0)
+    p = static.advancement_probs()
+    assert np.abs(batch_probs - p).max() > 10 * np.sqrt(p * (1 - p) * 2 / n_batch).max()
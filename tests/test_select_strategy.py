@@ -0,0 +1,28 @@
+import numpy as np
+from batch_engine import compile_bracket_ratings, player_inputs, simulate_batch
+from sim_results import SimResults
+from select_strategy import score_strategy, score_strategies
+
+def test_batched_scores_match_each_strategy(bracket_68):
+    description, ratings, players_dict = bracket_68
+    compiled = compile_bracket_ratings(description, ratings, 'kenpom')
+    players, _, _, _ = player_inputs(compiled.teams, players_dict)
+    rng = np.random.default_rng(0)
+    N = 400
+    winners = simulate_batch(compiled.wp, N, rng, schedule=compiled.schedule)
+    totals = (rng.integers(0, 200, (N, len(players))) / 2).astype(np.float32)
+    results = SimResults(compiled.teams, players, winners, totals, compiled.schedule)
+
+    picks = [(team, player) for _, team, player in players]
+    strategies = [[picks[i] for i in rng.choice(len(picks), 15, replace=False)] for _ in range(25)]
+    scores = score_strategies(strategies, results)
+    summary = score_strategies(strategies, results, summary=True, quantiles=(0.5, 0.9))
+    assert scores.shape == (len(strategies), N)
+    for strategy, row, (_, stats) in zip(strategies, scores, summary.iterrows()):
+        expected = score_strategy(strategy, results)
+        assert np.allclose(row, expected)
+        # the per-simulation views score the same as the arrays
+        assert np.allclose(score_strategy(strategy, list(results)), expected)
+        assert np.isclose(stats['mean'], expected.mean())
+        assert np.isclose(stats['std'], expected.std(ddof=1))
+        assert np.allclose([stats['q50'], stats['q90']], np.quantile(expected, [0.5, 0.9]))
@@ -0,0 +1,40 @@
+import numpy as np
+import pytest
+from batch_engine import compile_bracket_ratings, player_inputs, simulate_batch
+from sim_results import SimResults
+from team_registry import team_registry
+
+def test_views_read_back_the_arrays(bracket_68):
+    description, ratings, players_dict = bracket_68
+    compiled = compile_bracket_ratings(description, ratings, 'kenpom')
+    players, slots, _, _ = player_inputs(compiled.teams, players_dict)
+    N = 500
+    rng = np.random.default_rng(0)
+    winners = simulate_batch(compiled.wp, N, rng, schedule=compiled.schedule)
+    # totals with fractions float32 holds exactly
+    totals = (rng.integers(0, 400, (N, len(players))) / 4).astype(np.float32)
+    results = SimResults(compiled.teams, players, winners, totals, compiled.schedule)
+    assert results.totals.dtype == np.float32 and len(results) == N
+
+    for col in [0, 7, len(players) - 1]:
+        _, team, player = players[col]
+        column = results.player_totals(team, player)
+        assert np.array_equal(column, totals[:, col])
+        # teams can be named by ID too
+        assert np.array_equal(results.player_totals(team_registry().resolve(team), player), column)
+
+    strategy = [(team, player) for _, team, player in players[:15]]
+    scores = results.strategy_scores(strategy)
+    # summed in float64, exact for these totals
+    assert scores.dtype == np.float64 and np.array_equal(scores, totals[:, :15].astype(float).sum(axis=1))
+    with pytest.raises(KeyError):
+        results.columns([(players[0][1], 'Nobody')])
+
+    # per-simulation views give the bookkeeping dict back
+    for i, view in zip(range(3), results):
+        bookkeeping = view.players_bookkeeping
+        assert [bookkeeping[team][player]['running_total_simulated'] for _, team, player in players] == totals[i].tolist()
+        assert view.champion is compiled.teams[winners[i, -1]]
+    assert results[4].champion is compiled.teams[results.champions()[4]]
+    assert np.isclose(sum(results.champion_probs().values()), 1)
+    assert np.allclose(results.advancement_probs()[:, -1], np.bincount(winners[:, -1], minlength=len(compiled.teams)) / N)
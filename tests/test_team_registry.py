@@ -0,0 +1,27 @@
+import pytest
+from batch_engine import bracket_teams, bracket_rosters, player_inputs
+from columnar import PlayerBundle
+
+def test_unresolved_roster_names_are_all_reported(bracket_68):
+    description, _, players = bracket_68
+    teams = bracket_teams(description)
+    players = dict(players, **{'Dukee': {}, 'Gonzagaa': {}})
+    with pytest.raises(KeyError) as error:
+        bracket_rosters(teams, players)
+    assert 'Dukee' in str(error.value) and 'Gonzagaa' in str(error.value)
+
+def test_rosters_match_other_spellings(bracket_68):
+    description, _, players = bracket_68
+    teams = bracket_teams(description)
+    # a roster keyed by another spelling of the same team
+    name = teams[0].team_name
+    rosters = bracket_rosters(teams, {name.upper(): players[name]})
+    assert rosters[0] == players[name] and rosters[1] == {}
+
+def test_unresolved_bundle_names_are_reported(bracket_68):
+    description, _, players = bracket_68
+    teams = bracket_teams(description)
+    bundle = PlayerBundle.from_dict(dict(players, **{'Dukee': {'Someone': {'ppg': 10.0}}}))
+    with pytest.raises(KeyError) as error:
+        player_inputs(teams, bundle)
+    assert 'Dukee' in str(error.value)
@@ -0,0 +1,54 @@
+import numpy as np
+import pytest
+from batch_engine import compile_bracket_ratings, player_inputs, tempo_inputs, simulate_batch_tempo, simulate_player_totals
+
+@pytest.fixture
+def tempo_bracket(bracket_68):
+    '''
+    The fixture bracket with efficiencies and tempos behind its ratings, and shooting stats.
+    '''
+    description, ratings, players = bracket_68
+    rng = np.random.default_rng(1)
+    ratings = ratings.assign(ORtg=105 + ratings['NetRtg'] / 2, DRtg=105 - ratings['NetRtg'] / 2,
+                             AdjT=rng.uniform(62, 74, len(ratings)))
+    players = {team: {player: dict(stats, fga=stats['ppg'] / 1.1, fta=stats['ppg'] / 4) for player, stats in roster.items()}
+               for team, roster in players.items()}
+    compiled = compile_bracket_ratings(description, ratings, 'tempo')
+    return compiled, players
+
+def test_win_probability_matches_simulated_scores(tempo_bracket):
+    compiled, players = tempo_bracket
+    schedule = compiled.schedule
+    N = 40000
+    winners, scores = simulate_batch_tempo(tempo_inputs(compiled, players), N, np.random.default_rng(0), schedule=schedule)
+    # the games between two fixed teams
+    for game in np.flatnonzero((schedule.left >= schedule.n_games) & (schedule.right >= schedule.n_games)):
+        team1, team2 = schedule.left[game] - schedule.n_games, schedule.right[game] - schedule.n_games
+        p = compiled.wp[team1, team2]
+        won = (scores[:, game, 0] > scores[:, game, 1]).mean()
+        assert abs(won - p) <= 5 * np.sqrt(p * (1 - p) / N) + 1e-9
+        assert np.array_equal(winners[:, game] == team1, scores[:, game, 0] > scores[:, game, 1])
+
+def test_team_points_add_up_to_player_points(tempo_bracket):
+    compiled, players = tempo_bracket
+    schedule = compiled.schedule
+    tempo = tempo_inputs(compiled, players)
+    _, slots, ppg, multipliers = player_inputs(compiled.teams, players)
+    rng = np.random.default_rng(0)
+    N = 500
+    winners, scores = simulate_batch_tempo(tempo, N, rng, schedule=schedule)
+    totals = simulate_player_totals(winners, slots, ppg, multipliers, rng, scores=scores, tempo=tempo, schedule=schedule)
+
+    # every team's points in its counted games, times its seed multiplier
+    team1, team2 = schedule.entrants(winners)
+    team_points = np.zeros((N, schedule.n_teams))
+    rows = np.arange(N)
+    for game in np.flatnonzero(~schedule.play_in):
+        team_points[rows, team1[:, game]] += scores[:, game, 0]
+        team_points[rows, team2[:, game]] += scores[:, game, 1]
+    team_points *= [team.get_multiplier() for team in compiled.teams]
+
+    player_points = np.zeros((N, schedule.n_teams))
+    np.add.at(player_points, (slice(None), slots), totals.astype(np.float64))
+    assert np.allclose(player_points, team_points, rtol=1e-4, atol=1e-2)
+    assert team_points.sum(axis=1).min() > 0
@@ -0,0 +1,35 @@
+from region import Region
+from tournament import Tournament
+from simulate_tournament import simulate_n_tournaments
+
+def four_regions(description):
+    '''
+    The description's regions as Regions, each play-in placeholder taken by the game's first team.
+    '''
+    regions = {}
+    for name, matchups in description['regions'].items():
+        winners = {play_in['seed']: play_in['teams'][0] for play_in in description['first_four'] if play_in['region'] == name}
+        regions[name] = Region([dict(m, team_2=winners[m['team_2']['seed']]) if m['team_2']['name'] == 'Play-In' else m
+                                for m in matchups])
+    return regions
+
+def test_four_region_constructor(bracket_68):
+    description, ratings, players = bracket_68
+    regions = four_regions(description)
+    tourney = Tournament(regions['east'], regions['west'], regions['south'], regions['midwest'], players)
+    tourney.simulate_tournament(ratings, 'kenpom')
+    assert tourney.schedule.n_teams == 64
+    # south plays west and east plays midwest in the Final Four
+    assert [team.team_name for team in tourney.schedule.teams[:16:2]] == [m['team_1']['name'] for m in regions['south'].matchups]
+    assert tourney.champion in tourney.schedule.teams
+
+def test_sims_keep_their_own_games_played(bracket_68):
+    description, ratings, players = bracket_68
+    _, sims = simulate_n_tournaments(description, players, ratings, 'kenpom', N=20)
+    for sim in sims:
+        # each tournament's teams only hold its own games
+        assert sum(team.games_played for team in sim.schedule.teams) == 2 * (~sim.schedule.play_in).sum()
+        assert sim.champion.games_played == 6
+        assert sim.champion in sim.schedule.teams
+    games_played = {tuple(team.games_played for team in sim.schedule.teams) for sim in sims}
+    assert len(games_played) > 1
@@ -0,0 +1,57 @@
+import numpy as np
+import pytest
+from batch_engine import compile_bracket_ratings
+from exact_bracket import game_probs
+from player_moments import player_moments
+from simulate_tournament import simulate_n_tournaments
+from variance_reduction import SAMPLING
+
+# Repeated seeded runs of every scheme: the spread of their estimates is each scheme's noise
+REPEATS = 40
+N = 1024
+
+@pytest.fixture(scope='module')
+def estimates(bracket_68):
+    '''
+    The favorite's title probability and the expected total of every player's points, with their
+    exact values, estimated REPEATS times by every sampling scheme.
+    '''
+    description, ratings, players = bracket_68
+    compiled = compile_bracket_ratings(description, ratings, 'kenpom')
+    _, advancement = game_probs(compiled.wp, compiled.schedule)
+    favorite = int(np.argmax(advancement[:, -1]))
+    exact = np.array([advancement[favorite, -1], player_moments(description, players, ratings, 'kenpom')[0]['Mean'].sum()])
+
+    runs = {}
+    for sampling in SAMPLING:
+        runs[sampling] = np.array([[(results.champions() == favorite).mean(), results.totals.sum(axis=1, dtype=np.float64).mean()]
+                                   for results in (simulate_n_tournaments(description, players, ratings, 'kenpom', N=N, engine='batch',
+                                                                          seed=seed, sampling=sampling)[1] for seed in range(REPEATS))])
+    return exact, runs
+
+def test_schemes_are_unbiased(estimates):
+    exact, runs = estimates
+    for sampling, values in runs.items():
+        stderr = values.std(axis=0, ddof=1) / np.sqrt(REPEATS)
+        assert np.all(np.abs(values.mean(axis=0) - exact) <= 5 * stderr), sampling
+
+def test_schemes_reduce_variance(estimates):
+    _, runs = estimates
+    variance = {sampling: values.var(axis=0, ddof=1) for sampling, values in runs.items()}
+    # every design spreads the points totals better than independent draws, and Sobol points
+    # the title too
+    for sampling in ('antithetic', 'stratified', 'sobol'):
+        assert variance[sampling][1] < 0.75 * variance['random'][1], sampling
+    assert variance['sobol'][0] < 0.75 * variance['random'][0]
+
+def test_common_random_numbers_cancel_in_differences(bracket_68):
+    description, ratings, players = bracket_68
+    compiled = compile_bracket_ratings(description, ratings, 'kenpom')
+    _, advancement = game_probs(compiled.wp, compiled.schedule)
+    favorite = int(np.argmax(advancement[:, -1]))
+    # the favorite's title chances with and without in-simulation rating updates
+    title = lambda seed, **kwargs: (simulate_n_tournaments(description, {}, ratings, 'kenpom', N=N, engine='batch', seed=seed, sampling='random',
+                                                          player_bk_used=False, **kwargs)[1].champions() == favorite).mean()
+    common = [title(seed, rating_update=0.1) - title(seed) for seed in range(REPEATS)]
+    independent = [title(seed, rating_update=0.1) - title(REPEATS + seed) for seed in range(REPEATS)]
+    assert np.var(common, ddof=1) < 0.5 * np.var(independent, ddof=1)